@@ -0,0 +1,431 @@
+"""
+Clone throughput benchmark against a throwaway local PostgreSQL cluster.
+
+Starts a temporary cluster (initdb into a temp dir), generates databases of
+the requested sizes and table counts, times template clones
+(copy_database_logic and the bare CREATE DATABASE), logical clones
+(online_clone_database) and batch clones, and writes the results as JSON.
+
+Usage:
+    python benchmarks/clone_benchmark.py --pg-bin-dir "C:\\Program Files\\PostgreSQL\\16\\bin"
+    python benchmarks/clone_benchmark.py --sizes 10,100 --tables 1,50 --runs 3
+    python benchmarks/clone_benchmark.py --compare benchmarks/results/old.json
+
+The cluster and everything generated in it are removed afterwards, unless
+--keep-cluster is given.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from psycopg2 import sql  # noqa: E402
+from db.connection import connect_to_db  # noqa: E402
+from db.restore_ops import find_pg_executable  # noqa: E402
+from db.clone_strategy import (  # noqa: E402
+    STRATEGY_WAL_LOG,
+    STRATEGY_FILE_COPY,
+    STRATEGY_MIN_SERVER_VERSION,
+    build_create_database_query,
+    get_server_version_num,
+)
+
+BENCH_USER = "bench"
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+ROW_BYTES = 160  # approximate on-disk size of one generated row incl. index
+SCENARIOS = ("create", "template", "logical", "batch")
+REGRESSION_THRESHOLD = 0.10
+
+
+def log(message):
+    print(f"[{datetime.now().strftime('%H:%M:%S')}] {message}", flush=True)
+
+
+def _free_port():
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class LocalCluster:
+    """A throwaway PostgreSQL cluster in a temporary directory."""
+
+    def __init__(self, pg_bin_dir=None):
+        self.pg_bin_dir = pg_bin_dir
+        self.base_dir = tempfile.mkdtemp(prefix="appdev_bench_")
+        self.data_dir = os.path.join(self.base_dir, "data")
+        self.log_file = os.path.join(self.base_dir, "postgres.log")
+        self.port = _free_port()
+        self.credentials = {
+            "host": "127.0.0.1",
+            "port": str(self.port),
+            "user": BENCH_USER,
+            "password": "",
+        }
+
+    def _run(self, name, *args):
+        exe = find_pg_executable(name, self.pg_bin_dir)
+        result = subprocess.run([exe, *args], capture_output=True, text=True)
+        if result.returncode != 0:
+            raise Exception(f"{name} failed: {result.stderr.strip() or result.stdout.strip()}")
+
+    def start(self):
+        log(f"Creating cluster in {self.data_dir}")
+        self._run(
+            "initdb", "-D", self.data_dir, "-U", BENCH_USER, "--auth=trust",
+            "-E", "UTF8", "--no-sync",
+        )
+        options = f"-p {self.port} -c listen_addresses=127.0.0.1 -c fsync=off"
+        if os.name != "nt":
+            options += f" -k {self.base_dir}"
+        self._run("pg_ctl", "-D", self.data_dir, "-l", self.log_file, "-o", options, "-w", "start")
+        log(f"Cluster listening on 127.0.0.1:{self.port}")
+
+    def stop(self, keep=False):
+        try:
+            self._run("pg_ctl", "-D", self.data_dir, "-m", "fast", "-w", "stop")
+        except Exception as e:
+            log(f"Could not stop cluster: {e}")
+        if keep:
+            log(f"Cluster kept in {self.base_dir}")
+        else:
+            shutil.rmtree(self.base_dir, ignore_errors=True)
+
+
+def _admin_cursor(credentials, database="postgres"):
+    conn = connect_to_db(credentials, database=database)
+    if not conn:
+        raise Exception(f"Unable to connect to benchmark database '{database}'")
+    conn.autocommit = True
+    return conn, conn.cursor()
+
+
+def drop_database(credentials, db_name):
+    conn, cur = _admin_cursor(credentials)
+    try:
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(db_name)))
+    finally:
+        conn.close()
+
+
+def database_size(credentials, db_name):
+    conn, cur = _admin_cursor(credentials)
+    try:
+        cur.execute("SELECT pg_database_size(%s)", (db_name,))
+        return cur.fetchone()[0]
+    finally:
+        conn.close()
+
+
+def generate_database(credentials, db_name, size_mb, table_count):
+    """Create db_name with table_count tables holding roughly size_mb of rows in total."""
+    conn, cur = _admin_cursor(credentials)
+    try:
+        cur.execute(sql.SQL("CREATE DATABASE {}").format(sql.Identifier(db_name)))
+    finally:
+        conn.close()
+
+    rows_per_table = max(1, int(size_mb * 1024 * 1024 / ROW_BYTES / table_count))
+    conn, cur = _admin_cursor(credentials, db_name)
+    try:
+        for i in range(table_count):
+            table = sql.Identifier(f"bench_{i:04d}")
+            cur.execute(
+                sql.SQL(
+                    """
+                    CREATE TABLE {} (
+                        id bigint PRIMARY KEY,
+                        account_id integer NOT NULL,
+                        payload text NOT NULL,
+                        created_at timestamptz NOT NULL
+                    )
+                    """
+                ).format(table)
+            )
+            cur.execute(
+                sql.SQL(
+                    """
+                    INSERT INTO {}
+                    SELECT g, g % 1000, md5(g::text) || repeat('x', 64),
+                           now() - (g || ' seconds')::interval
+                    FROM generate_series(1, %s) g
+                    """
+                ).format(table),
+                (rows_per_table,),
+            )
+            cur.execute(sql.SQL("CREATE INDEX ON {} (account_id)").format(table))
+        cur.execute("VACUUM ANALYZE")
+    finally:
+        conn.close()
+    return rows_per_table
+
+
+def _timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    func(*args, **kwargs)
+    return time.perf_counter() - start
+
+
+def _quiet(message=None, progress=None):
+    pass
+
+
+def bench_create(credentials, src_db, target, strategy):
+    """Bare CREATE DATABASE ... TEMPLATE, without copy_database_logic's progress pacing."""
+    conn, cur = _admin_cursor(credentials)
+    try:
+        return _timed(
+            cur.execute,
+            build_create_database_query(target, src_db, credentials["user"], strategy),
+        )
+    finally:
+        conn.close()
+
+
+def bench_template(credentials, src_db, target, strategy):
+    from db.database_ops import copy_database_logic
+
+    return _timed(copy_database_logic, credentials, src_db, target, _quiet, strategy)
+
+
+def bench_logical(credentials, src_db, target, pg_bin_dir, parallel):
+    from db.stream_ops import online_clone_database
+
+    return _timed(
+        online_clone_database, credentials, src_db, target, _quiet,
+        max_parallel=parallel, pg_bin_dir=pg_bin_dir,
+    )
+
+
+def bench_batch(credentials, src_db, targets, strategy, parallel, fan_out):
+    from db.batch_ops import batch_clone_databases
+
+    results = {}
+
+    def run():
+        results.update(
+            batch_clone_databases(
+                credentials, src_db, targets, _quiet, lambda *args: None,
+                max_parallel=parallel, strategy=strategy, fan_out=fan_out,
+            )
+        )
+
+    seconds = _timed(run)
+    errors = [f"{name}: {error}" for name, error in results.items() if error]
+    if errors:
+        raise Exception("; ".join(errors))
+    return seconds
+
+
+def run_benchmarks(cluster, args):
+    credentials = cluster.credentials
+    conn, cur = _admin_cursor(credentials)
+    try:
+        version = get_server_version_num(cur)
+        cur.execute("SHOW server_version")
+        version_text = cur.fetchone()[0]
+    finally:
+        conn.close()
+
+    strategies = [None]
+    if version >= STRATEGY_MIN_SERVER_VERSION:
+        strategies = [STRATEGY_WAL_LOG, STRATEGY_FILE_COPY]
+
+    results = []
+    for size_mb in args.sizes:
+        for table_count in args.tables:
+            src_db = f"bench_src_{size_mb}mb_{table_count}t"
+            log(f"Generating {src_db} ({size_mb} MB in {table_count} table(s))...")
+            rows_per_table = generate_database(credentials, src_db, size_mb, table_count)
+            actual_bytes = database_size(credentials, src_db)
+            shape = {
+                "size_mb": size_mb,
+                "tables": table_count,
+                "rows_per_table": rows_per_table,
+                "source_bytes": actual_bytes,
+            }
+
+            def record(scenario, run, seconds, **extra):
+                copies = extra.get("copies", 1)
+                entry = {
+                    "scenario": scenario,
+                    "run": run,
+                    **shape,
+                    **extra,
+                    "seconds": round(seconds, 4),
+                    "mb_per_s": round(actual_bytes * copies / 1024 / 1024 / seconds, 2) if seconds else None,
+                }
+                results.append(entry)
+                label = ", ".join(f"{k}={v}" for k, v in extra.items() if v is not None)
+                log(f"  {scenario} {label} run {run}: {seconds:.3f}s")
+
+            for run in range(1, args.runs + 1):
+                for strategy in strategies:
+                    suffix = (strategy or "default").lower()
+                    if "create" in args.scenarios:
+                        target = f"bench_create_{suffix}"
+                        record("create", run, bench_create(credentials, src_db, target, strategy),
+                               strategy=strategy)
+                        drop_database(credentials, target)
+                    if "template" in args.scenarios:
+                        target = f"bench_template_{suffix}"
+                        record("template", run, bench_template(credentials, src_db, target, strategy),
+                               strategy=strategy)
+                        drop_database(credentials, target)
+                    if "batch" in args.scenarios:
+                        for fan_out in (False, True):
+                            targets = [f"bench_batch_{suffix}_{i:02d}" for i in range(args.batch_copies)]
+                            seconds = bench_batch(
+                                credentials, src_db, targets, strategy, args.parallel, fan_out
+                            )
+                            record("batch", run, seconds, strategy=strategy, copies=len(targets),
+                                   parallel=args.parallel, fan_out=fan_out)
+                            for target in targets:
+                                drop_database(credentials, target)
+
+                if "logical" in args.scenarios:
+                    target = "bench_logical"
+                    seconds = bench_logical(credentials, src_db, target, args.pg_bin_dir, args.parallel)
+                    record("logical", run, seconds, parallel=args.parallel)
+                    drop_database(credentials, target)
+
+            drop_database(credentials, src_db)
+
+    return {
+        "benchmark": "clone_throughput",
+        "started_at": args.started_at,
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+        "server_version": version_text,
+        "server_version_num": version,
+        "git_commit": _git_commit(),
+        "platform": platform.platform(),
+        "python": platform.python_version(),
+        "config": {
+            "sizes_mb": args.sizes,
+            "tables": args.tables,
+            "runs": args.runs,
+            "scenarios": args.scenarios,
+            "batch_copies": args.batch_copies,
+            "parallel": args.parallel,
+        },
+        "results": results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+        ).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def _result_key(entry):
+    return (
+        entry["scenario"], entry["size_mb"], entry["tables"], entry.get("strategy"),
+        entry.get("copies"), entry.get("parallel"), entry.get("fan_out"),
+    )
+
+
+def _median_seconds(report):
+    grouped = {}
+    for entry in report["results"]:
+        grouped.setdefault(_result_key(entry), []).append(entry["seconds"])
+    medians = {}
+    for key, values in grouped.items():
+        values.sort()
+        medians[key] = values[len(values) // 2]
+    return medians
+
+
+def compare_reports(baseline, current, threshold=REGRESSION_THRESHOLD):
+    """
+    Compare median timings per scenario and shape. Returns a list of
+    (key, baseline seconds, current seconds, change) sorted by change,
+    and the subset slower than threshold.
+    """
+    old = _median_seconds(baseline)
+    new = _median_seconds(current)
+    rows = []
+    for key in sorted(set(old) & set(new), key=str):
+        change = (new[key] - old[key]) / old[key] if old[key] else 0.0
+        rows.append((key, old[key], new[key], change))
+    rows.sort(key=lambda r: -r[3])
+    return rows, [r for r in rows if r[3] > threshold]
+
+
+def _parse_int_list(text):
+    return [int(part) for part in text.split(",") if part.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark database clone throughput.")
+    parser.add_argument("--pg-bin-dir", help="Directory with initdb, pg_ctl, pg_dump and psql")
+    parser.add_argument("--sizes", type=_parse_int_list, default=[10, 100],
+                        help="Comma separated database sizes in MB (default: 10,100)")
+    parser.add_argument("--tables", type=_parse_int_list, default=[1, 20],
+                        help="Comma separated table counts (default: 1,20)")
+    parser.add_argument("--runs", type=int, default=1, help="Repetitions per scenario")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma separated subset of {', '.join(SCENARIOS)}")
+    parser.add_argument("--batch-copies", type=int, default=4, help="Copies per batch clone")
+    parser.add_argument("--parallel", type=int, default=4, help="Parallelism for batch and logical clones")
+    parser.add_argument("--output", help="Result file (default: benchmarks/results/clone_<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    parser.add_argument("--keep-cluster", action="store_true", help="Keep the temporary cluster directory")
+    args = parser.parse_args(argv)
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenario(s): {', '.join(sorted(unknown))}")
+    args.started_at = datetime.now().isoformat(timespec="seconds")
+
+    # Keep lockout records and strategy benchmarks away from the user's app data
+    app_home = tempfile.mkdtemp(prefix="appdev_bench_home_")
+    os.environ["APPDEV_STATION_HOME"] = app_home
+
+    cluster = LocalCluster(args.pg_bin_dir)
+    try:
+        cluster.start()
+        report = run_benchmarks(cluster, args)
+    finally:
+        cluster.stop(keep=args.keep_cluster)
+        shutil.rmtree(app_home, ignore_errors=True)
+
+    output = args.output or os.path.join(
+        RESULTS_DIR, f"clone_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    log(f"Wrote {len(report['results'])} result(s) to {output}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows, regressions = compare_reports(baseline, report)
+        for key, old, new, change in rows:
+            flag = "  <-- regression" if change > REGRESSION_THRESHOLD else ""
+            log(f"{key}: {old:.3f}s -> {new:.3f}s ({change:+.0%}){flag}")
+        if regressions:
+            log(f"{len(regressions)} regression(s) above {REGRESSION_THRESHOLD:.0%}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
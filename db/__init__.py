@@ -8,4 +8,75 @@ from .database_ops import (
     execute_sql_query,
 )
 from .table_ops import get_tables_for_database, get_columns_for_table, get_table_details
-from .restore_ops import create_database, restore_database
\ No newline at end of file
+from .restore_ops import create_database, restore_database, find_pg_executable
+from .clone_strategy import (
+    CLONE_STRATEGIES,
+    STRATEGY_AUTO,
+    benchmark_clone_strategies,
+    load_strategy_benchmarks,
+)
+from .batch_ops import (
+    batch_clone_databases,
+    batch_copy_names,
+    sweep_frozen_templates,
+    DEFAULT_MAX_PARALLEL,
+    MAX_PARALLEL_LIMIT,
+)
+from .clone_pool import ClonePool, get_clone_pool, get_fresh_copy, list_clone_pools
+from .stream_ops import stream_clone_database, online_clone_database, DEFAULT_STREAM_PARALLEL
+from .subset_ops import DEFAULT_SUBSET_PERCENT
+from .clone_filters import estimate_filter_savings, parse_patterns, has_filters
+from .masking_ops import parse_masking_rules, MASK_METHODS
+from .job_queue import (
+    get_job_queue,
+    format_job_time,
+    FINISHED_STATUSES,
+    JOB_DONE,
+    JOB_FAILED,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    PRIORITY_LOW,
+)
+from .job_handlers import (
+    JOB_CLONE,
+    JOB_BATCH_CLONE,
+    JOB_RENAME,
+    JOB_DELETE,
+    JOB_BULK_DELETE,
+    JOB_RESTORE,
+    JOB_RETENTION,
+    JOB_SWAP,
+)
+from .source_lockout import (
+    restore_stale_lockouts,
+    get_drain_timeout,
+    set_drain_timeout,
+    MAX_DRAIN_TIMEOUT,
+)
+from .verify_ops import verify_clone, verification_summary, DEFAULT_CHUNK_ROWS
+from .drop_ops import bulk_drop_databases, DEFAULT_DROP_PARALLEL, MAX_DROP_PARALLEL
+from .trash_ops import move_to_trash, bulk_trash_databases, start_trash_reclaimer
+from .retention_ops import (
+    find_retention_candidates,
+    retention_report,
+    load_retention_policy,
+    save_retention_policy,
+    get_retention_status,
+    start_retention_scheduler,
+    format_size,
+    DEFAULT_RETENTION_POLICY,
+)
+from .swap_ops import swap_databases, retired_database_name
+from .query_stream import stream_sql_query, DEFAULT_FETCH_BATCH
+from .query_cancel import QueryCanceller, CANCELLED_MESSAGE
+from .columnar import ColumnarRows
+from .export_ops import export_query, export_format_for_path, EXPORT_FORMATS
+from .script_ops import (
+    run_script,
+    split_statements,
+    script_summary,
+    STATEMENT_OK,
+    STATEMENT_FAILED,
+    STATEMENT_SKIPPED,
+    STATEMENT_ROLLED_BACK,
+)
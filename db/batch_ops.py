@@ -0,0 +1,325 @@
+import re
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2 import sql
+from .connection import connect_to_db
+from .clone_strategy import resolve_clone_strategy, build_create_database_query
+from .source_lockout import lock_source_database, release_source_database, create_from_template
+from .verify_ops import verify_clone, verification_summary
+
+DEFAULT_MAX_PARALLEL = 4
+MAX_PARALLEL_LIMIT = 16
+
+STATUS_QUEUED = "Queued"
+STATUS_RUNNING = "Running"
+STATUS_DONE = "Done"
+STATUS_FAILED = "Failed"
+
+FROZEN_TEMPLATE_PREFIX = "_frozen_"
+# Frozen templates older than this that no batch of this process is using
+# were left by a crashed run and are swept at login
+STALE_FROZEN_TEMPLATE_AGE = 6 * 3600
+
+# Frozen templates in use by batches of this process
+_active_templates = set()
+_active_templates_lock = threading.Lock()
+
+
+def batch_copy_names(base_name, count):
+    """Return the target names used for a batch of copies (base_01, base_02, ...)."""
+    if count == 1:
+        return [base_name]
+    return [f"{base_name}_{i + 1:02d}" for i in range(count)]
+
+
+def _validate_batch(cur, src_db, new_names):
+    """Validate the source and all target names with a single catalog query."""
+    if not new_names:
+        raise Exception("No target database names given")
+
+    lowered = [name.lower() for name in new_names]
+    if len(set(lowered)) != len(lowered):
+        raise Exception("Target database names must be unique")
+
+    for name in new_names:
+        if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", name):
+            raise Exception(
+                f"Invalid database name '{name}': only letters, numbers, and underscores are allowed"
+            )
+        if len(name) > 63:
+            raise Exception(f"Database name '{name}' exceeds 63 characters")
+
+    cur.execute(
+        "SELECT datname FROM pg_database WHERE datname = %s OR lower(datname) = ANY(%s)",
+        (src_db, lowered),
+    )
+    existing = [row[0] for row in cur.fetchall()]
+    if src_db not in existing:
+        raise Exception(f"Source database '{src_db}' does not exist")
+    collisions = [name for name in existing if name != src_db]
+    if collisions:
+        raise Exception(f"Database(s) already exist: {', '.join(collisions)}")
+
+
+def frozen_template_name(src_db):
+    """
+    Return a unique name for the hidden template used by a fan-out batch. The
+    timestamp dates it for sweep_frozen_templates; the random part keeps two
+    batches of the same source started in the same second apart.
+    """
+    suffix = f"_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+    return f"{FROZEN_TEMPLATE_PREFIX}{src_db}"[: 63 - len(suffix)] + suffix
+
+
+def _create_frozen_template(cur, credentials, src_db, template_db, strategy):
+    """
+    Clone src_db into template_db, then mark it as a template that refuses
+    connections. Template databases are hidden from fetch_databases.
+    """
+    create_from_template(
+        cur, build_create_database_query(template_db, src_db, credentials["user"], strategy), src_db
+    )
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false IS_TEMPLATE true").format(
+            sql.Identifier(template_db)
+        )
+    )
+
+
+def _drop_frozen_template(cur, template_db):
+    """Drop a frozen template. Returns False if it was never created."""
+    cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (template_db,))
+    if not cur.fetchone():
+        return False
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(sql.Identifier(template_db))
+    )
+    try:
+        cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(template_db)))
+    except Exception:
+        # Keep it hidden until a later sweep can drop it
+        cur.execute(
+            sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE true").format(sql.Identifier(template_db))
+        )
+        raise
+    return True
+
+
+def sweep_frozen_templates(credentials, min_age=STALE_FROZEN_TEMPLATE_AGE):
+    """
+    Drop frozen templates left behind by fan-out batches that never reached
+    their cleanup (the app was killed or crashed mid-batch). Only templates
+    older than min_age, going by the timestamp in their name, and not used by
+    a batch of this process are dropped. Returns the names of the dropped ones.
+    """
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    dropped = []
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT datname FROM pg_database WHERE datistemplate AND datname LIKE %s",
+            (FROZEN_TEMPLATE_PREFIX.replace("_", r"\_") + "%",),
+        )
+        now = time.time()
+        for (name,) in cur.fetchall():
+            match = re.search(r"_(\d+)(?:_[0-9a-f]{8})?$", name)
+            if not match or now - int(match.group(1)) < min_age:
+                continue
+            with _active_templates_lock:
+                if name in _active_templates:
+                    continue
+            try:
+                if _drop_frozen_template(cur, name):
+                    dropped.append(name)
+            except Exception as e:
+                print(f"Could not drop stale frozen template '{name}': {e}")
+        cur.close()
+    finally:
+        conn.close()
+    return dropped
+
+
+def _clone_one(credentials, template_db, new_db, strategy, progress_callback):
+    """Issue one CREATE DATABASE on its own connection. Returns elapsed seconds."""
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        progress_callback(new_db, STATUS_RUNNING, "Creating database...")
+        start = time.perf_counter()
+        create_from_template(
+            cur,
+            build_create_database_query(new_db, template_db, credentials["user"], strategy),
+            template_db,
+        )
+        elapsed = time.perf_counter() - start
+        cur.close()
+        return elapsed
+    finally:
+        conn.close()
+
+
+def batch_clone_databases(
+    credentials,
+    src_db,
+    new_names,
+    update_callback,
+    progress_callback,
+    max_parallel=DEFAULT_MAX_PARALLEL,
+    strategy=None,
+    fan_out=False,
+    mark_creating=None,
+    verify=False,
+    verify_max_mb_per_s=None,
+):
+    """
+    Clone src_db into every name in new_names, issuing the CREATE DATABASE
+    statements concurrently after a single validation pass.
+
+    New connections to the source are blocked for the duration of the clones
+    (see lock_source_database). In fan-out mode the source is cloned once into
+    a hidden frozen template (connections disallowed), every copy is made from
+    that template and the template is dropped at the end, so the source is
+    only locked for the one copy.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - src_db: Source (template) database
+      - new_names: List of target database names
+      - update_callback: update_callback(message=None, progress=None) for batch-level status
+      - progress_callback: progress_callback(db_name, status, message) for per-copy rows
+      - max_parallel: Maximum number of CREATE DATABASE statements in flight
+      - strategy: CREATE DATABASE strategy (see copy_database_logic)
+      - fan_out: Clone through a frozen intermediate template
+      - mark_creating: Optional mark_creating(db_name) called before the frozen
+        template is created (its name is unique to this batch) and after each
+        copy is created, so a job can drop them if the process dies mid-batch
+      - verify: Compare every finished copy with src_db once the source is
+        released (see copy_database_logic); a copy that differs counts as failed
+      - verify_max_mb_per_s: Optional I/O budget for verification
+
+    Returns:
+      - Dictionary mapping each target name to an error message, or None on success
+    """
+    max_parallel = max(1, min(int(max_parallel), MAX_PARALLEL_LIMIT, len(new_names) or 1))
+
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+
+    template_db = src_db
+    lockout = None
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+
+        update_callback("🔍 Validating source and target names...", 2)
+        _validate_batch(cur, src_db, new_names)
+
+        cur.execute("SELECT pg_database_size(%s)", (src_db,))
+        size_bytes = cur.fetchone()[0] or 0
+        clone_strategy, strategy_reason = resolve_clone_strategy(
+            credentials, cur, strategy, size_bytes
+        )
+        update_callback(
+            f"🧭 Clone strategy: {clone_strategy or 'server default'} ({strategy_reason})", 4
+        )
+
+        lockout = lock_source_database(credentials, src_db, update_callback, 5)
+
+        if fan_out:
+            template_db = frozen_template_name(src_db)
+            with _active_templates_lock:
+                _active_templates.add(template_db)
+            if mark_creating:
+                mark_creating(template_db)
+            update_callback(f"🧊 Creating frozen template '{template_db}'...", 6)
+            _create_frozen_template(cur, credentials, src_db, template_db, clone_strategy)
+            release_source_database(lockout, update_callback, 9)
+            lockout = None
+            update_callback(
+                f"✅ Frozen template ready - '{src_db}' is no longer needed for this batch", 10
+            )
+
+        for name in new_names:
+            progress_callback(name, STATUS_QUEUED, "")
+
+        update_callback(
+            f"🚀 Cloning {len(new_names)} database(s) with up to {max_parallel} in parallel...", 10
+        )
+
+        results = {}
+        completed = 0
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            futures = {
+                executor.submit(
+                    _clone_one, credentials, template_db, name, clone_strategy, progress_callback
+                ): name
+                for name in new_names
+            }
+            for future in as_completed(futures):
+                name = futures[future]
+                completed += 1
+                try:
+                    elapsed = future.result()
+                    results[name] = None
+                    if mark_creating:
+                        mark_creating(name)
+                    progress_callback(name, STATUS_DONE, f"{elapsed:.1f}s")
+                except Exception as e:
+                    results[name] = str(e)
+                    progress_callback(name, STATUS_FAILED, str(e))
+                update_callback(
+                    f"📦 {completed} of {len(new_names)} copies finished",
+                    10 + completed * 88 / len(new_names),
+                )
+
+        cur.close()
+    finally:
+        if lockout:
+            release_source_database(lockout, update_callback)
+        if template_db != src_db:
+            try:
+                if _drop_frozen_template(conn.cursor(), template_db):
+                    update_callback(f"🧹 Dropped frozen template '{template_db}'", None)
+            except Exception as e:
+                update_callback(
+                    f"⚠️  Could not drop frozen template '{template_db}': {e}", None
+                )
+            with _active_templates_lock:
+                _active_templates.discard(template_db)
+        conn.close()
+
+    if verify:
+        for name in [name for name, error in results.items() if error is None]:
+            progress_callback(name, STATUS_RUNNING, "Verifying...")
+            try:
+                verification = verify_clone(
+                    credentials,
+                    src_db,
+                    credentials,
+                    name,
+                    lambda message, progress=None: message and update_callback(message, None),
+                    max_mb_per_s=verify_max_mb_per_s,
+                )
+                summary = verification_summary(verification)
+                if summary:
+                    raise Exception(f"Verification failed:\n{summary}")
+                progress_callback(name, STATUS_DONE, "Verified")
+            except Exception as e:
+                results[name] = str(e)
+                progress_callback(name, STATUS_FAILED, str(e))
+
+    failures = [name for name, error in results.items() if error]
+    if failures:
+        update_callback(f"❌ {len(failures)} of {len(new_names)} copies failed", None)
+    else:
+        update_callback(f"🎉 {len(new_names)} copies of '{src_db}' created successfully!", 100)
+    return results
@@ -0,0 +1,121 @@
+from fnmatch import fnmatchcase
+from .connection import connect_to_db
+
+FILTER_KEYS = (
+    "include_schemas",
+    "exclude_schemas",
+    "include_tables",
+    "exclude_tables",
+    "schema_only_tables",
+)
+
+
+def parse_patterns(text):
+    """Split a comma separated pattern list as typed in the UI."""
+    return [p.strip() for p in (text or "").split(",") if p.strip()]
+
+
+def _matches(schema, table, patterns):
+    """
+    Match a table against glob patterns. A pattern with a dot matches
+    "schema.table"; a pattern without one matches the table name in any schema.
+    """
+    label = f"{schema}.{table}"
+    for pattern in patterns:
+        if "." in pattern:
+            if fnmatchcase(label, pattern):
+                return True
+        elif fnmatchcase(table, pattern):
+            return True
+    return False
+
+
+def has_filters(filters):
+    return bool(filters) and any(filters.get(key) for key in FILTER_KEYS)
+
+
+def copies_table_data(table, filters):
+    """
+    Decide whether a table's rows are copied. Tables that are filtered out are
+    still created by the schema copy, just left empty.
+    """
+    if not filters:
+        return True
+    schema, name = table["schema"], table["table"]
+
+    include_schemas = filters.get("include_schemas") or []
+    if include_schemas and not any(fnmatchcase(schema, p) for p in include_schemas):
+        return False
+    if any(fnmatchcase(schema, p) for p in filters.get("exclude_schemas") or []):
+        return False
+
+    include_tables = filters.get("include_tables") or []
+    if include_tables and not _matches(schema, name, include_tables):
+        return False
+    if _matches(schema, name, filters.get("exclude_tables") or []):
+        return False
+    if _matches(schema, name, filters.get("schema_only_tables") or []):
+        return False
+    return True
+
+
+def split_tables(tables, filters):
+    """Return (tables whose data is copied, tables created empty)."""
+    copied, empty = [], []
+    for table in tables:
+        (copied if copies_table_data(table, filters) else empty).append(table)
+    return copied, empty
+
+
+def tables_losing_rows(copied, empty, foreign_keys):
+    """
+    Return the labels of copied tables that lose rows when orphans are pruned:
+    those with a foreign key to a table left empty and, in turn, the tables
+    referencing them.
+    """
+    copied_labels = {f"{t['schema']}.{t['table']}" for t in copied}
+    emptied = {f"{t['schema']}.{t['table']}" for t in empty}
+    affected = set()
+    changed = True
+    while changed:
+        changed = False
+        for fk in foreign_keys:
+            if fk["child"] in copied_labels and fk["child"] not in affected and (
+                fk["parent"] in emptied or fk["parent"] in affected
+            ):
+                affected.add(fk["child"])
+                changed = True
+    return sorted(affected)
+
+
+def estimate_filter_savings(credentials, db_name, filters):
+    """
+    Estimate how much data a filtered clone skips, from pg_total_relation_size.
+
+    Returns a dictionary with total_bytes, skipped_bytes, copied_tables,
+    skipped_tables (a list of (label, bytes), largest first) and pruned_tables
+    (copied tables whose rows referencing an empty table will be deleted so
+    the foreign keys can be created, see tables_losing_rows).
+    """
+    from .stream_ops import list_source_tables, table_label
+    from .subset_ops import list_foreign_keys
+
+    conn = connect_to_db(credentials, database=db_name)
+    if not conn:
+        raise Exception(f"Unable to connect to database '{db_name}'")
+    try:
+        cur = conn.cursor()
+        tables = list_source_tables(cur)
+        foreign_keys = list_foreign_keys(cur)
+        cur.close()
+    finally:
+        conn.close()
+
+    copied, empty = split_tables(tables, filters)
+    return {
+        "total_bytes": sum(t["size_bytes"] for t in tables),
+        "skipped_bytes": sum(t["size_bytes"] for t in empty),
+        "copied_tables": len(copied),
+        "skipped_tables": [(table_label(t), t["size_bytes"]) for t in empty],
+        "pruned_tables": tables_losing_rows(copied, empty, foreign_keys),
+    }
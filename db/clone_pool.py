@@ -0,0 +1,388 @@
+import hashlib
+import re
+import threading
+import time
+import uuid
+from psycopg2 import sql
+from .connection import connect_to_db
+from .clone_strategy import server_key, build_create_database_query
+from .source_lockout import lock_source_database, release_source_database, create_from_template
+
+POOL_PREFIX = "_pool_"
+DEFAULT_POOL_SIZE = 2
+DEFAULT_REFILL_INTERVAL = 1.0
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def pool_prefix(template_db):
+    """
+    Return the name prefix shared by all spares of a template. A hash of the
+    full name keeps templates with a long common prefix apart.
+    """
+    digest = hashlib.md5(template_db.encode("utf-8")).hexdigest()[:8]
+    return f"{POOL_PREFIX}{template_db[:30]}_{digest}_"
+
+
+def template_state(cur, template_db):
+    """
+    Fingerprint the contents of a template: its oid, when its statistics were
+    last reset and how many rows have been inserted, updated or deleted in it
+    (catalog rows included, so DDL counts too). Any write to the template
+    changes the fingerprint. Returns None if the template does not exist.
+    """
+    cur.execute(
+        """
+        SELECT concat_ws(':', d.oid, coalesce(extract(epoch FROM s.stats_reset)::bigint, 0),
+                         s.tup_inserted + s.tup_updated + s.tup_deleted)
+        FROM pg_database d
+        JOIN pg_stat_database s ON s.datid = d.oid
+        WHERE d.datname = %s
+        """,
+        (template_db,),
+    )
+    row = cur.fetchone()
+    return row[0] if row else None
+
+
+class ClonePool:
+    """
+    Background-maintained pool of ready clones of one template database.
+
+    Spares are full copies marked IS_TEMPLATE with connections disallowed, which
+    keeps them pristine and hidden from fetch_databases. Handing one out is an
+    ALTER DATABASE ... RENAME plus a flag flip, so it completes in milliseconds.
+
+    Each spare carries the template_state it was copied at in its database
+    comment. A spare whose state no longer matches the template's is stale;
+    acquire() drops it instead of handing it out.
+    """
+
+    def __init__(
+        self,
+        credentials,
+        template_db,
+        size=DEFAULT_POOL_SIZE,
+        max_concurrent_refills=1,
+        refill_interval=DEFAULT_REFILL_INTERVAL,
+        strategy=None,
+    ):
+        self.credentials = credentials
+        self.template_db = template_db
+        self.size = size
+        self.max_concurrent_refills = max(1, max_concurrent_refills)
+        self.refill_interval = refill_interval
+        self.strategy = strategy
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = threading.Event()
+        self._workers = []
+        self._in_flight = 0
+        self._ready = []
+        self._states = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.discarded = 0
+        self.refill_times = []
+        self.last_error = None
+
+    # --- lifecycle ---
+
+    def start(self):
+        """Adopt spares left by earlier sessions and start the refill workers."""
+        self._stopping.clear()
+        self._adopt_existing_spares()
+        if not self._workers:
+            for _ in range(self.max_concurrent_refills):
+                worker = threading.Thread(target=self._refill_loop, daemon=True)
+                worker.start()
+                self._workers.append(worker)
+        self._wake.set()
+
+    def stop(self, drop_spares=False):
+        """Stop refilling. Optionally drop every ready spare."""
+        self._stopping.set()
+        self._wake.set()
+        for worker in self._workers:
+            worker.join(timeout=0.5)
+        self._workers = []
+        if drop_spares:
+            with self._lock:
+                spares, self._ready = self._ready, []
+            self._drop_spares(spares)
+
+    def resize(self, size):
+        self.size = max(0, int(size))
+        self._wake.set()
+
+    # --- hand-out ---
+
+    def acquire(self, new_name):
+        """
+        Hand out a fresh copy of the template under new_name.
+
+        Returns a dictionary with "hit" (a spare was used) and "elapsed_ms".
+        On a miss the copy is created synchronously from the template.
+        """
+        start = time.perf_counter()
+        conn = connect_to_db(self.credentials)
+        if not conn:
+            raise Exception("Unable to connect to database.")
+        spare = None
+        unlocked = False
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            spare = self._take_spare(template_state(cur, self.template_db))
+            if spare:
+                # Flags first: once renamed, new_name must already be a normal database
+                cur.execute(
+                    sql.SQL(
+                        "ALTER DATABASE {} WITH IS_TEMPLATE false ALLOW_CONNECTIONS true"
+                    ).format(sql.Identifier(spare))
+                )
+                unlocked = True
+                cur.execute(
+                    sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                        sql.Identifier(spare), sql.Identifier(new_name)
+                    )
+                )
+                try:
+                    cur.execute(sql.SQL("COMMENT ON DATABASE {} IS NULL").format(sql.Identifier(new_name)))
+                except Exception as e:
+                    print(f"Could not clear the pool comment of '{new_name}': {e}")
+            else:
+                lockout = lock_source_database(self.credentials, self.template_db)
+                try:
+                    create_from_template(
+                        cur,
+                        build_create_database_query(
+                            new_name, self.template_db, self.credentials["user"], self.strategy
+                        ),
+                        self.template_db,
+                    )
+                finally:
+                    release_source_database(lockout)
+            cur.close()
+        except Exception:
+            # The rename is the last step that can fail, so the spare is still unused
+            if spare:
+                self._return_spare(conn, spare, unlocked)
+            raise
+        finally:
+            conn.close()
+
+        with self._lock:
+            if spare:
+                self.hits += 1
+                self._states.pop(spare, None)
+            else:
+                self.misses += 1
+        self._wake.set()
+        return {
+            "hit": spare is not None,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    def stats(self):
+        """Return pool hits, misses, readiness and refill timings."""
+        with self._lock:
+            refill_times = list(self.refill_times)
+            return {
+                "template": self.template_db,
+                "size": self.size,
+                "ready": len(self._ready),
+                "refilling": self._in_flight,
+                "hits": self.hits,
+                "misses": self.misses,
+                "discarded": self.discarded,
+                "refills": len(refill_times),
+                "last_refill_s": refill_times[-1] if refill_times else None,
+                "avg_refill_s": (sum(refill_times) / len(refill_times)) if refill_times else None,
+                "last_error": self.last_error,
+            }
+
+    # --- internals ---
+
+    def _adopt_existing_spares(self):
+        prefix = pool_prefix(self.template_db)
+        conn = connect_to_db(self.credentials)
+        if not conn:
+            return
+        try:
+            cur = conn.cursor()
+            cur.execute(
+                """
+                SELECT datname, shobj_description(oid, 'pg_database')
+                FROM pg_database WHERE left(datname, %s) = %s AND datistemplate
+                """,
+                (len(prefix), prefix),
+            )
+            spares = cur.fetchall()
+            cur.close()
+        finally:
+            conn.close()
+        with self._lock:
+            for spare, state in spares:
+                if spare not in self._ready and re.match(r"^[0-9a-f]{8}$", spare[len(prefix):]):
+                    self._ready.append(spare)
+                    self._states[spare] = state
+
+    def _take_spare(self, state):
+        """Pop the first spare copied at the template's current state; stale ones are dropped."""
+        stale = []
+        spare = None
+        with self._lock:
+            while self._ready:
+                candidate = self._ready.pop(0)
+                if state is not None and self._states.get(candidate) == state:
+                    spare = candidate
+                    break
+                stale.append(candidate)
+                self._states.pop(candidate, None)
+            self.discarded += len(stale)
+        if stale:
+            threading.Thread(target=self._drop_spares, args=(stale,), daemon=True).start()
+            self._wake.set()
+        return spare
+
+    def _return_spare(self, conn, spare, unlocked):
+        """Put a spare that could not be handed out back in the pool, hidden again."""
+        if unlocked:
+            try:
+                cur = conn.cursor()
+                cur.execute(
+                    sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false IS_TEMPLATE true").format(
+                        sql.Identifier(spare)
+                    )
+                )
+                cur.close()
+            except Exception as e:
+                # Someone may have connected to it; it is no longer pristine
+                print(f"Could not hide pool spare '{spare}' again, dropping it: {e}")
+                with self._lock:
+                    self._states.pop(spare, None)
+                    self.discarded += 1
+                threading.Thread(target=self._drop_spares, args=([spare],), daemon=True).start()
+                return
+        with self._lock:
+            self._ready.insert(0, spare)
+
+    def _claim_refill_slot(self):
+        with self._lock:
+            if len(self._ready) + self._in_flight >= self.size:
+                return False
+            self._in_flight += 1
+            return True
+
+    def _refill_loop(self):
+        while not self._stopping.is_set():
+            if not self._claim_refill_slot():
+                self._wake.wait(timeout=5)
+                self._wake.clear()
+                continue
+            try:
+                self._create_spare()
+            except Exception as e:
+                with self._lock:
+                    self.last_error = str(e)
+                self._stopping.wait(timeout=max(self.refill_interval, 5))
+            finally:
+                with self._lock:
+                    self._in_flight -= 1
+            self._stopping.wait(timeout=self.refill_interval)
+
+    def _create_spare(self):
+        spare = f"{pool_prefix(self.template_db)}{uuid.uuid4().hex[:8]}"
+        conn = connect_to_db(self.credentials)
+        if not conn:
+            raise Exception("Unable to connect to database.")
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            start = time.perf_counter()
+            lockout = lock_source_database(self.credentials, self.template_db)
+            try:
+                # Taken while the template is locked out, so nothing can write in between
+                state = template_state(cur, self.template_db)
+                create_from_template(
+                    cur,
+                    build_create_database_query(
+                        spare, self.template_db, self.credentials["user"], self.strategy
+                    ),
+                    self.template_db,
+                )
+            finally:
+                release_source_database(lockout)
+            cur.execute(
+                sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false IS_TEMPLATE true").format(
+                    sql.Identifier(spare)
+                )
+            )
+            cur.execute(
+                sql.SQL("COMMENT ON DATABASE {} IS {}").format(sql.Identifier(spare), sql.Literal(state))
+            )
+            elapsed = time.perf_counter() - start
+            cur.close()
+        finally:
+            conn.close()
+        with self._lock:
+            self._ready.append(spare)
+            self._states[spare] = state
+            self.refill_times.append(elapsed)
+            self.refill_times = self.refill_times[-50:]
+            self.last_error = None
+
+    def _drop_spares(self, spares):
+        for spare in spares:
+            self._drop_spare(spare)
+
+    def _drop_spare(self, spare):
+        conn = connect_to_db(self.credentials)
+        if not conn:
+            return
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute(
+                sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(sql.Identifier(spare))
+            )
+            cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(spare)))
+            cur.close()
+        except Exception as e:
+            print(f"Error dropping pool spare '{spare}': {e}")
+        finally:
+            conn.close()
+
+
+def get_clone_pool(credentials, template_db, size=None, start=True):
+    """
+    Return the warm pool for template_db on this server, creating it if needed.
+    Pools live for the lifetime of the process.
+    """
+    key = (server_key(credentials), template_db)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = ClonePool(credentials, template_db, size or DEFAULT_POOL_SIZE)
+            _pools[key] = pool
+    if size is not None:
+        pool.resize(size)
+    if start:
+        pool.start()
+    return pool
+
+
+def get_fresh_copy(credentials, template_db, new_name):
+    """Hand out a fresh copy of template_db from its warm pool (see ClonePool.acquire)."""
+    return get_clone_pool(credentials, template_db).acquire(new_name)
+
+
+def list_clone_pools():
+    """Return the stats of every warm pool in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [pool.stats() for pool in pools]
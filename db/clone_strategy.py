@@ -0,0 +1,232 @@
+import time
+from datetime import datetime
+from psycopg2 import sql
+from .connection import connect_to_db
+from .local_store import load_json, save_json
+
+STRATEGY_AUTO = "AUTO"
+STRATEGY_WAL_LOG = "WAL_LOG"
+STRATEGY_FILE_COPY = "FILE_COPY"
+# Leave STRATEGY out of CREATE DATABASE, same as passing no strategy
+STRATEGY_SERVER_DEFAULT = "SERVER_DEFAULT"
+CLONE_STRATEGIES = [STRATEGY_AUTO, STRATEGY_WAL_LOG, STRATEGY_FILE_COPY, STRATEGY_SERVER_DEFAULT]
+
+# CREATE DATABASE ... STRATEGY was added in PostgreSQL 15
+STRATEGY_MIN_SERVER_VERSION = 150000
+
+# Templates at or above this size are cloned with FILE_COPY when no benchmark data exists.
+# Below it WAL_LOG wins because FILE_COPY forces two checkpoints.
+FILE_COPY_SIZE_THRESHOLD = 512 * 1024 * 1024
+
+BENCHMARK_FILE = "clone_strategy_benchmarks.json"
+
+
+def server_key(credentials):
+    """Identify a server for locally recorded statistics."""
+    return f"{credentials['host']}:{credentials['port']}"
+
+
+def get_server_version_num(cur):
+    """Return the server version as an integer, e.g. 150004 for 15.4."""
+    cur.execute("SHOW server_version_num")
+    return int(cur.fetchone()[0])
+
+
+def count_attached_replicas(cur):
+    """
+    Return the number of streaming replicas attached to the server.
+    Returns 0 when pg_stat_replication is not readable by the current user.
+    """
+    try:
+        cur.execute("SELECT count(*) FROM pg_stat_replication")
+        return cur.fetchone()[0]
+    except Exception:
+        return 0
+
+
+def load_strategy_benchmarks(credentials=None):
+    """
+    Load recorded strategy benchmark runs.
+    Returns all runs keyed by server, or only the runs for the given server.
+    """
+    data = load_json(BENCHMARK_FILE, default={}) or {}
+    if credentials is None:
+        return data
+    return data.get(server_key(credentials), [])
+
+
+def _benchmark_winner(runs, size_bytes):
+    """Pick the strategy that won most recorded runs on templates of comparable size."""
+    wins = {}
+    for run in runs:
+        run_size = run.get("size_bytes") or 0
+        if size_bytes and run_size and not (size_bytes / 4 <= run_size <= size_bytes * 4):
+            continue
+        winner = run.get("winner")
+        if winner in (STRATEGY_WAL_LOG, STRATEGY_FILE_COPY):
+            wins[winner] = wins.get(winner, 0) + 1
+    if not wins:
+        return None
+    return max(wins, key=wins.get)
+
+
+def choose_clone_strategy(credentials, cur, size_bytes):
+    """
+    Choose a CREATE DATABASE strategy for a template of the given size.
+
+    Returns (strategy, reason). strategy is None when the server does not
+    support the STRATEGY option (PostgreSQL 14 and older).
+    """
+    version = get_server_version_num(cur)
+    if version < STRATEGY_MIN_SERVER_VERSION:
+        return None, "server older than PostgreSQL 15 - STRATEGY not supported"
+
+    replicas = count_attached_replicas(cur)
+    if replicas > 0:
+        return STRATEGY_FILE_COPY, f"{replicas} replica(s) attached - avoiding full WAL stream"
+
+    winner = _benchmark_winner(load_strategy_benchmarks(credentials), size_bytes)
+    if winner:
+        return winner, "fastest in recorded benchmarks for this server"
+
+    if size_bytes >= FILE_COPY_SIZE_THRESHOLD:
+        return STRATEGY_FILE_COPY, "large template"
+    return STRATEGY_WAL_LOG, "small template"
+
+
+def resolve_clone_strategy(credentials, cur, strategy, size_bytes):
+    """
+    Resolve a requested strategy (None, AUTO, WAL_LOG, FILE_COPY or
+    SERVER_DEFAULT) to the value used in CREATE DATABASE. Returns
+    (strategy or None, reason).
+    """
+    if strategy is None or strategy.upper() == STRATEGY_SERVER_DEFAULT:
+        return None, "server default"
+
+    strategy = strategy.upper()
+    if strategy == STRATEGY_AUTO:
+        return choose_clone_strategy(credentials, cur, size_bytes)
+    if strategy not in (STRATEGY_WAL_LOG, STRATEGY_FILE_COPY):
+        raise Exception(f"Unknown clone strategy '{strategy}'")
+
+    if get_server_version_num(cur) < STRATEGY_MIN_SERVER_VERSION:
+        raise Exception("The STRATEGY option requires PostgreSQL 15 or later")
+    return strategy, "selected"
+
+
+def build_create_database_query(new_db, template_db, owner, strategy=None):
+    """Build CREATE DATABASE ... WITH TEMPLATE ... OWNER [STRATEGY] as a composed statement."""
+    query = sql.SQL("CREATE DATABASE {} WITH TEMPLATE {} OWNER {}").format(
+        sql.Identifier(new_db),
+        sql.Identifier(template_db),
+        sql.Identifier(owner),
+    )
+    if strategy:
+        query = query + sql.SQL(" STRATEGY {}").format(sql.SQL(strategy))
+    return query
+
+
+def _drop_benchmark_database(credentials, bench_db):
+    conn = connect_to_db(credentials)
+    if not conn:
+        print(f"Unable to connect to drop benchmark database '{bench_db}'")
+        return
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute(sql.SQL("DROP DATABASE IF EXISTS {}").format(sql.Identifier(bench_db)))
+        cur.close()
+    except Exception as e:
+        print(f"Error dropping benchmark database '{bench_db}': {e}")
+    finally:
+        conn.close()
+
+
+def benchmark_clone_strategies(credentials, src_db, update_callback=None, runs=2):
+    """
+    Clone src_db with each strategy, time the CREATE DATABASE statements,
+    drop the temporary copies and record the winner for this server. The
+    strategy that goes first alternates between runs, so neither one always
+    gets the cache warmed up by the other; an even number of runs balances it.
+
+    Returns the recorded benchmark entry.
+    """
+    from .source_lockout import lock_source_database, release_source_database
+
+    def report(message, progress=None):
+        if update_callback:
+            update_callback(message, progress)
+
+    if runs < 1:
+        raise Exception("A strategy benchmark needs at least one run")
+
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+
+    timings = {STRATEGY_WAL_LOG: [], STRATEGY_FILE_COPY: []}
+    lockout = None
+    bench_db = None
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+
+        version = get_server_version_num(cur)
+        if version < STRATEGY_MIN_SERVER_VERSION:
+            raise Exception("Strategy benchmarks require PostgreSQL 15 or later")
+
+        cur.execute("SELECT pg_database_size(%s)", (src_db,))
+        size_bytes = cur.fetchone()[0]
+
+        lockout = lock_source_database(credentials, src_db, update_callback)
+
+        total_steps = runs * 2
+        step = 0
+        stamp = datetime.now().strftime("%H%M%S")
+        for run in range(runs):
+            order = (STRATEGY_WAL_LOG, STRATEGY_FILE_COPY)
+            for strategy in order if run % 2 == 0 else reversed(order):
+                bench_db = f"_bench_{strategy.lower()}_{stamp}_{run}"[:63]
+                report(
+                    f"⏱️  Benchmark {step + 1}/{total_steps}: cloning with {strategy}...",
+                    step * 100 / total_steps,
+                )
+                start = time.perf_counter()
+                cur.execute(
+                    build_create_database_query(
+                        bench_db, src_db, credentials["user"], strategy
+                    )
+                )
+                elapsed = time.perf_counter() - start
+                timings[strategy].append(elapsed)
+                cur.execute(sql.SQL("DROP DATABASE {}").format(sql.Identifier(bench_db)))
+                bench_db = None
+                report(f"✅ {strategy}: {elapsed:.2f}s", (step + 1) * 100 / total_steps)
+                step += 1
+
+        cur.close()
+    finally:
+        conn.close()
+        # A failed or cancelled run must not leave its copy behind
+        if bench_db:
+            _drop_benchmark_database(credentials, bench_db)
+        if lockout:
+            release_source_database(lockout, update_callback)
+
+    averages = {k: sum(v) / len(v) for k, v in timings.items()}
+    winner = min(averages, key=averages.get)
+    entry = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "database": src_db,
+        "server_version_num": version,
+        "size_bytes": size_bytes,
+        "seconds": averages,
+        "winner": winner,
+    }
+
+    data = load_strategy_benchmarks()
+    data.setdefault(server_key(credentials), []).append(entry)
+    save_json(BENCHMARK_FILE, data)
+
+    report(f"🏁 Fastest strategy on this server: {winner}", 100)
+    return entry
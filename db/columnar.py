@@ -0,0 +1,180 @@
+from array import array
+from collections.abc import Sequence
+
+KIND_INT = "int"
+KIND_FLOAT = "float"
+KIND_BOOL = "bool"
+KIND_TEXT = "text"
+
+_INT64_MIN = -(2 ** 63)
+_INT64_MAX = 2 ** 63 - 1
+
+_TYPECODES = {KIND_INT: "q", KIND_FLOAT: "d", KIND_BOOL: "b"}
+
+FETCH_BATCH = 2000
+
+
+def _kind_of(value):
+    if isinstance(value, bool):
+        return KIND_BOOL
+    if isinstance(value, int):
+        return KIND_INT if _INT64_MIN <= value <= _INT64_MAX else KIND_TEXT
+    if isinstance(value, float):
+        return KIND_FLOAT
+    return KIND_TEXT
+
+
+class _Column:
+    """
+    One column of a result set. Numbers and booleans live in a typed array,
+    everything else as UTF-8 text in one buffer with an offsets array, and
+    NULLs in a byte-per-row mask. The kind is taken from the first non-NULL
+    value; a column whose values do not all fit that kind falls back to text.
+    """
+
+    __slots__ = ("kind", "data", "offsets", "nulls")
+
+    def __init__(self):
+        self.kind = None
+        self.data = None
+        self.offsets = None
+        self.nulls = bytearray()
+
+    def __len__(self):
+        return len(self.nulls)
+
+    def _allocate(self, kind):
+        pending = len(self.nulls)
+        self.kind = kind
+        if kind == KIND_TEXT:
+            self.data = bytearray()
+            self.offsets = array("Q", [0] * (pending + 1))
+        else:
+            self.data = array(_TYPECODES[kind], [0] * pending)
+
+    def _to_text(self):
+        values = [self.get(i) for i in range(len(self.nulls))]
+        self.nulls = bytearray()
+        self._allocate(KIND_TEXT)
+        self.extend(values)
+
+    def append(self, value):
+        if value is None:
+            if self.kind == KIND_TEXT:
+                self.offsets.append(self.offsets[-1])
+            elif self.kind is not None:
+                self.data.append(0)
+            self.nulls.append(1)
+            return
+        kind = _kind_of(value)
+        if self.kind is None:
+            self._allocate(kind)
+        elif kind != self.kind and self.kind != KIND_TEXT:
+            self._to_text()
+        if self.kind == KIND_TEXT:
+            self.data += (value if isinstance(value, str) else str(value)).encode("utf-8")
+            self.offsets.append(len(self.data))
+        else:
+            self.data.append(value)
+        self.nulls.append(0)
+
+    def extend(self, values):
+        append = self.append
+        for value in values:
+            append(value)
+
+    def get(self, index):
+        if self.nulls[index]:
+            return None
+        if self.kind == KIND_TEXT:
+            return self.data[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+        if self.kind == KIND_BOOL:
+            return bool(self.data[index])
+        return self.data[index]
+
+    @property
+    def nbytes(self):
+        size = len(self.nulls)
+        if self.data is not None:
+            size += len(self.data) * (self.data.itemsize if isinstance(self.data, array) else 1)
+        if self.offsets is not None:
+            size += len(self.offsets) * self.offsets.itemsize
+        return size
+
+
+class ColumnarRows(Sequence):
+    """
+    Compact, column-oriented storage for a query result that still reads as
+    a list of row tuples (len, indexing, slicing, iteration), so it can stand
+    in for cur.fetchall() wherever rows are consumed.
+
+    A cell costs 8 bytes in a numeric column and its UTF-8 length plus 8 in a
+    text column, instead of a Python object per cell plus a tuple per row.
+    Row tuples and their strings are only built when a row is read, so a
+    viewer that shows a screenful at a time formats a screenful at a time.
+    Values that are neither numbers nor booleans (dates, decimals, JSON, ...)
+    are kept as their str() text, which is how they are displayed.
+    """
+
+    def __init__(self, columns, rows=()):
+        self.columns = list(columns)
+        self._columns = [_Column() for _ in self.columns]
+        self._count = 0
+        self.extend(rows)
+
+    @classmethod
+    def from_cursor(cls, cur, batch_size=FETCH_BATCH):
+        """Build from an executed cursor, converting rows a batch at a time."""
+        result = cls([desc[0] for desc in cur.description])
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                return result
+            result.extend(rows)
+
+    def extend(self, rows):
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        if not rows:
+            return
+        for column, values in zip(self._columns, zip(*rows)):
+            column.extend(values)
+        self._count += len(rows)
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError("row index out of range")
+        return tuple(column.get(index) for column in self._columns)
+
+    def value(self, row, column):
+        """Return a single cell without building the whole row."""
+        return self._columns[column].get(row)
+
+    def column_kind(self, column):
+        """KIND_INT, KIND_FLOAT, KIND_BOOL, KIND_TEXT, or None for an all-NULL column."""
+        return self._columns[column].kind
+
+    def column_array(self, column):
+        """
+        Return the typed array behind a numeric or boolean column (NULLs read
+        as 0), for fast whole-column work such as sum() or min(); None for
+        text columns.
+        """
+        col = self._columns[column]
+        return col.data if col.kind in (KIND_INT, KIND_FLOAT, KIND_BOOL) else None
+
+    def column_values(self, column):
+        """Return all values of one column as a list."""
+        col = self._columns[column]
+        return [col.get(i) for i in range(self._count)]
+
+    @property
+    def nbytes(self):
+        """Bytes held by the column buffers."""
+        return sum(column.nbytes for column in self._columns)
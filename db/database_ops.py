@@ -1,5 +1,17 @@
 from psycopg2 import sql
 from .connection import connect_to_db
+from .clone_strategy import resolve_clone_strategy, build_create_database_query
+from .source_lockout import (
+    lock_source_database,
+    release_source_database,
+    create_from_template,
+    drain_sessions,
+    get_drain_timeout,
+)
+from .verify_ops import verify_clone, verification_summary
+from .drop_ops import drop_database_on
+from .query_cancel import CANCELLED_MESSAGE
+from .columnar import ColumnarRows
 import threading
 import time
 
@@ -22,16 +34,36 @@ def fetch_databases(credentials):
         conn.close()
 
 
-def copy_database_logic(credentials, src_db, new_db, update_callback):
+def copy_database_logic(
+    credentials,
+    src_db,
+    new_db,
+    update_callback,
+    strategy=None,
+    verify=False,
+    verify_max_mb_per_s=None,
+    created_callback=None,
+):
     """
     Perform the database copy operation with detailed progress tracking and logging.
     update_callback: a callback to update status and progress in the UI.
                     Should accept: update_callback(message=None, progress=None)
+    strategy: CREATE DATABASE strategy - None (server default), "AUTO",
+              "WAL_LOG" or "FILE_COPY". AUTO picks one from template size,
+              server version, attached replicas and recorded benchmarks.
+    verify: compare every table of the copy with the source afterwards
+            (row counts and chunked hashes, see verify_ops.verify_clone) and
+            raise if any differs. Writes to the source after the clone
+            finished also count as differences.
+    verify_max_mb_per_s: optional I/O budget for verification.
+    created_callback: optional created_callback(new_db), called as soon as
+                      CREATE DATABASE has succeeded.
     """
     conn = connect_to_db(credentials)
     if not conn:
         raise Exception("Unable to connect to database.")
     
+    lockout = None
     try:
         conn.autocommit = True
         cur = conn.cursor()
@@ -53,33 +85,8 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
         update_callback(f"✅ Source database '{src_db}' found and accessible", 12)
         time.sleep(0.2)
 
-        # Step 3: Terminate active connections (15% progress)
-        update_callback("🔄 Checking for active connections to source database...", 15)
-        
-        # Check how many connections need to be terminated
-        connection_check_query = """
-            SELECT count(*) FROM pg_stat_activity 
-            WHERE datname = %s AND pid <> pg_backend_pid()
-        """
-        cur.execute(connection_check_query, (src_db,))
-        active_connections = cur.fetchone()[0]
-        
-        if active_connections > 0:
-            update_callback(f"⚠️  Found {active_connections} active connection(s) - terminating...", 17)
-            terminate_query = """
-                SELECT pg_terminate_backend(pid)
-                FROM pg_stat_activity
-                WHERE datname = %s AND pid <> pg_backend_pid();
-            """
-            cur.execute(terminate_query, (src_db,))
-            update_callback("✅ Active connections terminated successfully", 20)
-        else:
-            update_callback("✅ No active connections found - proceeding", 20)
-        
-        time.sleep(0.3)
-
-        # Step 4: Analyze source database (25% progress)
-        update_callback("📊 Analyzing source database structure and size...", 22)
+        # Step 3: Analyze source database (25% progress)
+        update_callback("📊 Analyzing source database structure and size...", 15)
         
         # Get detailed database information
         size_query = """
@@ -116,8 +123,16 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
         
         time.sleep(0.3)
 
-        # Step 5: Prepare for database creation
+        # Step 4: Prepare for database creation
         update_callback("🛠️  Preparing database creation parameters...", 30)
+        db_size_bytes = size_result[1] if size_result and size_result[1] else 0
+        clone_strategy, strategy_reason = resolve_clone_strategy(
+            credentials, cur, strategy, db_size_bytes
+        )
+        if clone_strategy:
+            update_callback(f"🧭 Clone strategy: {clone_strategy} ({strategy_reason})", 31)
+        else:
+            update_callback(f"🧭 Clone strategy: server default ({strategy_reason})", 31)
         time.sleep(0.2)
         
         # Estimate time and provide user expectations
@@ -141,6 +156,11 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
         update_callback(f"⏱️  Estimated time: {time_estimate} (size: {size_pretty})", 32)
         time.sleep(0.3)
 
+        # Step 5: Block new connections to the source and terminate existing ones.
+        # Done last so connection pools cannot reconnect before CREATE DATABASE.
+        update_callback("🔒 Blocking new connections to source database...", 33)
+        lockout = lock_source_database(credentials, src_db, update_callback, 34)
+
         # Step 6: Start database creation with detailed progress
         update_callback("🚀 Initiating database creation with template...", 35)
         time.sleep(0.3)
@@ -171,12 +191,16 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
 
         # Execute the actual CREATE DATABASE command
         update_callback("⚡ Executing CREATE DATABASE command...", 37)
-        create_query = sql.SQL("CREATE DATABASE {} WITH TEMPLATE {} OWNER {}").format(
-            sql.Identifier(new_db),
-            sql.Identifier(src_db),
-            sql.Identifier(credentials["user"]),
+        create_query = build_create_database_query(
+            new_db, src_db, credentials["user"], clone_strategy
         )
-        cur.execute(create_query)
+        try:
+            create_from_template(cur, create_query, src_db, update_callback=update_callback)
+        finally:
+            release_source_database(lockout, update_callback)
+            lockout = None
+        if created_callback:
+            created_callback(new_db)
 
         # Wait for progress thread to complete
         progress_thread.join()
@@ -214,6 +238,20 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
         
         time.sleep(0.2)
 
+        # Optional step 8: compare the copy with the source table by table
+        if verify:
+            verification = verify_clone(
+                credentials,
+                src_db,
+                credentials,
+                new_db,
+                lambda message, progress=None: message and update_callback(message, None),
+                max_mb_per_s=verify_max_mb_per_s,
+            )
+            summary = verification_summary(verification)
+            if summary:
+                raise Exception(f"Verification of '{new_db}' failed:\n{summary}")
+
         cur.close()
         update_callback(f"🎉 Database '{new_db}' cloned successfully from '{src_db}'!", 100)
         
@@ -230,6 +268,8 @@ def copy_database_logic(credentials, src_db, new_db, update_callback):
             update_callback(f"❌ Error: {error_msg}", None)
         raise e
     finally:
+        if lockout:
+            release_source_database(lockout, update_callback)
         conn.close()
 
 
@@ -276,6 +316,8 @@ def get_database_details(credentials, db_name):
 def terminate_and_delete_database(credentials, db_name):
     """
     Terminates all sessions for the specified database and then deletes it.
+    Uses DROP DATABASE ... WITH (FORCE) on PostgreSQL 13+ so clients cannot
+    reconnect in between; older servers terminate first, then drop.
     Includes safety protection for critical system databases.
     """
     # Safety check - prevent deletion of critical system databases
@@ -291,17 +333,9 @@ def terminate_and_delete_database(credentials, db_name):
     try:
         conn.autocommit = True
         cur = conn.cursor()
-        # Terminate active sessions for the target database
-        terminate_query = """
-            SELECT pg_terminate_backend(pid)
-            FROM pg_stat_activity
-            WHERE datname = %s AND pid <> pg_backend_pid();
-        """
-        cur.execute(terminate_query, (db_name,))
-
-        # Drop the database safely using the sql module
-        drop_query = sql.SQL("DROP DATABASE {}").format(sql.Identifier(db_name))
-        cur.execute(drop_query)
+        # Terminate active sessions and drop - one statement on PostgreSQL 13+,
+        # after letting busy sessions finish when a drain timeout is set
+        drop_database_on(cur, db_name, drain_timeout=get_drain_timeout())
         cur.close()
     except Exception as e:
         raise Exception(f"Failed to delete database '{db_name}': {e}")
@@ -337,11 +371,6 @@ def rename_database(credentials, old_name, new_name, update_status_callback):
     if old_name.lower() == new_name.lower():
         raise Exception("New database name must be different from current name")
 
-    # Check if new database name already exists
-    existing_databases = fetch_databases(credentials)
-    if new_name.lower() in [db.lower() for db in existing_databases]:
-        raise Exception(f"Database '{new_name}' already exists")
-
     # Check if new name would conflict with protected databases
     if new_name.lower() in [db.lower() for db in protected_databases]:
         raise Exception(
@@ -371,28 +400,46 @@ def rename_database(credentials, old_name, new_name, update_status_callback):
         update_status_callback("Checking database exists...")
 
         # Verify the source database exists
-        check_query = "SELECT 1 FROM pg_database WHERE datname = %s"
+        check_query = "SELECT datallowconn FROM pg_database WHERE datname = %s"
         cur.execute(check_query, (old_name,))
-        if not cur.fetchone():
+        row = cur.fetchone()
+        if not row:
             raise Exception(f"Source database '{old_name}' does not exist")
+        allow_connections = row[0]
 
-        update_status_callback("Terminating active connections...")
-
-        # Terminate all active connections to the target database
-        terminate_query = """
-            SELECT pg_terminate_backend(pid)
-            FROM pg_stat_activity
-            WHERE datname = %s AND pid <> pg_backend_pid();
-        """
-        cur.execute(terminate_query, (old_name,))
+        # Check if new database name already exists
+        cur.execute("SELECT 1 FROM pg_database WHERE lower(datname) = lower(%s)", (new_name,))
+        if cur.fetchone():
+            raise Exception(f"Database '{new_name}' already exists")
 
-        update_status_callback(f"Renaming database to '{new_name}'...")
+        update_status_callback("Terminating active connections...")
 
-        # Rename the database using ALTER DATABASE
-        rename_query = sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
-            sql.Identifier(old_name), sql.Identifier(new_name)
+        # Block new connections, let busy sessions finish (if a drain timeout
+        # is set), then terminate the rest
+        cur.execute(
+            sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false").format(sql.Identifier(old_name))
         )
-        cur.execute(rename_query)
+        current_name = old_name
+        try:
+            drain_sessions(
+                cur, old_name, update_callback=lambda message, progress=None: update_status_callback(message)
+            )
+
+            update_status_callback(f"Renaming database to '{new_name}'...")
+
+            # Rename the database using ALTER DATABASE
+            rename_query = sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                sql.Identifier(old_name), sql.Identifier(new_name)
+            )
+            cur.execute(rename_query)
+            current_name = new_name
+        finally:
+            if allow_connections:
+                cur.execute(
+                    sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS true").format(
+                        sql.Identifier(current_name)
+                    )
+                )
 
         cur.close()
         update_status_callback("Database renamed successfully.")
@@ -403,7 +450,7 @@ def rename_database(credentials, old_name, new_name, update_status_callback):
         conn.close()
 
 
-def execute_sql_query(credentials, db_name, sql_query):
+def execute_sql_query(credentials, db_name, sql_query, canceller=None):
     """
     Execute a SQL query on the specified database and return results.
 
@@ -411,6 +458,7 @@ def execute_sql_query(credentials, db_name, sql_query):
       - credentials: Database connection credentials
       - db_name: Target database name
       - sql_query: SQL query to execute
+      - canceller: Optional QueryCanceller that can cancel the running statement
 
     Returns:
       - Dictionary with query results, column names, row count, and execution time
@@ -428,6 +476,9 @@ def execute_sql_query(credentials, db_name, sql_query):
     start_time = time.time()
 
     try:
+        if canceller:
+            canceller.attach(conn)
+            canceller.check()
         cur = conn.cursor()
 
         # Execute the query
@@ -441,8 +492,8 @@ def execute_sql_query(credentials, db_name, sql_query):
         # This is reliable regardless of comments, CTEs, or query structure.
         if cur.description is not None:
             # Query returned rows (SELECT, SHOW, EXPLAIN, RETURNING, etc.)
-            rows = cur.fetchall()
-            columns = [desc[0] for desc in cur.description]
+            rows = ColumnarRows.from_cursor(cur)
+            columns = rows.columns
             row_count = len(rows)
 
             result = {
@@ -493,9 +544,11 @@ def execute_sql_query(credentials, db_name, sql_query):
             "rows": [],
             "row_count": 0,
             "execution_time_ms": execution_time,
-            "message": f"Query failed: {str(e)}",
+            "message": CANCELLED_MESSAGE if canceller and canceller.cancelled else f"Query failed: {str(e)}",
         }
         return result
 
     finally:
+        if canceller:
+            canceller.detach(conn)
         conn.close()
@@ -0,0 +1,212 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2 import sql
+from .connection import connect_to_db
+from .clone_strategy import get_server_version_num
+from .source_lockout import drain_sessions, get_drain_timeout
+
+DEFAULT_DROP_PARALLEL = 4
+MAX_DROP_PARALLEL = 16
+
+DROP_QUEUED = "Queued"
+DROP_DRAINING = "Draining"
+DROP_RUNNING = "Dropping"
+DROP_DONE = "Dropped"
+DROP_FAILED = "Failed"
+
+PROTECTED_DATABASES = ["postgres", "template0", "template1"]
+
+FORCE_DROP_MIN_SERVER_VERSION = 130000
+
+
+class _WorkerConnections:
+    """One autocommit admin connection per worker thread, reused for every drop."""
+
+    def __init__(self, credentials):
+        self.credentials = credentials
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._all = []
+
+    def cursor(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None or conn.closed:
+            conn = connect_to_db(self.credentials)
+            if not conn:
+                raise Exception("Unable to connect to database.")
+            conn.autocommit = True
+            self._local.conn = conn
+            with self._lock:
+                self._all.append(conn)
+        return conn.cursor()
+
+    def discard(self):
+        """Drop this thread's connection after an error so the next drop reconnects."""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and not conn.closed:
+            conn.close()
+        self._local.conn = None
+
+    def close_all(self):
+        with self._lock:
+            for conn in self._all:
+                if not conn.closed:
+                    conn.close()
+            self._all = []
+
+
+def supports_force_drop(cur):
+    """DROP DATABASE ... WITH (FORCE) exists from PostgreSQL 13."""
+    return get_server_version_num(cur) >= FORCE_DROP_MIN_SERVER_VERSION
+
+
+def _set_allow_connections(cur, db_name, allow):
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS {}").format(
+            sql.Identifier(db_name), sql.SQL("true" if allow else "false")
+        )
+    )
+
+
+def drop_database_on(cur, db_name, force=None, if_exists=False, drain_timeout=0, drain_callback=None):
+    """
+    Terminate the sessions of db_name and drop it on an existing admin cursor.
+
+    On PostgreSQL 13+ this is a single DROP DATABASE ... WITH (FORCE), so no
+    client can reconnect between the terminate and the drop. Older servers
+    get a pg_terminate_backend query followed by DROP DATABASE. force=None
+    picks from the server version; pass the result of supports_force_drop to
+    skip the version query when dropping many databases.
+
+    With a drain_timeout, new connections are refused first and busy sessions
+    get that many seconds to finish (see drain_sessions); drain_callback
+    receives the live session counts.
+    """
+    if force is None:
+        force = supports_force_drop(cur)
+    if drain_timeout:
+        cur.execute("SELECT datallowconn FROM pg_database WHERE datname = %s", (db_name,))
+        row = cur.fetchone()
+        if row:
+            _set_allow_connections(cur, db_name, False)
+            try:
+                drain_sessions(cur, db_name, drain_timeout, drain_callback)
+                _drop(cur, db_name, force, if_exists)
+            except Exception:
+                # The database is still there; let clients back in
+                if row[0]:
+                    _set_allow_connections(cur, db_name, True)
+                raise
+            return
+    _drop(cur, db_name, force, if_exists)
+
+
+def _drop(cur, db_name, force, if_exists):
+    exists_clause = sql.SQL("IF EXISTS ") if if_exists else sql.SQL("")
+    if force:
+        cur.execute(
+            sql.SQL("DROP DATABASE {}{} WITH (FORCE)").format(exists_clause, sql.Identifier(db_name))
+        )
+        return
+    cur.execute(
+        """
+        SELECT pg_terminate_backend(pid)
+        FROM pg_stat_activity
+        WHERE datname = %s AND pid <> pg_backend_pid();
+        """,
+        (db_name,),
+    )
+    cur.execute(sql.SQL("DROP DATABASE {}{}").format(exists_clause, sql.Identifier(db_name)))
+
+
+def bulk_drop_databases(
+    credentials,
+    db_names,
+    update_callback=None,
+    progress_callback=None,
+    max_parallel=DEFAULT_DROP_PARALLEL,
+    drain_timeout=None,
+):
+    """
+    Drop many databases in parallel. Each worker reuses one admin connection,
+    and a failure on one database does not stop the others.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - db_names: Databases to drop
+      - update_callback: Optional update_callback(message=None, progress=None) for overall status
+      - progress_callback: Optional progress_callback(db_name, status, detail) per database
+      - max_parallel: Maximum number of DROP DATABASE statements in flight
+      - drain_timeout: Seconds to let busy sessions finish (default: the saved drain setting)
+
+    Returns:
+      - Dictionary mapping each database name to an error message, or None on success
+    """
+    def report(message, progress=None):
+        if update_callback:
+            update_callback(message, progress)
+
+    progress_callback = progress_callback or (lambda *args: None)
+    if drain_timeout is None:
+        drain_timeout = get_drain_timeout()
+    results = {}
+    pending = []
+    for name in db_names:
+        if name.lower() in PROTECTED_DATABASES:
+            results[name] = f"Cannot delete system database '{name}'"
+            progress_callback(name, DROP_FAILED, results[name])
+        else:
+            pending.append(name)
+            progress_callback(name, DROP_QUEUED, "")
+
+    if not pending:
+        return results
+
+    max_parallel = max(1, min(int(max_parallel), MAX_DROP_PARALLEL, len(pending)))
+    connections = _WorkerConnections(credentials)
+    cur = connections.cursor()
+    force = supports_force_drop(cur)
+    cur.close()
+    report(f"🗑️  Dropping {len(pending)} database(s) with up to {max_parallel} in parallel...", 0)
+
+    def drop_one(name):
+        progress_callback(name, DROP_DRAINING if drain_timeout else DROP_RUNNING, "")
+
+        def drain_callback(message, progress=None):
+            progress_callback(name, DROP_DRAINING, message)
+
+        try:
+            cur = connections.cursor()
+            drop_database_on(cur, name, force, drain_timeout=drain_timeout, drain_callback=drain_callback)
+            cur.close()
+        except Exception:
+            connections.discard()
+            raise
+
+    completed = 0
+    try:
+        with ThreadPoolExecutor(max_workers=max_parallel) as executor:
+            futures = {executor.submit(drop_one, name): name for name in pending}
+            for future in as_completed(futures):
+                name = futures[future]
+                completed += 1
+                try:
+                    future.result()
+                    results[name] = None
+                    progress_callback(name, DROP_DONE, "")
+                except Exception as e:
+                    results[name] = str(e).strip()
+                    progress_callback(name, DROP_FAILED, results[name])
+                report(
+                    f"🗑️  {completed} of {len(pending)} database(s) processed",
+                    completed * 100 / len(pending),
+                )
+    finally:
+        connections.close_all()
+
+    failures = [name for name, error in results.items() if error]
+    if failures:
+        report(f"⚠️  {len(failures)} of {len(db_names)} database(s) could not be dropped", 100)
+    else:
+        report(f"✅ Dropped {len(db_names)} database(s)", 100)
+    return results
@@ -0,0 +1,125 @@
+import os
+import time
+from .connection import connect_to_db
+from .query_stream import streamable_statement
+from .query_cancel import CANCELLED_MESSAGE
+
+EXPORT_CSV = "csv"
+EXPORT_TSV = "tsv"
+EXPORT_JSONL = "jsonl"
+
+# COPY options per format. JSON Lines uses CSV framing with quote and
+# delimiter characters that row_to_json never emits unescaped, so each
+# JSON document is written out byte for byte.
+EXPORT_FORMATS = {
+    EXPORT_CSV: ("CSV", ".csv", "FORMAT csv, HEADER true"),
+    EXPORT_TSV: ("TSV", ".tsv", "FORMAT csv, HEADER true, DELIMITER E'\\t'"),
+    EXPORT_JSONL: ("JSON Lines", ".jsonl", "FORMAT csv, QUOTE E'\\x01', DELIMITER E'\\x02'"),
+}
+
+COPY_BUFFER_SIZE = 1024 * 1024
+PROGRESS_INTERVAL = 0.25
+
+
+def export_format_for_path(path):
+    """Return the export format matching the extension of path (CSV by default)."""
+    extension = os.path.splitext(path)[1].lower()
+    for fmt, (label, ext, options) in EXPORT_FORMATS.items():
+        if ext == extension:
+            return fmt
+    return EXPORT_CSV
+
+
+class _ProgressWriter:
+    """File wrapper that counts what COPY writes and reports it periodically."""
+
+    def __init__(self, file, header_lines, progress_callback):
+        self.file = file
+        self.bytes = 0
+        self.lines = -header_lines
+        self._progress_callback = progress_callback
+        self._last_report = 0
+
+    def write(self, data):
+        self.file.write(data)
+        self.bytes += len(data)
+        self.lines += data.count(b"\n")
+        now = time.monotonic()
+        if self._progress_callback and now - self._last_report >= PROGRESS_INTERVAL:
+            self._last_report = now
+            self._progress_callback(self.bytes, max(self.lines, 0))
+
+
+def export_query(credentials, db_name, sql_query, path, fmt=EXPORT_CSV, progress_callback=None, canceller=None):
+    """
+    Export the result of a SELECT to a file with COPY (query) TO STDOUT.
+
+    The server formats the rows and psycopg2 writes the COPY data straight
+    to the file in COPY_BUFFER_SIZE chunks, so no row is ever turned into
+    Python objects and memory use stays constant however large the result.
+    The file is written under a temporary name and moved into place once
+    the export has finished, so a failed or cancelled export leaves nothing
+    behind.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - db_name: Target database name
+      - sql_query: A single SELECT statement
+      - path: Destination file
+      - fmt: EXPORT_CSV, EXPORT_TSV or EXPORT_JSONL
+      - progress_callback: Optional progress_callback(bytes_written, rows_written);
+        the row count is approximate while running (quoted newlines count as rows)
+      - canceller: Optional QueryCanceller that can cancel the export
+
+    Returns:
+      - Dictionary with path, rows, bytes and elapsed (seconds)
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise Exception(f"Unknown export format '{fmt}'")
+    statement = streamable_statement(sql_query)
+    if statement is None:
+        raise Exception("Only a single SELECT query can be exported")
+
+    if fmt == EXPORT_JSONL:
+        statement = f"SELECT row_to_json(export_row) FROM ({statement}) AS export_row"
+    copy_sql = f"COPY ({statement}) TO STDOUT WITH ({EXPORT_FORMATS[fmt][2]})"
+    header_lines = 0 if fmt == EXPORT_JSONL else 1
+
+    conn = connect_to_db(credentials, database=db_name)
+    if not conn:
+        raise Exception(f"Unable to connect to database '{db_name}'")
+
+    temp_path = f"{path}.part"
+    start_time = time.time()
+    try:
+        if canceller:
+            canceller.attach(conn)
+            canceller.check()
+        conn.set_session(readonly=True)
+        cur = conn.cursor()
+        with open(temp_path, "wb") as f:
+            writer = _ProgressWriter(f, header_lines, progress_callback)
+            cur.copy_expert(copy_sql, writer, size=COPY_BUFFER_SIZE)
+        rows = cur.rowcount if cur.rowcount >= 0 else max(writer.lines, 0)
+        cur.close()
+        conn.rollback()
+        os.replace(temp_path, path)
+    except Exception as e:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        if canceller and canceller.cancelled:
+            raise Exception(CANCELLED_MESSAGE)
+        raise Exception(f"Export failed: {e}")
+    finally:
+        if canceller:
+            canceller.detach(conn)
+        conn.close()
+
+    if progress_callback:
+        progress_callback(writer.bytes, rows)
+    return {
+        "path": path,
+        "rows": rows,
+        "bytes": writer.bytes,
+        "elapsed": round(time.time() - start_time, 2),
+    }
@@ -0,0 +1,238 @@
+from .connection import connect_to_db
+from .database_ops import copy_database_logic, terminate_and_delete_database, rename_database
+from .batch_ops import batch_clone_databases
+from .restore_ops import create_database, restore_database
+from .drop_ops import bulk_drop_databases, DEFAULT_DROP_PARALLEL
+from .trash_ops import bulk_trash_databases
+from .swap_ops import swap_databases, restore_swap_settings
+from .job_queue import register_job_handler, drop_created_databases
+from .retention_ops import apply_retention
+
+JOB_CLONE = "clone"
+JOB_BATCH_CLONE = "batch_clone"
+JOB_RENAME = "rename"
+JOB_DELETE = "delete"
+JOB_BULK_DELETE = "bulk_delete"
+JOB_RESTORE = "restore"
+JOB_RETENTION = "retention"
+JOB_SWAP = "swap"
+
+
+def _existing_databases(credentials, names):
+    """Return the subset of names that already exist on the server."""
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT datname FROM pg_database WHERE datname = ANY(%s)", (list(names),))
+        existing = {row[0] for row in cur.fetchall()}
+        cur.close()
+        return existing
+    finally:
+        conn.close()
+
+
+def _refuse_existing_databases(credentials, names):
+    """
+    Fail early if any of names already exists. Names are only recorded for
+    cleanup (context.mark_creating) once the job's own CREATE DATABASE has
+    succeeded, so cleanup can never drop a database another session created
+    under the same name in the meantime.
+    """
+    existing = _existing_databases(credentials, names)
+    if existing:
+        raise Exception(f"Database(s) already exist: {', '.join(sorted(existing))}")
+
+
+def run_clone_job(credentials, params, context):
+    _refuse_existing_databases(credentials, [params["new_db"]])
+    copy_database_logic(
+        credentials,
+        params["src_db"],
+        params["new_db"],
+        context.update,
+        params.get("strategy"),
+        verify=params.get("verify", False),
+        verify_max_mb_per_s=params.get("verify_max_mb_per_s"),
+        created_callback=context.mark_creating,
+    )
+
+
+def run_batch_clone_job(credentials, params, context):
+    state = context.job["state"]
+    completed = set(state.setdefault("completed", []))
+    pending = [name for name in params["new_names"] if name not in completed]
+    _refuse_existing_databases(credentials, pending)
+
+    results = batch_clone_databases(
+        credentials,
+        params["src_db"],
+        pending,
+        context.update,
+        context.extras.get("on_copy_progress") or (lambda *args: None),
+        max_parallel=params.get("max_parallel", 4),
+        strategy=params.get("strategy"),
+        fan_out=params.get("fan_out", False),
+        mark_creating=context.mark_creating,
+        verify=params.get("verify", False),
+        verify_max_mb_per_s=params.get("verify_max_mb_per_s"),
+    )
+
+    # Finished copies are kept across retries; only failed ones are cleaned up
+    creating = state.get("creating", [])
+    for name, error in results.items():
+        if error is None:
+            state["completed"].append(name)
+            if name in creating:
+                creating.remove(name)
+    errors = [f"{name}: {error}" for name, error in results.items() if error]
+    if errors:
+        raise Exception("\n".join(errors))
+
+
+def run_rename_job(credentials, params, context):
+    old_name, new_name = params["old_name"], params["new_name"]
+    if context.job["attempts"] > 1:
+        # A previous attempt may have renamed it before the failure was reported
+        existing = _existing_databases(credentials, [old_name, new_name])
+        if new_name in existing and old_name not in existing:
+            context.update("Database renamed successfully.")
+            return
+    rename_database(credentials, old_name, new_name, context.update)
+
+
+def run_swap_job(credentials, params, context):
+    new_db, live_name, retired_name = params["new_db"], params["live_name"], params["retired_name"]
+    state = context.job["state"]
+    if context.job["attempts"] > 1:
+        # The swap is one transaction; if new_db is gone it went through, but
+        # the connection settings put back after it may not have been
+        existing = _existing_databases(credentials, [new_db, live_name])
+        if new_db not in existing and live_name in existing:
+            if state.get("settings"):
+                context.update(f"🔓 Restoring connection settings of '{live_name}'...")
+                restore_swap_settings(credentials, state["settings"])
+            context.update(f"✅ '{new_db}' is now '{live_name}'", 100)
+            return
+
+    def remember_settings(settings):
+        state["settings"] = settings
+
+    state["result"] = swap_databases(
+        credentials, new_db, live_name, retired_name, context.update, remember_settings
+    )
+
+
+def run_delete_job(credentials, params, context):
+    db_name = params["db_name"]
+    if context.job["attempts"] > 1 and not _existing_databases(credentials, [db_name]):
+        return
+    context.update(f"🗑️  Deleting '{db_name}'...")
+    terminate_and_delete_database(credentials, db_name)
+
+
+def run_bulk_delete_job(credentials, params, context):
+    state = context.job["state"]
+    completed = state.setdefault("completed", [])
+    pending = [name for name in params["db_names"] if name not in completed]
+    if context.job["attempts"] > 1:
+        # Databases dropped by an earlier attempt count as done
+        existing = _existing_databases(credentials, pending)
+        completed.extend(name for name in pending if name not in existing)
+        pending = [name for name in pending if name in existing]
+
+    if params.get("fast"):
+        results = bulk_trash_databases(
+            credentials, pending, context.update, context.extras.get("on_drop_progress")
+        )
+    else:
+        results = bulk_drop_databases(
+            credentials,
+            pending,
+            context.update,
+            context.extras.get("on_drop_progress"),
+            max_parallel=params.get("max_parallel", DEFAULT_DROP_PARALLEL),
+        )
+    completed.extend(name for name, error in results.items() if error is None)
+    state["errors"] = {name: error for name, error in results.items() if error}
+    if state["errors"]:
+        raise Exception(
+            "\n".join(f"{name}: {error}" for name, error in state["errors"].items())
+        )
+
+
+def run_restore_job(credentials, params, context):
+    db_name = params["db_name"]
+    _refuse_existing_databases(credentials, [db_name])
+    context.update("Creating new database...")
+    create_database(credentials, db_name)
+    context.mark_creating(db_name)
+    context.update("Restoring data from backup...")
+    restore_database(credentials, db_name, params["backup_file"], params.get("pg_restore_dir"))
+
+
+def run_retention_job(credentials, params, context):
+    results = apply_retention(
+        credentials,
+        params["policy"],
+        context.update,
+        context.extras.get("on_drop_progress"),
+        db_names=params.get("db_names"),
+    )
+    state = context.job["state"]
+    state["completed"] = [name for name, error in results.items() if error is None]
+    state["errors"] = {name: error for name, error in results.items() if error}
+    if state["errors"]:
+        raise Exception(
+            "\n".join(f"{name}: {error}" for name, error in state["errors"].items())
+        )
+
+
+register_job_handler(
+    JOB_CLONE,
+    run_clone_job,
+    cleanup=drop_created_databases,
+    description=lambda p: f"{p['src_db']} → {p['new_db']}",
+)
+register_job_handler(
+    JOB_BATCH_CLONE,
+    run_batch_clone_job,
+    cleanup=drop_created_databases,
+    description=lambda p: f"{p['src_db']} → {len(p['new_names'])} copies",
+)
+register_job_handler(
+    JOB_RENAME,
+    run_rename_job,
+    description=lambda p: f"{p['old_name']} → {p['new_name']}",
+)
+register_job_handler(
+    JOB_SWAP,
+    run_swap_job,
+    description=lambda p: f"{p['new_db']} ⇄ {p['live_name']}",
+)
+register_job_handler(
+    JOB_DELETE,
+    run_delete_job,
+    description=lambda p: p["db_name"],
+)
+register_job_handler(
+    JOB_BULK_DELETE,
+    run_bulk_delete_job,
+    description=lambda p: f"{len(p['db_names'])} database(s)",
+)
+register_job_handler(
+    JOB_RESTORE,
+    run_restore_job,
+    cleanup=drop_created_databases,
+    description=lambda p: f"{p['backup_file']} → {p['db_name']}",
+)
+register_job_handler(
+    JOB_RETENTION,
+    run_retention_job,
+    description=lambda p: (
+        f"{len(p['db_names'])} database(s) by retention policy"
+        if p.get("db_names") is not None
+        else "Scheduled retention: " + ", ".join(p["policy"]["patterns"])
+    ),
+)
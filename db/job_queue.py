@@ -0,0 +1,428 @@
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime
+import psycopg2
+from psycopg2 import errorcodes, sql
+from .connection import connect_to_db
+from .drop_ops import drop_database_on, supports_force_drop
+from .local_store import load_json, save_json
+
+JOBS_FILE = "jobs.json"
+
+JOB_QUEUED = "Queued"
+JOB_RUNNING = "Running"
+JOB_RETRY_WAIT = "Retry Wait"
+JOB_DONE = "Done"
+JOB_FAILED = "Failed"
+JOB_CANCELLED = "Cancelled"
+FINISHED_STATUSES = (JOB_DONE, JOB_FAILED, JOB_CANCELLED)
+
+PRIORITY_HIGH = 10
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 1
+
+DEFAULT_MAX_PER_SERVER = 2
+DEFAULT_MAX_ATTEMPTS = 3
+RETRY_BASE_DELAY = 5
+RETRY_MAX_DELAY = 300
+MAX_FINISHED_JOBS = 200
+
+# Errors that may succeed on a later attempt; anything else fails the job at once
+RETRYABLE_SQLSTATES = {
+    errorcodes.OBJECT_IN_USE,
+    errorcodes.LOCK_NOT_AVAILABLE,
+    errorcodes.DEADLOCK_DETECTED,
+    errorcodes.SERIALIZATION_FAILURE,
+    errorcodes.QUERY_CANCELED,
+    errorcodes.TOO_MANY_CONNECTIONS,
+    errorcodes.ADMIN_SHUTDOWN,
+    errorcodes.CRASH_SHUTDOWN,
+    errorcodes.CANNOT_CONNECT_NOW,
+}
+CONNECTION_ERROR_MESSAGES = ("Unable to connect to database",)
+
+_handlers = {}
+
+
+def is_retryable_error(error):
+    """
+    True if error (or an error it was raised from) is transient: a lost or
+    refused connection, a lock or statement timeout, a deadlock or a
+    database still in use. Validation errors, missing or existing objects
+    and permission errors are not.
+    """
+    seen = set()
+    while error is not None and id(error) not in seen:
+        seen.add(id(error))
+        pgcode = getattr(error, "pgcode", None)
+        if pgcode:
+            if pgcode in RETRYABLE_SQLSTATES or pgcode.startswith("08"):
+                return True
+        elif isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError)):
+            # No SQLSTATE: the connection failed or was lost
+            return True
+        if any(message in str(error) for message in CONNECTION_ERROR_MESSAGES):
+            return True
+        error = error.__cause__ or error.__context__
+    return False
+
+
+def register_job_handler(kind, run, cleanup=None, description=None):
+    """
+    Register how a job kind is executed.
+
+    Parameters:
+      - kind: Job kind name stored in the queue file
+      - run: run(credentials, params, context) performing the work. context is a
+             JobContext used to report progress and record created databases
+      - cleanup: Optional cleanup(credentials, job) run before a retry and when an
+                 interrupted job is resumed, to remove half-created databases
+      - description: Optional description(params) -> short text for the jobs panel
+    """
+    _handlers[kind] = {"run": run, "cleanup": cleanup, "description": description}
+
+
+def job_server_key(credentials):
+    """Jobs are bound to a server and login, never to a stored password."""
+    return f"{credentials['user']}@{credentials['host']}:{credentials['port']}"
+
+
+class JobContext:
+    """Passed to job handlers; forwards progress to the UI and the job record."""
+
+    def __init__(self, queue, job, extras):
+        self._queue = queue
+        self.job = job
+        self.extras = extras
+
+    def update(self, message=None, progress=None):
+        if message is not None:
+            self.job["message"] = message
+        if progress is not None:
+            self.job["progress"] = round(progress, 1)
+        callback = self.extras.get("on_update")
+        if callback:
+            callback(message, progress)
+        self._queue._notify()
+
+    def mark_creating(self, db_name):
+        """Persist that this job is about to create db_name, so it can be cleaned up after a crash."""
+        creating = self.job.setdefault("state", {}).setdefault("creating", [])
+        if db_name not in creating:
+            creating.append(db_name)
+        self._queue._save()
+
+
+class JobQueue:
+    """
+    Persistent queue for long-running database operations.
+
+    Jobs are saved to the local app data directory on every state change. On
+    start-up, jobs that were running when the app closed are cleaned up and
+    queued again. Jobs run on worker threads with a per-server concurrency
+    limit, in priority order. Jobs that fail with a transient error (see
+    is_retryable_error) are retried with exponential backoff; any other
+    error fails the job straight away.
+    """
+
+    def __init__(self, max_per_server=DEFAULT_MAX_PER_SERVER):
+        self.max_per_server = max_per_server
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._credentials = {}
+        self._extras = {}
+        self._listeners = []
+        self._jobs = load_json(JOBS_FILE, default=[]) or []
+        self._resume_interrupted()
+        self._scheduler = threading.Thread(target=self._schedule_loop, daemon=True)
+        self._scheduler.start()
+
+    # --- public API ---
+
+    def set_credentials(self, credentials):
+        """Provide the password for a server so its queued jobs can run."""
+        if not credentials:
+            return
+        with self._lock:
+            self._credentials[job_server_key(credentials)] = dict(credentials)
+        self._wake.set()
+
+    def submit(
+        self,
+        kind,
+        credentials,
+        params,
+        priority=PRIORITY_NORMAL,
+        max_attempts=DEFAULT_MAX_ATTEMPTS,
+        on_update=None,
+        on_done=None,
+        callbacks=None,
+    ):
+        """
+        Queue a job and return its id.
+
+        Parameters:
+          - kind: A registered job kind
+          - credentials: Server credentials; only host, port and user are persisted
+          - params: JSON-serialisable parameters passed to the handler
+          - priority: Higher runs first among jobs waiting for the same server
+          - max_attempts: Total attempts before the job is marked failed; only
+            transient errors are retried
+          - on_update: Optional on_update(message, progress) for live progress
+          - on_done: Optional on_done(job) called once the job is finished
+          - callbacks: Optional extra callbacks exposed to the handler as context.extras
+
+        Callbacks are kept in memory only; a job resumed after a restart runs
+        without them.
+        """
+        if kind not in _handlers:
+            raise Exception(f"Unknown job kind '{kind}'")
+        self.set_credentials(credentials)
+        job = {
+            "id": uuid.uuid4().hex[:12],
+            "kind": kind,
+            "server": job_server_key(credentials),
+            "params": params,
+            "priority": priority,
+            "status": JOB_QUEUED,
+            "attempts": 0,
+            "max_attempts": max(1, max_attempts),
+            "next_run_at": 0,
+            "created_at": time.time(),
+            "started_at": None,
+            "finished_at": None,
+            "duration_s": None,
+            "message": "",
+            "progress": None,
+            "error": None,
+            "state": {},
+        }
+        with self._lock:
+            self._jobs.append(job)
+            extras = dict(callbacks or {})
+            extras.update(on_update=on_update, on_done=on_done)
+            self._extras[job["id"]] = extras
+            self._save()
+        self._notify()
+        self._wake.set()
+        return job["id"]
+
+    def cancel(self, job_id):
+        """Cancel a job that has not started yet. Returns True if it was cancelled."""
+        with self._lock:
+            job = self._find(job_id)
+            if not job or job["status"] not in (JOB_QUEUED, JOB_RETRY_WAIT):
+                return False
+            job["status"] = JOB_CANCELLED
+            job["finished_at"] = time.time()
+            self._save()
+        self._notify()
+        return True
+
+    def retry(self, job_id):
+        """Queue a failed or cancelled job again."""
+        with self._lock:
+            job = self._find(job_id)
+            if not job or job["status"] not in (JOB_FAILED, JOB_CANCELLED):
+                return False
+            job.update(status=JOB_QUEUED, attempts=0, next_run_at=0, error=None, finished_at=None)
+            self._save()
+        self._notify()
+        self._wake.set()
+        return True
+
+    def clear_finished(self):
+        with self._lock:
+            self._jobs = [j for j in self._jobs if j["status"] not in FINISHED_STATUSES]
+            self._save()
+        self._notify()
+
+    def jobs(self):
+        """Return a snapshot of all jobs, newest first."""
+        with self._lock:
+            return [dict(job) for job in sorted(self._jobs, key=lambda j: -j["created_at"])]
+
+    def describe(self, job):
+        handler = _handlers.get(job["kind"])
+        if handler and handler["description"]:
+            try:
+                return handler["description"](job["params"])
+            except Exception:
+                pass
+        return job["kind"]
+
+    def add_listener(self, callback):
+        """callback() is invoked (from worker threads) whenever any job changes."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    # --- internals ---
+
+    def _find(self, job_id):
+        for job in self._jobs:
+            if job["id"] == job_id:
+                return job
+        return None
+
+    def _save(self):
+        with self._lock:
+            finished = [j for j in self._jobs if j["status"] in FINISHED_STATUSES]
+            if len(finished) > MAX_FINISHED_JOBS:
+                drop = {j["id"] for j in sorted(finished, key=lambda j: j["created_at"])[:-MAX_FINISHED_JOBS]}
+                self._jobs = [j for j in self._jobs if j["id"] not in drop]
+            save_json(JOBS_FILE, self._jobs)
+
+    def _notify(self):
+        for callback in list(self._listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Job listener error: {e}")
+
+    def _resume_interrupted(self):
+        resumed = False
+        for job in self._jobs:
+            if job["status"] == JOB_RUNNING:
+                job["status"] = JOB_QUEUED
+                job["message"] = "Interrupted - will resume"
+                job.setdefault("state", {})["needs_cleanup"] = True
+                resumed = True
+        if resumed:
+            self._save()
+
+    def _running_count(self, server):
+        return sum(1 for j in self._jobs if j["server"] == server and j["status"] == JOB_RUNNING)
+
+    def _next_runnable(self):
+        now = time.time()
+        candidates = [
+            j for j in self._jobs
+            if j["status"] in (JOB_QUEUED, JOB_RETRY_WAIT)
+            and j["next_run_at"] <= now
+            and j["server"] in self._credentials
+        ]
+        candidates.sort(key=lambda j: (-j["priority"], j["created_at"]))
+        for job in candidates:
+            if self._running_count(job["server"]) < self.max_per_server:
+                return job
+        return None
+
+    def _schedule_loop(self):
+        while True:
+            with self._lock:
+                job = self._next_runnable()
+                if job:
+                    job["status"] = JOB_RUNNING
+                    job["attempts"] += 1
+                    job["started_at"] = time.time()
+                    job["error"] = None
+                    self._save()
+            if job:
+                self._notify()
+                threading.Thread(target=self._run_job, args=(job,), daemon=True).start()
+                continue
+            self._wake.wait(timeout=1.0)
+            self._wake.clear()
+
+    def _run_job(self, job):
+        handler = _handlers.get(job["kind"])
+        credentials = self._credentials[job["server"]]
+        extras = self._extras.get(job["id"], {})
+        context = JobContext(self, job, extras)
+
+        try:
+            if handler is None:
+                raise Exception(f"No handler registered for job kind '{job['kind']}'")
+            if job["state"].pop("needs_cleanup", False) and handler["cleanup"]:
+                context.update("🧹 Cleaning up after interrupted run...")
+                handler["cleanup"](credentials, job)
+            handler["run"](credentials, job["params"], context)
+        except Exception as e:
+            traceback.print_exc()
+            if handler and handler["cleanup"]:
+                try:
+                    handler["cleanup"](credentials, job)
+                except Exception as cleanup_error:
+                    # Leave the record so the next attempt (or a restart) tries again
+                    print(f"Cleanup after failed job {job['id']} failed: {cleanup_error}")
+                    job["state"]["needs_cleanup"] = True
+            with self._lock:
+                job["error"] = str(e)
+                job["duration_s"] = round(time.time() - job["started_at"], 2)
+                if job["attempts"] < job["max_attempts"] and is_retryable_error(e):
+                    delay = min(RETRY_BASE_DELAY * 2 ** (job["attempts"] - 1), RETRY_MAX_DELAY)
+                    job["status"] = JOB_RETRY_WAIT
+                    job["next_run_at"] = time.time() + delay
+                    job["message"] = f"Failed: {e} - retrying in {delay}s"
+                else:
+                    job["status"] = JOB_FAILED
+                    job["finished_at"] = time.time()
+                    job["message"] = f"Failed: {e}"
+                self._save()
+            if job["status"] == JOB_RETRY_WAIT and extras.get("on_update"):
+                extras["on_update"](f"⚠️  {job['message']}", None)
+        else:
+            with self._lock:
+                job["status"] = JOB_DONE
+                job["finished_at"] = time.time()
+                job["duration_s"] = round(job["finished_at"] - job["started_at"], 2)
+                job["progress"] = 100
+                job["state"].pop("creating", None)
+                self._save()
+
+        self._notify()
+        self._wake.set()
+        if job["status"] in FINISHED_STATUSES:
+            on_done = extras.get("on_done")
+            self._extras.pop(job["id"], None)
+            if on_done:
+                on_done(dict(job))
+
+
+_queue = None
+_queue_lock = threading.Lock()
+
+
+def get_job_queue():
+    """Return the process-wide job queue, loading persisted jobs on first use."""
+    global _queue
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue()
+        return _queue
+
+
+def format_job_time(timestamp):
+    return datetime.fromtimestamp(timestamp).strftime("%m/%d %H:%M:%S") if timestamp else ""
+
+
+def drop_created_databases(credentials, job):
+    """Cleanup handler: drop databases a job recorded as being created."""
+    creating = job.get("state", {}).get("creating", [])
+    if not creating:
+        return
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        force = supports_force_drop(cur)
+        # Hidden scratch databases (frozen templates) cannot be dropped as templates
+        cur.execute(
+            "SELECT datname FROM pg_database WHERE datistemplate AND datname = ANY(%s)",
+            (list(creating),),
+        )
+        for (db_name,) in cur.fetchall():
+            cur.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(sql.Identifier(db_name)))
+        for db_name in list(creating):
+            drop_database_on(cur, db_name, force, if_exists=True)
+            creating.remove(db_name)
+        cur.close()
+    finally:
+        conn.close()
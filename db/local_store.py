@@ -0,0 +1,41 @@
+import json
+import os
+import threading
+
+_store_lock = threading.Lock()
+
+
+def get_app_data_dir():
+    """
+    Return the per-user directory used to persist local application state.
+    The location can be overridden with the APPDEV_STATION_HOME environment variable.
+    """
+    base_dir = os.environ.get("APPDEV_STATION_HOME")
+    if not base_dir:
+        base_dir = os.path.join(os.path.expanduser("~"), ".appdev_station")
+    os.makedirs(base_dir, exist_ok=True)
+    return base_dir
+
+
+def load_json(filename, default=None):
+    """Load a JSON document from the app data directory, returning default if missing or unreadable."""
+    path = os.path.join(get_app_data_dir(), filename)
+    with _store_lock:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except Exception as e:
+            print(f"Warning: Could not read {path}: {e}")
+            return default
+
+
+def save_json(filename, data):
+    """Atomically write a JSON document to the app data directory."""
+    path = os.path.join(get_app_data_dir(), filename)
+    tmp_path = f"{path}.tmp"
+    with _store_lock:
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2, default=str)
+        os.replace(tmp_path, path)
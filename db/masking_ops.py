@@ -0,0 +1,368 @@
+import hashlib
+import uuid
+
+MASK_HASH = "hash"
+MASK_NULL = "null"
+MASK_FAKE = "fake"
+MASK_TRUNCATE = "truncate"
+MASK_METHODS = [MASK_HASH, MASK_NULL, MASK_FAKE, MASK_TRUNCATE]
+
+DEFAULT_MASK_BATCH_ROWS = 1000
+DEFAULT_TRUNCATE_LENGTH = 4
+
+COPY_NULL = b"\\N"
+
+# How a masked column's type constrains its masked values; see column_kind
+KIND_TEXT = "text"
+KIND_INTEGER = "integer"
+KIND_DECIMAL = "decimal"
+KIND_UUID = "uuid"
+KIND_OTHER = "other"
+
+TEXT_TYPES = {"text", "character varying", "character", "name", "citext"}
+INTEGER_MAXIMUMS = {"smallint": 2 ** 15 - 1, "integer": 2 ** 31 - 1, "bigint": 2 ** 63 - 1}
+DECIMAL_TYPES = {"numeric", "real", "double precision"}
+
+KIND_METHODS = {
+    KIND_TEXT: set(MASK_METHODS),
+    KIND_INTEGER: {MASK_NULL, MASK_HASH, MASK_FAKE},
+    KIND_DECIMAL: {MASK_NULL, MASK_HASH, MASK_FAKE},
+    KIND_UUID: {MASK_NULL, MASK_HASH, MASK_FAKE},
+    KIND_OTHER: {MASK_NULL},
+}
+
+_UNESCAPES = {
+    "b": "\b", "f": "\f", "n": "\n", "r": "\r", "t": "\t", "v": "\v", "\\": "\\",
+}
+
+_FAKE_SYLLABLES = [
+    "ka", "lo", "mi", "ra", "ten", "vo", "shi", "an", "del", "mar",
+    "po", "lin", "ze", "ru", "bel", "do", "na", "fi", "gor", "sa",
+]
+
+
+def decode_copy_text(field):
+    """Decode one field of PostgreSQL COPY text format into a str (None for NULL)."""
+    if field == COPY_NULL:
+        return None
+    text = field.decode("utf-8")
+    if "\\" not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        ch = text[i]
+        if ch != "\\" or i + 1 >= len(text):
+            out.append(ch)
+            i += 1
+            continue
+        nxt = text[i + 1]
+        if nxt in _UNESCAPES:
+            out.append(_UNESCAPES[nxt])
+            i += 2
+        elif nxt == "x" and i + 2 < len(text) and text[i + 2] in "0123456789abcdefABCDEF":
+            j = i + 2
+            while j < len(text) and j < i + 4 and text[j] in "0123456789abcdefABCDEF":
+                j += 1
+            out.append(chr(int(text[i + 2:j], 16)))
+            i = j
+        elif nxt in "01234567":
+            j = i + 1
+            while j < len(text) and j < i + 4 and text[j] in "01234567":
+                j += 1
+            out.append(chr(int(text[i + 1:j], 8)))
+            i = j
+        else:
+            out.append(nxt)
+            i += 2
+    return "".join(out)
+
+
+def encode_copy_text(value):
+    """Encode a str (or None) as one field of COPY text format."""
+    if value is None:
+        return COPY_NULL
+    return (
+        value.replace("\\", "\\\\")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+        .replace("\t", "\\t")
+        .encode("utf-8")
+    )
+
+
+def _digest(value, salt):
+    return hashlib.md5(f"{salt}:{value}".encode("utf-8")).hexdigest()
+
+
+def _digit_stream(value, salt):
+    """Endless deterministic digits: the digest as a number, then digests of value#1, value#2, ..."""
+    yield from str(int(_digest(value, salt), 16))
+    counter = 1
+    while True:
+        yield from str(int(_digest(f"{value}#{counter}", salt), 16))
+        counter += 1
+
+
+def _replace_digits(value, salt):
+    digits = _digit_stream(value, salt)
+    return "".join(next(digits) if ch.isdigit() else ch for ch in value)
+
+
+def fake_value(value, salt=""):
+    """
+    Produce a fake value that is always the same for the same input, so joins
+    on masked columns still line up. The shape of the input is kept: e-mail
+    addresses stay e-mail addresses and digits stay digits.
+    """
+    digest = _digest(value, salt)
+    if "@" in value:
+        return f"user_{digest[:10]}@example.com"
+    if any(ch.isdigit() for ch in value) and not any(ch.isalpha() for ch in value):
+        return _replace_digits(value, salt)
+    seed = int(digest, 16)
+    words = []
+    for _ in range(max(1, len(value.split()))):
+        word = ""
+        for _ in range(2 + seed % 2):
+            word += _FAKE_SYLLABLES[seed % len(_FAKE_SYLLABLES)]
+            seed //= len(_FAKE_SYLLABLES)
+        words.append(word.capitalize())
+    return " ".join(words)
+
+
+def _fake_integer(value, maximum, salt):
+    number = int(_replace_digits(value, salt))
+    if abs(number) > maximum:
+        number = (abs(number) % (maximum + 1)) * (-1 if number < 0 else 1)
+    return str(number)
+
+
+def _fake_decimal(value, salt):
+    # Only the mantissa is replaced so 1.5e+20 cannot become an out of range 7.3e+81;
+    # NaN and Infinity have no digits and come back unchanged
+    split = value.lower().find("e")
+    if split < 0:
+        return _replace_digits(value, salt)
+    return _replace_digits(value[:split], salt) + value[split:]
+
+
+def mask_value(value, rule, salt=""):
+    """
+    Apply one masking rule to a decoded value. The result is valid input for
+    the column type recorded on the rule by check_masking_rules (text when
+    the rule has none): integers stay in range, decimals keep their digit
+    layout, UUIDs stay UUIDs and text fits the column's maximum length.
+    """
+    method = rule["method"]
+    if method == MASK_NULL or value is None:
+        return None
+    kind = rule.get("kind", KIND_TEXT)
+    if method == MASK_TRUNCATE:
+        return value[: rule.get("length", DEFAULT_TRUNCATE_LENGTH)]
+    if method not in (MASK_HASH, MASK_FAKE):
+        raise Exception(f"Unknown masking method '{method}'")
+    if kind == KIND_INTEGER:
+        maximum = rule["maximum"]
+        if method == MASK_HASH:
+            return str(int(_digest(value, salt), 16) % (maximum + 1))
+        return _fake_integer(value, maximum, salt)
+    if kind == KIND_DECIMAL:
+        return _fake_decimal(value, salt)
+    if kind == KIND_UUID:
+        return str(uuid.UUID(_digest(value, salt)))
+    masked = _digest(value, salt) if method == MASK_HASH else fake_value(value, salt)
+    if rule.get("max_length"):
+        masked = masked[: rule["max_length"]]
+    return masked
+
+
+def parse_masking_rules(text):
+    """
+    Parse masking rules typed as comma separated "table.column=method" entries,
+    e.g. "public.users.email=fake, users.ssn=null, notes=truncate:20".
+    A rule without a table applies to that column in every table.
+
+    Returns a list of {"table", "column", "method", "length"} dictionaries.
+    """
+    rules = []
+    for entry in (text or "").split(","):
+        entry = entry.strip()
+        if not entry:
+            continue
+        if "=" not in entry:
+            raise Exception(f"Invalid masking rule '{entry}' - expected column=method")
+        target, method = (part.strip() for part in entry.split("=", 1))
+        length = None
+        if ":" in method:
+            method, length = method.split(":", 1)
+            length = int(length)
+        method = method.lower()
+        if method not in MASK_METHODS:
+            raise Exception(f"Unknown masking method '{method}' in rule '{entry}'")
+        parts = target.split(".")
+        if len(parts) == 1:
+            table, column = None, parts[0]
+        elif len(parts) == 2:
+            table, column = f"public.{parts[0]}", parts[1]
+        else:
+            table, column = f"{parts[0]}.{parts[1]}", parts[2]
+        rule = {"table": table, "column": column, "method": method}
+        if length is not None:
+            rule["length"] = length
+        rules.append(rule)
+    return rules
+
+
+def column_kind(data_type, udt_name):
+    """Classify an information_schema.columns type for masking."""
+    if data_type in TEXT_TYPES or udt_name == "citext":
+        return KIND_TEXT
+    if data_type in INTEGER_MAXIMUMS:
+        return KIND_INTEGER
+    if data_type in DECIMAL_TYPES:
+        return KIND_DECIMAL
+    if data_type == "uuid":
+        return KIND_UUID
+    return KIND_OTHER
+
+
+def _matches(rule, table):
+    return rule.get("table") in (None, f"{table['schema']}.{table['table']}") and rule["column"] in table["columns"]
+
+
+def check_masking_rules(cur, rules, tables):
+    """
+    Look up the types of the masked columns in information_schema.columns,
+    record them on the tables (as "column_types") for rules_for_table, and
+    reject rules a column cannot take - truncating a number, faking a date,
+    nulling a NOT NULL column - before any data is copied. A rule that matches
+    no column of any table is rejected too, so a typo cannot let the column
+    through unmasked.
+    """
+    errors = []
+    for rule in rules or []:
+        if not any(_matches(rule, table) for table in tables):
+            target = f"{rule['table']}.{rule['column']}" if rule.get("table") else rule["column"]
+            errors.append(f"{target} does not match any column")
+    masked = [table for table in tables if any(_matches(rule, table) for rule in rules or [])]
+    if not masked:
+        if errors:
+            raise Exception("Invalid masking rules:\n" + "\n".join(errors))
+        return
+    cur.execute(
+        """
+        SELECT table_schema, table_name, column_name, data_type, udt_name,
+               character_maximum_length, is_nullable = 'YES'
+        FROM information_schema.columns
+        WHERE (table_schema, table_name) IN (
+            SELECT * FROM unnest(%s::text[], %s::text[])
+        )
+        """,
+        ([table["schema"] for table in masked], [table["table"] for table in masked]),
+    )
+    types = {}
+    for schema, table_name, column, data_type, udt_name, max_length, nullable in cur.fetchall():
+        types.setdefault((schema, table_name), {})[column] = {
+            "data_type": data_type,
+            "kind": column_kind(data_type, udt_name),
+            "max_length": max_length,
+            "nullable": nullable,
+        }
+
+    for table in masked:
+        table["column_types"] = types.get((table["schema"], table["table"]), {})
+        for rule in rules:
+            if not _matches(rule, table):
+                continue
+            column_type = table["column_types"].get(rule["column"])
+            if column_type is None:
+                errors.append(
+                    f"{table['schema']}.{table['table']}.{rule['column']} has no readable type "
+                    "in information_schema.columns"
+                )
+                continue
+            target = f"{table['schema']}.{table['table']}.{rule['column']} ({column_type['data_type']})"
+            if rule["method"] not in KIND_METHODS[column_type["kind"]]:
+                errors.append(f"{target} cannot be masked with '{rule['method']}'")
+            elif rule["method"] == MASK_NULL and not column_type["nullable"]:
+                errors.append(f"{target} is NOT NULL and cannot be masked with 'null'")
+    if errors:
+        raise Exception("Invalid masking rules:\n" + "\n".join(errors))
+
+
+def rules_for_table(rules, table):
+    """
+    Map column index -> rule for the masked columns of a table. When
+    check_masking_rules has recorded the column types, each rule carries
+    its column's kind, integer maximum and maximum length.
+    """
+    column_types = table.get("column_types", {})
+    by_index = {}
+    for rule in rules or []:
+        if not _matches(rule, table):
+            continue
+        column_type = column_types.get(rule["column"])
+        if column_type:
+            rule = dict(
+                rule,
+                kind=column_type["kind"],
+                maximum=INTEGER_MAXIMUMS.get(column_type["data_type"]),
+                max_length=column_type["max_length"],
+            )
+        by_index[table["columns"].index(rule["column"])] = rule
+    return by_index
+
+
+def make_row_masker(column_rules, salt=""):
+    """Return a function that masks one COPY text line (without the newline)."""
+    def mask_line(line):
+        fields = line.split(b"\t")
+        for index, rule in column_rules.items():
+            value = decode_copy_text(fields[index])
+            fields[index] = encode_copy_text(mask_value(value, rule, salt))
+        return b"\t".join(fields)
+
+    return mask_line
+
+
+class MaskingWriter:
+    """
+    File-like COPY TO target that masks rows in batches before forwarding them
+    to another writer (normally a BoundedPipe), so masking costs a single pass.
+    """
+
+    def __init__(self, target, mask_line, batch_rows=DEFAULT_MASK_BATCH_ROWS):
+        self.target = target
+        self.mask_line = mask_line
+        self.batch_rows = batch_rows
+        self.rows_masked = 0
+        self._pending = bytearray()
+        self._lines = []
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._pending += data
+        if b"\n" in data:
+            *complete, rest = bytes(self._pending).split(b"\n")
+            self._lines.extend(complete)
+            self._pending = bytearray(rest)
+            if len(self._lines) >= self.batch_rows:
+                self._flush()
+        return len(data)
+
+    def _flush(self):
+        if not self._lines:
+            return
+        masked = [self.mask_line(line) for line in self._lines]
+        self.rows_masked += len(masked)
+        self._lines = []
+        self.target.write(b"\n".join(masked) + b"\n")
+
+    def close(self):
+        if self._pending:
+            self._lines.append(bytes(self._pending))
+            self._pending = bytearray()
+        self._flush()
+        self.target.close()
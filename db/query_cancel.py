@@ -0,0 +1,75 @@
+import threading
+from .connection import connect_to_db
+
+CANCELLED_MESSAGE = "Query cancelled."
+
+
+class QueryCanceller:
+    """
+    Lets another thread cancel the statement a query function is running.
+
+    The query function attaches its connection before executing and detaches
+    it when done. cancel() sends a protocol-level cancel request for the
+    attached connection (connection.cancel, the same request psql sends on
+    Ctrl+C), so the blocked cur.execute() raises QueryCanceled right away and
+    the backend stops working. If the cancel request cannot be sent, the
+    backend is cancelled with pg_cancel_backend over a separate connection.
+    Cancelling before a connection is attached cancels it as soon as it is.
+    """
+
+    def __init__(self, credentials=None):
+        self.credentials = credentials
+        self.cancelled = False
+        self._conn = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def attach(self, conn):
+        # Read the pid now; the connection is busy once the statement runs
+        pid = conn.get_backend_pid()
+        with self._lock:
+            self._conn, self._pid = conn, pid
+            cancelled = self.cancelled
+        if cancelled:
+            self._cancel_connection(conn, pid)
+
+    def detach(self, conn):
+        with self._lock:
+            if self._conn is conn:
+                self._conn = self._pid = None
+
+    def check(self):
+        """Raise if cancel() was called, e.g. just before executing a statement."""
+        if self.cancelled:
+            raise Exception(CANCELLED_MESSAGE)
+
+    def cancel(self):
+        """Cancel the running statement; safe to call from any thread and more than once."""
+        with self._lock:
+            self.cancelled = True
+            conn, pid = self._conn, self._pid
+        if conn is not None:
+            self._cancel_connection(conn, pid)
+
+    def _cancel_connection(self, conn, pid):
+        if conn.closed:
+            return
+        try:
+            conn.cancel()
+            return
+        except Exception as e:
+            print(f"Cancel request failed, falling back to pg_cancel_backend: {e}")
+        if not self.credentials:
+            return
+        admin = connect_to_db(self.credentials)
+        if not admin:
+            return
+        try:
+            admin.autocommit = True
+            cur = admin.cursor()
+            cur.execute("SELECT pg_cancel_backend(%s)", (pid,))
+            cur.close()
+        except Exception as e:
+            print(f"pg_cancel_backend({pid}) failed: {e}")
+        finally:
+            admin.close()
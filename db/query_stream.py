@@ -0,0 +1,261 @@
+import threading
+import time
+import uuid
+import sqlparse
+from psycopg2 import errorcodes, sql
+from sqlparse import tokens as T
+from .connection import connect_to_db
+from .database_ops import execute_sql_query
+from .query_cancel import CANCELLED_MESSAGE
+from .columnar import ColumnarRows
+
+DEFAULT_FETCH_BATCH = 500
+
+# A result left open in the UI must not hold its snapshot and locks forever
+STREAM_IDLE_TIMEOUT = "10min"
+
+
+def streamable_statement(sql_query):
+    """
+    Return the statement text if sql_query is a single SELECT that can run
+    behind a server-side cursor (DECLARE ... CURSOR FOR), otherwise None.
+    SELECT ... INTO creates a table and cannot be declared as a cursor.
+    """
+    statements = [s for s in sqlparse.parse(sql_query) if s.value.strip().strip(";").strip()]
+    if len(statements) != 1 or statements[0].get_type() != "SELECT":
+        return None
+    statement = statements[0]
+    if any(t.ttype is T.Keyword and t.normalized == "INTO" for t in statement.flatten()):
+        return None
+    return str(statement).strip().rstrip(";").strip()
+
+
+class QueryStream:
+    """
+    Streams the rows of a SELECT through a named server-side cursor, a batch
+    at a time, so only the rows asked for are ever transferred to Python.
+
+    A scrollable stream (DECLARE ... SCROLL) can also fetch any row range
+    again with fetch_range, so a viewer can page through millions of rows
+    while keeping only the pages it shows in memory.
+
+    The cursor lives in an open transaction on its own connection until
+    close() is called, or for forward-only streams until the last row is
+    fetched. The transaction is rolled back on close, as execute_sql_query
+    does for SELECTs. A canceller, if given, stays attached to the connection
+    until then, so it can also interrupt a later fetch.
+    """
+
+    def __init__(
+        self,
+        credentials,
+        db_name,
+        statement,
+        batch_size=DEFAULT_FETCH_BATCH,
+        scrollable=False,
+        canceller=None,
+    ):
+        self.batch_size = batch_size
+        self.scrollable = scrollable
+        self.columns = []
+        self.fetched = 0
+        self.total = None
+        self._lock = threading.Lock()
+        self._canceller = canceller
+        self._conn = connect_to_db(credentials, database=db_name)
+        if not self._conn:
+            raise Exception(f"Unable to connect to database '{db_name}'")
+        try:
+            if canceller:
+                canceller.attach(self._conn)
+                canceller.check()
+            cur = self._conn.cursor()
+            cur.execute("SET idle_in_transaction_session_timeout = %s", (STREAM_IDLE_TIMEOUT,))
+            cur.close()
+            self._cur = self._conn.cursor(
+                name=f"appdev_stream_{uuid.uuid4().hex[:12]}", scrollable=scrollable
+            )
+            self._cur.itersize = batch_size
+            self._cur.execute(statement)
+        except Exception:
+            self._close_locked()
+            raise
+
+    @property
+    def exhausted(self):
+        """True once no further rows can be fetched in sequence."""
+        return self._conn is None or (self.total is not None and not self.scrollable)
+
+    def _after_fetch(self, start, count, rows):
+        if not self.columns and self._cur.description:
+            self.columns = [desc[0] for desc in self._cur.description]
+        end = start + len(rows)
+        self.fetched = max(self.fetched, end)
+        if len(rows) < count:
+            self.total = end
+            if not self.scrollable:
+                self._close_locked()
+
+    def fetch(self, count=None):
+        """Fetch the next batch of rows; an empty list once the result is exhausted."""
+        with self._lock:
+            if self.exhausted:
+                return []
+            count = count or self.batch_size
+            try:
+                rows = self._cur.fetchmany(count)
+            except Exception:
+                self._close_locked()
+                raise
+            self._after_fetch(self.fetched, count, rows)
+            return rows
+
+    def fetch_range(self, start, count):
+        """Fetch rows start .. start + count - 1 (0-based) of a scrollable stream."""
+        with self._lock:
+            if not self.scrollable:
+                raise Exception("fetch_range needs a scrollable stream")
+            if self._conn is None:
+                raise Exception("The query result has been closed")
+            if self.total is not None and start >= self.total:
+                return []
+            try:
+                self._cur.scroll(start, mode="absolute")
+                rows = self._cur.fetchmany(count)
+            except Exception:
+                self._close_locked()
+                raise
+            self._after_fetch(start, count, rows)
+            return rows
+
+    def count_rows(self):
+        """
+        Return the number of rows of a scrollable stream. The server runs the
+        query to its end with MOVE, but no row is transferred, so a viewer
+        can jump to the last page without fetching the ones before it.
+        """
+        with self._lock:
+            if self.total is not None:
+                return self.total
+            if not self.scrollable:
+                raise Exception("count_rows needs a scrollable stream")
+            if self._conn is None:
+                raise Exception("The query result has been closed")
+            name = sql.Identifier(self._cur.name)
+            try:
+                cur = self._conn.cursor()
+                cur.execute(sql.SQL("MOVE ABSOLUTE 0 IN {}").format(name))
+                cur.execute(sql.SQL("MOVE FORWARD ALL IN {}").format(name))
+                self.total = cur.rowcount
+                cur.close()
+            except Exception:
+                self._close_locked()
+                raise
+            return self.total
+
+    def cancel(self):
+        """Interrupt a fetch that is running on another thread."""
+        conn = self._conn
+        if conn is not None and not conn.closed:
+            try:
+                conn.cancel()
+            except Exception:
+                pass
+
+    def close(self):
+        with self._lock:
+            self._close_locked()
+
+    def _close_locked(self):
+        if self._conn is None:
+            return
+        if self._canceller:
+            self._canceller.detach(self._conn)
+        try:
+            if not self._conn.closed:
+                self._conn.rollback()
+        except Exception:
+            pass
+        finally:
+            self._conn.close()
+            self._conn = None
+
+
+def stream_sql_query(
+    credentials,
+    db_name,
+    sql_query,
+    batch_size=DEFAULT_FETCH_BATCH,
+    scrollable=False,
+    canceller=None,
+):
+    """
+    Execute a SQL query and return only its first batch of rows.
+
+    A single SELECT runs behind a server-side cursor: the first page arrives
+    as soon as the server produces it, and the remaining rows stay on the
+    server until fetched with result["stream"].fetch(), or with fetch_range()
+    on a scrollable stream. Anything else falls back to execute_sql_query.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - db_name: Target database name
+      - sql_query: SQL query to execute
+      - batch_size: Rows per fetch
+      - scrollable: Declare a SCROLL cursor so rows can be fetched again with fetch_range
+      - canceller: Optional QueryCanceller that can cancel the running statement
+
+    Returns:
+      - The execute_sql_query result dictionary, plus "stream" (a QueryStream
+        while more rows may follow, otherwise None) and "has_more"
+    """
+    if not sql_query or not sql_query.strip():
+        raise Exception("SQL query cannot be empty")
+
+    statement = streamable_statement(sql_query)
+    if statement is None:
+        result = execute_sql_query(credentials, db_name, sql_query, canceller)
+        result.update(stream=None, has_more=False)
+        return result
+
+    start_time = time.time()
+    try:
+        stream = QueryStream(credentials, db_name, statement, batch_size, scrollable, canceller)
+        batch = stream.fetch()
+        rows = ColumnarRows(stream.columns, batch)
+    except Exception as e:
+        # e.g. a data-modifying WITH; DECLARE rejects it before anything runs
+        if getattr(e, "pgcode", None) == errorcodes.FEATURE_NOT_SUPPORTED:
+            result = execute_sql_query(credentials, db_name, sql_query, canceller)
+            result.update(stream=None, has_more=False)
+            return result
+        return {
+            "success": False,
+            "query_type": "ERROR",
+            "columns": [],
+            "rows": [],
+            "row_count": 0,
+            "execution_time_ms": round((time.time() - start_time) * 1000, 2),
+            "message": CANCELLED_MESSAGE if canceller and canceller.cancelled else f"Query failed: {str(e)}",
+            "stream": None,
+            "has_more": False,
+        }
+
+    execution_time = round((time.time() - start_time) * 1000, 2)
+    has_more = stream.total is None
+    if has_more:
+        message = f"Query executed successfully. First {len(rows)} rows fetched; more are loaded on demand."
+    else:
+        stream.close()
+        message = f"Query executed successfully. {len(rows)} rows returned."
+    return {
+        "success": True,
+        "query_type": "SELECT",
+        "columns": stream.columns,
+        "rows": rows,
+        "row_count": len(rows),
+        "execution_time_ms": execution_time,
+        "message": message,
+        "stream": stream if has_more else None,
+        "has_more": has_more,
+    }
@@ -21,6 +21,34 @@ def create_database(credentials, db_name):
     finally:
         conn.close()
 
+def find_pg_executable(name, pg_bin_dir=None):
+    """
+    Locate a PostgreSQL client executable such as pg_dump or psql.
+    Searches pg_bin_dir (if given), the system PATH and the common Windows
+    installation directories, newest version first.
+    """
+    exe_name = f"{name}.exe" if os.name == "nt" else name
+
+    if pg_bin_dir and pg_bin_dir.strip() != "":
+        exe_path = os.path.join(pg_bin_dir, exe_name)
+        if not os.path.exists(exe_path):
+            raise Exception(f"Provided PostgreSQL directory does not contain {exe_name}: {exe_path}")
+        return exe_path
+
+    exe_path = shutil.which(name)
+    if exe_path:
+        return exe_path
+
+    for version in (17, 16, 15, 14, 13, 12):
+        exe_path = os.path.join(rf"C:\Program Files\PostgreSQL\{version}\bin", exe_name)
+        if os.path.exists(exe_path):
+            return exe_path
+
+    raise Exception(
+        f"{name} executable not found. Please add PostgreSQL's bin folder to your "
+        "system PATH or specify the PostgreSQL Bin Path."
+    )
+
 def restore_database(credentials, db_name, backup_file, pg_restore_dir=None):
     """
     Restore the specified database from a local .backup file using pg_restore.
@@ -0,0 +1,407 @@
+import re
+import threading
+import time
+from datetime import datetime
+from fnmatch import fnmatchcase
+from .connection import connect_to_db
+from .drop_ops import bulk_drop_databases, DEFAULT_DROP_PARALLEL, PROTECTED_DATABASES
+from .batch_ops import FROZEN_TEMPLATE_PREFIX
+from .clone_pool import POOL_PREFIX
+from .job_queue import get_job_queue, job_server_key, FINISHED_STATUSES
+from .local_store import load_json, save_json
+
+RETENTION_FILE = "retention.json"
+ACTIVITY_FILE = "retention_activity.json"
+
+DEFAULT_RETENTION_POLICY = {
+    "patterns": ["*_copy_*"],
+    "exclude": [],
+    "min_age_days": 7,
+    "idle_days": 7,
+    "min_size_mb": 0,
+    "max_parallel": DEFAULT_DROP_PARALLEL,
+    "schedule_hours": 0,
+}
+
+SCHEDULER_INTERVAL = 60
+
+AGE_FROM_SERVER = "server"
+AGE_FROM_NAME = "name"
+AGE_FROM_FIRST_SEEN = "first seen"
+
+# Timestamps the clone dialogs put in names: _20240131 or _20240131_153000
+_NAME_TIMESTAMP = re.compile(r"(?<!\d)(\d{8})(?:_(\d{6}))?(?!\d)")
+
+_INVENTORY_QUERY = """
+    SELECT d.datname,
+           CASE WHEN has_database_privilege(d.oid, 'CONNECT')
+                THEN pg_database_size(d.oid) END,
+           {created},
+           COALESCE(s.xact_commit + s.xact_rollback, 0),
+           COALESCE(s.numbackends, 0),
+           extract(epoch FROM a.last_state_change)
+    FROM pg_database d
+    LEFT JOIN pg_stat_database s ON s.datid = d.oid
+    LEFT JOIN (
+        SELECT datid, max(state_change) AS last_state_change
+        FROM pg_stat_activity
+        WHERE pid <> pg_backend_pid()
+        GROUP BY datid
+    ) a ON a.datid = d.oid
+    WHERE NOT d.datistemplate AND d.datallowconn
+    ORDER BY d.datname;
+"""
+
+# PG_VERSION is written when the database directory is created
+_CREATED_FROM_FILE = (
+    "extract(epoch FROM (pg_stat_file('base/' || d.oid || '/PG_VERSION', true)).modification)"
+)
+
+_activity_lock = threading.Lock()
+
+
+def _timestamp_from_name(db_name):
+    """Return the epoch of the last date/time stamp embedded in db_name, or None."""
+    for match in reversed(list(_NAME_TIMESTAMP.finditer(db_name))):
+        date_part, time_part = match.group(1), match.group(2) or "000000"
+        try:
+            return datetime.strptime(date_part + time_part, "%Y%m%d%H%M%S").timestamp()
+        except ValueError:
+            continue
+    return None
+
+
+def _track_activity(server, rows, now):
+    """
+    PostgreSQL keeps no last-used time per database, so the transaction
+    counters from pg_stat_database are recorded locally on every inventory.
+    A database whose counter moved since the previous inventory was active
+    then. Returns {db_name: {"first_seen", "changed_at"}}.
+    """
+    with _activity_lock:
+        stored = load_json(ACTIVITY_FILE, default={})
+        previous = stored.get(server, {})
+        current = {}
+        for name, counter in rows:
+            entry = previous.get(name)
+            if entry is None:
+                entry = {"first_seen": now, "changed_at": None, "counter": counter}
+            elif entry["counter"] != counter:
+                # Includes a counter going down after a statistics reset
+                entry = dict(entry, changed_at=now, counter=counter)
+            current[name] = entry
+        stored[server] = current
+        save_json(ACTIVITY_FILE, stored)
+    return current
+
+
+def inventory_databases(credentials):
+    """
+    Collect name, size, age and last activity of every connectable,
+    non-template database with a single catalog query.
+
+    Creation time comes from the database directory when the login may call
+    pg_stat_file (superuser or pg_read_server_files); otherwise from a date
+    stamp in the name, and otherwise from when this app first saw the database.
+
+    Returns a list of dictionaries with name, size_bytes, created_at,
+    age_source, last_activity, connections.
+    """
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            "SELECT has_function_privilege('pg_catalog.pg_stat_file(text, boolean)', 'EXECUTE')"
+        )
+        created = _CREATED_FROM_FILE if cur.fetchone()[0] else "NULL::float8"
+        cur.execute(_INVENTORY_QUERY.format(created=created))
+        rows = cur.fetchall()
+        cur.close()
+    finally:
+        conn.close()
+
+    now = time.time()
+    activity = _track_activity(
+        job_server_key(credentials), [(row[0], int(row[3])) for row in rows], now
+    )
+
+    inventory = []
+    for name, size_bytes, created_at, _counter, connections, last_state_change in rows:
+        tracked = activity[name]
+        age_source = AGE_FROM_SERVER
+        if created_at is None:
+            created_at = _timestamp_from_name(name)
+            age_source = AGE_FROM_NAME
+        if created_at is None:
+            created_at = tracked["first_seen"]
+            age_source = AGE_FROM_FIRST_SEEN
+        # Never seen active: idle at least since creation or since first seen
+        seen = [t for t in (tracked["changed_at"], last_state_change) if t is not None]
+        last_activity = max(seen) if seen else max(float(created_at), tracked["first_seen"])
+        if connections:
+            last_activity = now
+        inventory.append(
+            {
+                "name": name,
+                "size_bytes": size_bytes,
+                "created_at": float(created_at),
+                "age_source": age_source,
+                "last_activity": float(last_activity),
+                "connections": connections,
+            }
+        )
+    return inventory
+
+
+def normalize_policy(policy):
+    """Fill missing retention policy keys with their defaults."""
+    merged = dict(DEFAULT_RETENTION_POLICY)
+    merged.update({k: v for k, v in (policy or {}).items() if v is not None})
+    return merged
+
+
+def _databases_in_use_by_jobs(credentials):
+    """Names that unfinished jobs on this server are creating or working on."""
+    server = job_server_key(credentials)
+    names = set()
+    for job in get_job_queue().jobs():
+        if job["server"] != server or job["status"] in FINISHED_STATUSES:
+            continue
+        names.update(job.get("state", {}).get("creating", []))
+        params = job.get("params", {})
+        for key in ("src_db", "new_db", "db_name", "old_name", "new_name"):
+            if params.get(key):
+                names.add(params[key])
+        names.update(params.get("new_names", []))
+    return names
+
+
+def find_retention_candidates(credentials, policy, inventory=None):
+    """
+    Apply a retention policy to the server inventory without dropping anything.
+
+    A database matches when its name matches one of the patterns and none of
+    the exclude patterns, and it is older than min_age_days, idle for at least
+    idle_days and at least min_size_mb large. System databases, warm pool
+    spares, frozen batch templates, databases with open connections and
+    databases used by unfinished jobs are never matched.
+
+    Returns:
+      - (candidates, inventory) where each candidate is an inventory entry
+        with an added "reason" string
+    """
+    policy = normalize_policy(policy)
+    if inventory is None:
+        inventory = inventory_databases(credentials)
+    in_use = _databases_in_use_by_jobs(credentials)
+    now = time.time()
+    min_age = float(policy["min_age_days"]) * 86400
+    min_idle = float(policy["idle_days"]) * 86400
+    min_size = float(policy["min_size_mb"]) * 1024 * 1024
+
+    candidates = []
+    for entry in inventory:
+        name = entry["name"]
+        if name.lower() in PROTECTED_DATABASES or name.startswith((POOL_PREFIX, FROZEN_TEMPLATE_PREFIX)):
+            continue
+        if not any(fnmatchcase(name, p) for p in policy["patterns"]):
+            continue
+        if any(fnmatchcase(name, p) for p in policy["exclude"]):
+            continue
+        if entry["connections"] or name in in_use:
+            continue
+        age = now - entry["created_at"]
+        idle = now - entry["last_activity"]
+        size = entry["size_bytes"] or 0
+        if age < min_age or idle < min_idle or size < min_size:
+            continue
+        candidate = dict(entry)
+        candidate["reason"] = (
+            f"age {age / 86400:.1f}d ({entry['age_source']}), idle {idle / 86400:.1f}d"
+        )
+        candidates.append(candidate)
+    return candidates, inventory
+
+
+def format_size(size_bytes):
+    if size_bytes is None:
+        return "-"
+    size = float(size_bytes)
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} TB"
+
+
+def retention_report(candidates):
+    """Return a plain text dry-run report for a list of retention candidates."""
+    if not candidates:
+        return "No databases match the retention policy."
+    total = sum(c["size_bytes"] or 0 for c in candidates)
+    lines = [f"{len(candidates)} database(s) would be dropped, freeing {format_size(total)}:"]
+    for c in sorted(candidates, key=lambda c: -(c["size_bytes"] or 0)):
+        lines.append(f"  {c['name']:<40} {format_size(c['size_bytes']):>10}  {c['reason']}")
+    return "\n".join(lines)
+
+
+def apply_retention(
+    credentials,
+    policy,
+    update_callback=None,
+    progress_callback=None,
+    db_names=None,
+):
+    """
+    Drop the databases matching a retention policy in parallel.
+
+    The inventory is taken again right before dropping, so a database that was
+    used or connected to after a dry run is left alone.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - policy: Retention policy (see DEFAULT_RETENTION_POLICY)
+      - update_callback: Optional update_callback(message=None, progress=None)
+      - progress_callback: Optional progress_callback(db_name, status, detail) per database
+      - db_names: Optional list restricting the drop to databases shown in a dry run
+
+    Returns:
+      - Dictionary mapping each dropped database name to an error message, or None on success
+    """
+    policy = normalize_policy(policy)
+    if update_callback:
+        update_callback("🔍 Taking database inventory...", 0)
+    candidates, _ = find_retention_candidates(credentials, policy)
+    names = [c["name"] for c in candidates]
+    if db_names is not None:
+        allowed = set(db_names)
+        names = [name for name in names if name in allowed]
+
+    if names:
+        results = bulk_drop_databases(
+            credentials,
+            names,
+            update_callback,
+            progress_callback,
+            max_parallel=policy["max_parallel"],
+        )
+    else:
+        results = {}
+        if update_callback:
+            update_callback("✅ No databases match the retention policy", 100)
+
+    record_retention_run(credentials, results)
+    return results
+
+
+def load_retention_policy(credentials):
+    """Return the saved retention policy of a server, or the defaults."""
+    stored = load_json(RETENTION_FILE, default={})
+    return normalize_policy(stored.get(job_server_key(credentials), {}).get("policy"))
+
+
+def save_retention_policy(credentials, policy):
+    stored = load_json(RETENTION_FILE, default={})
+    entry = stored.setdefault(job_server_key(credentials), {})
+    entry["policy"] = normalize_policy(policy)
+    save_json(RETENTION_FILE, stored)
+
+
+def get_retention_status(credentials):
+    """Return {"last_run", "last_dropped", "last_errors"} for a server."""
+    stored = load_json(RETENTION_FILE, default={})
+    entry = stored.get(job_server_key(credentials), {})
+    return {
+        "last_run": entry.get("last_run"),
+        "last_dropped": entry.get("last_dropped", []),
+        "last_errors": entry.get("last_errors", {}),
+    }
+
+
+def record_retention_run(credentials, results):
+    stored = load_json(RETENTION_FILE, default={})
+    entry = stored.setdefault(job_server_key(credentials), {})
+    entry["last_run"] = time.time()
+    entry["last_dropped"] = [name for name, error in results.items() if error is None]
+    entry["last_errors"] = {name: error for name, error in results.items() if error}
+    save_json(RETENTION_FILE, stored)
+
+
+class RetentionScheduler:
+    """
+    Queues a retention job for every logged-in server whose saved policy has
+    a schedule (schedule_hours > 0) once the interval since the last run has
+    passed. Runs go through the job queue, so they respect its per-server
+    limit and show up on the Jobs page.
+    """
+
+    def __init__(self, interval=SCHEDULER_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._credentials = {}
+        self._last_submitted = {}
+        self._thread = None
+
+    def add_server(self, credentials):
+        with self._lock:
+            self._credentials[job_server_key(credentials)] = dict(credentials)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                servers = list(self._credentials.values())
+            for credentials in servers:
+                try:
+                    self._check_server(credentials)
+                except Exception as e:
+                    print(f"Retention scheduler error: {e}")
+            time.sleep(self.interval)
+
+    def _check_server(self, credentials):
+        # Imported here: job_handlers imports this module to register the job kind
+        from .job_handlers import JOB_RETENTION
+        from .job_queue import PRIORITY_LOW
+
+        stored = load_json(RETENTION_FILE, default={}).get(job_server_key(credentials), {})
+        policy = stored.get("policy")
+        if not policy or not policy.get("schedule_hours"):
+            return
+        server = job_server_key(credentials)
+        # A run that failed before recording itself waits a full interval too
+        last_run = max(stored.get("last_run") or 0, self._last_submitted.get(server, 0))
+        if time.time() < last_run + float(policy["schedule_hours"]) * 3600:
+            return
+        queue = get_job_queue()
+        for job in queue.jobs():
+            if (
+                job["kind"] == JOB_RETENTION
+                and job["server"] == server
+                and job["status"] not in FINISHED_STATUSES
+            ):
+                return
+        queue.submit(
+            JOB_RETENTION,
+            credentials,
+            {"policy": normalize_policy(policy), "scheduled": True},
+            priority=PRIORITY_LOW,
+            max_attempts=1,
+        )
+        self._last_submitted[server] = time.time()
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def start_retention_scheduler(credentials):
+    """Run scheduled retention policies for this server while the app is open."""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = RetentionScheduler()
+        _scheduler.add_server(credentials)
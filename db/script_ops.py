@@ -0,0 +1,160 @@
+import time
+import sqlparse
+from .connection import connect_to_db
+from .columnar import ColumnarRows
+from .query_cancel import CANCELLED_MESSAGE
+
+STATEMENT_OK = "OK"
+STATEMENT_FAILED = "Failed"
+STATEMENT_SKIPPED = "Skipped"
+STATEMENT_ROLLED_BACK = "Rolled back"
+
+
+def split_statements(sql_script):
+    """Split a script into statements, dropping empty and comment-only ones."""
+    statements = []
+    for statement in sqlparse.split(sql_script):
+        code = sqlparse.format(statement, strip_comments=True).strip().rstrip(";").strip()
+        if code:
+            statements.append(statement.strip())
+    return statements
+
+
+def _statement_result(index, statement, status, message, execution_time=0, columns=None, rows=None, row_count=0):
+    return {
+        "index": index,
+        "statement": statement,
+        "status": status,
+        "success": status == STATEMENT_OK,
+        "query_type": "SELECT" if columns else ("MODIFICATION" if status == STATEMENT_OK else "ERROR"),
+        "columns": columns or [],
+        "rows": rows if rows is not None else [],
+        "row_count": row_count,
+        "execution_time_ms": execution_time,
+        "message": message,
+    }
+
+
+def run_script(
+    credentials,
+    db_name,
+    sql_script,
+    single_transaction=False,
+    stop_on_error=True,
+    statement_callback=None,
+    canceller=None,
+):
+    """
+    Run a multi-statement SQL script on one connection, statement by statement.
+
+    Without single_transaction every statement commits on its own, as in
+    psql. With it the whole script is one transaction that commits at the
+    end; if a statement fails and stop_on_error is off, it is rolled back to
+    a savepoint taken just before it and the script carries on. If the
+    script stops on an error, the transaction is rolled back and the
+    statements that had run are reported as rolled back.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - db_name: Target database name
+      - sql_script: SQL text with one or more statements
+      - single_transaction: Run the script in a single transaction
+      - stop_on_error: Skip the remaining statements after the first failure
+      - statement_callback: Optional statement_callback(index, total, result) after each statement
+      - canceller: Optional QueryCanceller that can cancel the running statement
+
+    Returns:
+      - List of per-statement result dictionaries, shaped like execute_sql_query
+        results plus index, statement and status
+    """
+    statements = split_statements(sql_script or "")
+    if not statements:
+        raise Exception("SQL script contains no statements")
+
+    conn = connect_to_db(credentials, database=db_name)
+    if not conn:
+        raise Exception(f"Unable to connect to database '{db_name}'")
+
+    results = []
+    try:
+        if canceller:
+            canceller.attach(conn)
+        conn.autocommit = not single_transaction
+        cur = conn.cursor()
+        failed = False
+
+        for index, statement in enumerate(statements, start=1):
+            if (failed and stop_on_error) or (canceller and canceller.cancelled):
+                results.append(_statement_result(index, statement, STATEMENT_SKIPPED, "Not run"))
+                continue
+
+            if single_transaction and not stop_on_error:
+                cur.execute("SAVEPOINT script_statement")
+            start_time = time.time()
+            try:
+                cur.execute(statement)
+                if cur.description is not None:
+                    rows = ColumnarRows.from_cursor(cur)
+                    result = _statement_result(
+                        index,
+                        statement,
+                        STATEMENT_OK,
+                        f"{len(rows)} rows returned.",
+                        round((time.time() - start_time) * 1000, 2),
+                        rows.columns,
+                        rows,
+                        len(rows),
+                    )
+                else:
+                    affected_rows = cur.rowcount
+                    result = _statement_result(
+                        index,
+                        statement,
+                        STATEMENT_OK,
+                        f"{affected_rows} rows affected." if affected_rows >= 0 else (cur.statusmessage or "OK"),
+                        round((time.time() - start_time) * 1000, 2),
+                        row_count=max(affected_rows, 0),
+                    )
+                if single_transaction and not stop_on_error:
+                    cur.execute("RELEASE SAVEPOINT script_statement")
+            except Exception as e:
+                failed = True
+                message = CANCELLED_MESSAGE if canceller and canceller.cancelled else str(e).strip()
+                result = _statement_result(
+                    index,
+                    statement,
+                    STATEMENT_FAILED,
+                    message,
+                    round((time.time() - start_time) * 1000, 2),
+                )
+                if single_transaction and not stop_on_error:
+                    cur.execute("ROLLBACK TO SAVEPOINT script_statement")
+            results.append(result)
+            if statement_callback:
+                statement_callback(index, len(statements), result)
+
+        if single_transaction:
+            if (failed and stop_on_error) or (canceller and canceller.cancelled):
+                conn.rollback()
+                for result in results:
+                    if result["status"] == STATEMENT_OK:
+                        result["status"] = STATEMENT_ROLLED_BACK
+                        result["message"] += " Rolled back."
+            else:
+                conn.commit()
+        cur.close()
+        return results
+    finally:
+        if canceller:
+            canceller.detach(conn)
+        conn.close()
+
+
+def script_summary(results):
+    """Return a one-line summary of run_script results."""
+    counts = {}
+    for result in results:
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+    total_ms = round(sum(result["execution_time_ms"] for result in results), 2)
+    parts = [f"{count} {status.lower()}" for status, count in counts.items()]
+    return f"{len(results)} statement(s): {', '.join(parts)} ({total_ms}ms)"
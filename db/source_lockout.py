@@ -0,0 +1,361 @@
+import threading
+import time
+from psycopg2 import sql, errorcodes
+from .connection import connect_to_db
+from .clone_strategy import server_key
+from .local_store import load_json, save_json
+
+LOCKOUTS_FILE = "source_lockouts.json"
+DRAIN_SETTINGS_FILE = "session_drain.json"
+
+DEFAULT_CLONE_RETRIES = 5
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 4.0
+
+# 0 keeps the old behaviour: terminate every session immediately
+DEFAULT_DRAIN_TIMEOUT = 0
+MAX_DRAIN_TIMEOUT = 600
+DRAIN_POLL_INTERVAL = 0.5
+
+# Lockouts held by this process: key -> {"count", "locked", "original", "lock"}
+_active = {}
+_active_lock = threading.Lock()
+# Serializes read-modify-write of LOCKOUTS_FILE
+_store_lock = threading.Lock()
+
+
+def _lockout_key(credentials, db_name):
+    return f"{server_key(credentials)}/{db_name}"
+
+
+def _report(update_callback, message, progress=None):
+    if update_callback:
+        update_callback(message, progress)
+
+
+def _set_connection_settings(cur, db_name, allow_connections, connection_limit):
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS {} CONNECTION LIMIT {}").format(
+            sql.Identifier(db_name),
+            sql.SQL("true" if allow_connections else "false"),
+            sql.Literal(int(connection_limit)),
+        )
+    )
+
+
+def terminate_sessions(cur, db_name, idle_only=False):
+    """Terminate every other backend connected to db_name. Returns the count."""
+    cur.execute(
+        sql.SQL(
+            """
+            SELECT count(pg_terminate_backend(pid))
+            FROM pg_stat_activity
+            WHERE datname = %s AND pid <> pg_backend_pid(){};
+            """
+        ).format(sql.SQL(" AND state = 'idle'" if idle_only else "")),
+        (db_name,),
+    )
+    return cur.fetchone()[0]
+
+
+def get_drain_timeout():
+    """Seconds mutating operations wait for busy sessions before terminating them."""
+    settings = load_json(DRAIN_SETTINGS_FILE, default={}) or {}
+    return float(settings.get("timeout", DEFAULT_DRAIN_TIMEOUT))
+
+
+def set_drain_timeout(seconds):
+    seconds = max(0.0, min(float(seconds), MAX_DRAIN_TIMEOUT))
+    save_json(DRAIN_SETTINGS_FILE, {"timeout": seconds})
+    return seconds
+
+
+def count_sessions(cur, db_name):
+    """
+    Return (busy, idle) session counts for db_name. A session is idle when it
+    is connected but not running a query or inside a transaction; sessions whose
+    state is hidden from this login count as busy.
+    """
+    cur.execute(
+        """
+        SELECT count(*) FILTER (WHERE state IS DISTINCT FROM 'idle'),
+               count(*) FILTER (WHERE state = 'idle')
+        FROM pg_stat_activity
+        WHERE datname = %s AND pid <> pg_backend_pid();
+        """,
+        (db_name,),
+    )
+    busy, idle = cur.fetchone()
+    return busy, idle
+
+
+def drain_sessions(cur, db_name, timeout=None, update_callback=None, progress=None):
+    """
+    Let the sessions of db_name finish their work before terminating them.
+    Call after new connections are blocked, on an autocommit cursor.
+
+    Idle sessions are terminated on every poll, since nothing in flight is
+    lost and a pool would otherwise hand them new work. Busy sessions get up
+    to timeout seconds (default: the saved drain setting) to finish; only the
+    stragglers left at the deadline are terminated. Live counts are reported
+    through update_callback while waiting.
+
+    Returns the total number of sessions terminated.
+    """
+    if timeout is None:
+        timeout = get_drain_timeout()
+    terminated = 0
+    deadline = time.monotonic() + timeout
+    while timeout > 0:
+        busy, idle = count_sessions(cur, db_name)
+        if idle:
+            terminated += terminate_sessions(cur, db_name, idle_only=True)
+        if not busy:
+            break
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            _report(
+                update_callback,
+                f"⏱️  Drain deadline reached - terminating {busy} busy session(s) on '{db_name}'",
+                progress,
+            )
+            break
+        _report(
+            update_callback,
+            f"⏳ Draining '{db_name}': {busy} busy, {idle} idle session(s) - {remaining:.0f}s left",
+            progress,
+        )
+        time.sleep(min(DRAIN_POLL_INTERVAL, remaining))
+    return terminated + terminate_sessions(cur, db_name)
+
+
+def _acquire_entry(key):
+    """
+    Return the lockout entry of key with its lock held, creating it if needed.
+    _active_lock only guards the dictionary; the per-entry lock serializes
+    setup and restore of one database without blocking other databases
+    during the server round-trips.
+    """
+    while True:
+        with _active_lock:
+            entry = _active.get(key)
+            if entry is None:
+                entry = {"count": 0, "locked": False, "original": None, "lock": threading.Lock()}
+                _active[key] = entry
+        entry["lock"].acquire()
+        with _active_lock:
+            if _active.get(key) is entry:
+                return entry
+        # Released and discarded while we waited; start over with a fresh entry
+        entry["lock"].release()
+
+
+def _release_entry(key, entry):
+    """Release the lock taken by _acquire_entry, dropping the entry once unused."""
+    if entry["count"] == 0:
+        with _active_lock:
+            if _active.get(key) is entry:
+                del _active[key]
+    entry["lock"].release()
+
+
+def _stored_original(key):
+    with _store_lock:
+        return load_json(LOCKOUTS_FILE, default={}).get(key)
+
+
+def _store_original(key, original):
+    with _store_lock:
+        stored = load_json(LOCKOUTS_FILE, default={})
+        if original is None:
+            stored.pop(key, None)
+        else:
+            stored[key] = original
+        save_json(LOCKOUTS_FILE, stored)
+
+
+def _block_connections(cur, key, db_name, entry, update_callback, progress):
+    original = _stored_original(key)
+    if original is None:
+        cur.execute(
+            "SELECT datallowconn, datconnlimit FROM pg_database WHERE datname = %s",
+            (db_name,),
+        )
+        row = cur.fetchone()
+        if not row:
+            raise Exception(f"Source database '{db_name}' does not exist")
+        original = {"allow_connections": row[0], "connection_limit": row[1]}
+        _store_original(key, original)
+
+    locked = True
+    try:
+        _set_connection_settings(cur, db_name, False, 0)
+    except Exception as e:
+        locked = False
+        _report(
+            update_callback,
+            f"⚠️  Could not block new connections to '{db_name}' ({e}) - "
+            "terminating sessions only",
+            progress,
+        )
+        _store_original(key, None)
+    entry["locked"] = locked
+    entry["original"] = original
+    if locked:
+        _report(update_callback, f"🔒 New connections to '{db_name}' blocked", progress)
+
+
+def lock_source_database(credentials, db_name, update_callback=None, progress=None, drain_timeout=None):
+    """
+    Stop new connections to db_name and terminate the existing ones, so a
+    connection pool cannot reconnect between the terminate and CREATE DATABASE.
+
+    The original ALLOW_CONNECTIONS / CONNECTION LIMIT settings are saved to the
+    local app data directory before they are changed, so they can be restored
+    even if the app exits mid-clone (see restore_stale_lockouts). Concurrent
+    clones of the same source share one lockout; the last release restores it.
+
+    If the settings cannot be changed (the user does not own the database),
+    this falls back to terminating sessions only. Existing sessions are
+    drained first (see drain_sessions) when a drain timeout is set. If the
+    drain fails, the lockout is released again before the error is raised.
+
+    Returns a lockout handle for release_source_database.
+    """
+    key = _lockout_key(credentials, db_name)
+    lockout = {"key": key, "credentials": credentials, "db_name": db_name, "terminated": 0}
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        entry = _acquire_entry(key)
+        try:
+            if entry["count"] == 0:
+                _block_connections(cur, key, db_name, entry, update_callback, progress)
+            entry["count"] += 1
+        finally:
+            _release_entry(key, entry)
+
+        try:
+            terminated = drain_sessions(cur, db_name, drain_timeout, update_callback, progress)
+        except Exception:
+            release_source_database(lockout, update_callback, progress)
+            raise
+        if terminated:
+            _report(
+                update_callback,
+                f"⚠️  Terminated {terminated} connection(s) to '{db_name}'",
+                progress,
+            )
+        cur.close()
+    finally:
+        conn.close()
+
+    lockout["terminated"] = terminated
+    return lockout
+
+
+def _restore_settings(credentials, db_name, original):
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        _set_connection_settings(
+            cur, db_name, original["allow_connections"], original["connection_limit"]
+        )
+        cur.close()
+    finally:
+        conn.close()
+
+
+def release_source_database(lockout, update_callback=None, progress=None):
+    """
+    Release a lockout taken by lock_source_database. The original connection
+    settings are restored when the last clone of that source releases it.
+    """
+    key = lockout["key"]
+    entry = _acquire_entry(key)
+    try:
+        if entry["count"] == 0:
+            return
+        entry["count"] -= 1
+        if entry["count"] > 0 or not entry["locked"]:
+            return
+        try:
+            _restore_settings(lockout["credentials"], lockout["db_name"], entry["original"])
+        except Exception as e:
+            # The saved record stays, so restore_stale_lockouts can retry later
+            _report(
+                update_callback,
+                f"⚠️  Could not restore connection settings of '{lockout['db_name']}': {e}",
+                progress,
+            )
+            return
+        _store_original(key, None)
+    finally:
+        _release_entry(key, entry)
+    _report(update_callback, f"🔓 Connections to '{lockout['db_name']}' allowed again", progress)
+
+
+def restore_stale_lockouts(credentials):
+    """
+    Restore connection settings left behind by clones that never released
+    their lockout (for example because the app was closed mid-clone).
+    Returns the names of the databases that were restored.
+    """
+    prefix = f"{server_key(credentials)}/"
+    restored = []
+    with _store_lock:
+        stored = load_json(LOCKOUTS_FILE, default={})
+    for key in list(stored):
+        if not key.startswith(prefix):
+            continue
+        db_name = key[len(prefix):]
+        entry = _acquire_entry(key)
+        try:
+            if entry["count"]:
+                # Held by a running clone, which restores it on release
+                continue
+            original = _stored_original(key)
+            if original is None:
+                continue
+            try:
+                _restore_settings(credentials, db_name, original)
+            except Exception as e:
+                print(f"Could not restore connection settings of '{db_name}': {e}")
+                continue
+            _store_original(key, None)
+            restored.append(db_name)
+        finally:
+            _release_entry(key, entry)
+    return restored
+
+
+def create_from_template(cur, create_query, src_db, retries=DEFAULT_CLONE_RETRIES, update_callback=None):
+    """
+    Execute a CREATE DATABASE ... TEMPLATE src_db statement. If it fails because
+    the source is still being accessed (e.g. a superuser session, which the
+    connection limit does not stop), terminate sessions and retry with
+    exponential backoff, up to retries times.
+    """
+    attempt = 0
+    while True:
+        try:
+            cur.execute(create_query)
+            return
+        except Exception as e:
+            if getattr(e, "pgcode", None) != errorcodes.OBJECT_IN_USE or attempt >= retries:
+                raise
+            attempt += 1
+            delay = min(RETRY_BASE_DELAY * 2 ** (attempt - 1), RETRY_MAX_DELAY)
+            terminated = terminate_sessions(cur, src_db)
+            _report(
+                update_callback,
+                f"🔁 '{src_db}' still in use - terminated {terminated} session(s), "
+                f"retry {attempt}/{retries} in {delay:.2f}s",
+            )
+            time.sleep(delay)
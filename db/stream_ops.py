@@ -0,0 +1,631 @@
+import os
+import queue
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2 import sql
+from .connection import connect_to_db
+from .restore_ops import find_pg_executable
+from .subset_ops import list_foreign_keys, build_subset_queries, dependency_levels, prune_orphans
+from .clone_filters import has_filters, split_tables
+from .masking_ops import MaskingWriter, check_masking_rules, make_row_masker, rules_for_table
+from .verify_ops import verify_clone, verification_summary
+from .drop_ops import drop_database_on
+
+DEFAULT_STREAM_PARALLEL = 4
+
+# Each table pipe holds at most PIPE_MAX_CHUNKS * PIPE_CHUNK_SIZE bytes in memory
+PIPE_CHUNK_SIZE = 64 * 1024
+PIPE_MAX_CHUNKS = 16
+
+TABLE_QUEUED = "Queued"
+TABLE_COPYING = "Copying"
+TABLE_DONE = "Done"
+TABLE_FAILED = "Failed"
+TABLE_SKIPPED = "Skipped"
+
+
+class _PipeClosed(Exception):
+    pass
+
+
+class BoundedPipe:
+    """
+    In-memory pipe between a COPY TO STDOUT producer and a COPY FROM STDIN
+    consumer running on another thread. Writes block once the pipe holds
+    max_chunks chunks, so memory stays bounded regardless of table size.
+    """
+
+    def __init__(self, chunk_size=PIPE_CHUNK_SIZE, max_chunks=PIPE_MAX_CHUNKS):
+        self.chunk_size = chunk_size
+        self.bytes_transferred = 0
+        self._queue = queue.Queue(maxsize=max_chunks)
+        self._write_buffer = bytearray()
+        self._read_buffer = b""
+        self._eof = False
+        self._reader_error = None
+        self._writer_error = None
+
+    # --- producer side (file-like object for copy_expert COPY TO) ---
+
+    def write(self, data):
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        self._write_buffer += data
+        self.bytes_transferred += len(data)
+        if len(self._write_buffer) >= self.chunk_size:
+            self._put(bytes(self._write_buffer))
+            self._write_buffer = bytearray()
+        return len(data)
+
+    def close(self):
+        if self._write_buffer:
+            self._put(bytes(self._write_buffer))
+            self._write_buffer = bytearray()
+        self._put(None)
+
+    def abort(self, error):
+        """Abort from the producer side; the consumer's next read raises."""
+        self._writer_error = error
+        try:
+            self._queue.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def _put(self, item):
+        while True:
+            if self._reader_error is not None:
+                raise _PipeClosed(f"Target side failed: {self._reader_error}")
+            try:
+                self._queue.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+    # --- consumer side (file-like object for copy_expert COPY FROM) ---
+
+    def read(self, size=-1):
+        if self._writer_error is not None:
+            raise _PipeClosed(f"Source side failed: {self._writer_error}")
+        if not self._read_buffer and not self._eof:
+            chunk = self._queue.get()
+            if self._writer_error is not None:
+                raise _PipeClosed(f"Source side failed: {self._writer_error}")
+            if chunk is None:
+                self._eof = True
+            else:
+                self._read_buffer = chunk
+        if size is None or size < 0:
+            size = len(self._read_buffer)
+        data, self._read_buffer = self._read_buffer[:size], self._read_buffer[size:]
+        return data
+
+    def fail_reader(self, error):
+        """Mark the consumer as failed so a blocked producer gives up."""
+        self._reader_error = error
+        while True:
+            try:
+                self._queue.get_nowait()
+            except queue.Empty:
+                break
+
+
+def _pg_env(credentials):
+    env = os.environ.copy()
+    env["PGPASSWORD"] = credentials["password"]
+    return env
+
+
+def _conn_args(credentials, db_name):
+    return [
+        "-h", credentials["host"],
+        "-p", str(credentials["port"]),
+        "-U", credentials["user"],
+        "-d", db_name,
+    ]
+
+
+def transfer_schema(
+    src_credentials, src_db, dst_credentials, dst_db, section, pg_bin_dir=None, extra_args=None
+):
+    """
+    Stream one pg_dump schema section (pre-data or post-data) from the source
+    straight into psql on the target. Nothing is written to disk.
+    """
+    pg_dump = find_pg_executable("pg_dump", pg_bin_dir)
+    psql = find_pg_executable("psql", pg_bin_dir)
+
+    dump_cmd = (
+        [pg_dump]
+        + _conn_args(src_credentials, src_db)
+        + [f"--section={section}", "--no-owner", "--no-privileges"]
+        + (extra_args or [])
+    )
+    load_cmd = [psql] + _conn_args(dst_credentials, dst_db) + [
+        "-X", "-q", "-v", "ON_ERROR_STOP=1", "--single-transaction",
+    ]
+
+    dump_proc = subprocess.Popen(
+        dump_cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=_pg_env(src_credentials)
+    )
+    load_proc = subprocess.Popen(
+        load_cmd,
+        stdin=dump_proc.stdout,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+        env=_pg_env(dst_credentials),
+    )
+    # Let pg_dump receive SIGPIPE if psql exits early
+    dump_proc.stdout.close()
+
+    _, load_stderr = load_proc.communicate()
+    dump_stderr = dump_proc.stderr.read()
+    dump_proc.wait()
+
+    if dump_proc.returncode != 0:
+        raise Exception(f"pg_dump ({section}) failed: {dump_stderr.decode(errors='replace').strip()}")
+    if load_proc.returncode != 0:
+        raise Exception(f"psql ({section}) failed: {load_stderr.decode(errors='replace').strip()}")
+
+
+def list_source_tables(cur):
+    """
+    List user tables with their copyable columns and on-disk size, largest first.
+    Generated and dropped columns are excluded because COPY FROM cannot load them.
+    """
+    cur.execute("SHOW server_version_num")
+    has_generated = int(cur.fetchone()[0]) >= 120000
+    generated_filter = "AND a.attgenerated = ''" if has_generated else ""
+    cur.execute(
+        f"""
+        SELECT n.nspname, c.relname,
+               array_agg(a.attname::text ORDER BY a.attnum),
+               pg_total_relation_size(c.oid)
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        JOIN pg_attribute a ON a.attrelid = c.oid
+             AND a.attnum > 0 AND NOT a.attisdropped {generated_filter}
+        WHERE c.relkind = 'r'
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+          AND n.nspname NOT LIKE 'pg_toast%'
+          AND n.nspname NOT LIKE 'pg_temp%'
+          AND NOT EXISTS (
+              SELECT 1 FROM pg_depend d
+              WHERE d.classid = 'pg_class'::regclass AND d.objid = c.oid AND d.deptype = 'e'
+          )
+        GROUP BY n.nspname, c.relname, c.oid
+        ORDER BY pg_total_relation_size(c.oid) DESC
+        """
+    )
+    return [
+        {"schema": row[0], "table": row[1], "columns": list(row[2]), "size_bytes": row[3]}
+        for row in cur.fetchall()
+    ]
+
+
+def table_label(table):
+    return f"{table['schema']}.{table['table']}"
+
+
+def _column_list(table):
+    return sql.SQL(", ").join(sql.Identifier(col) for col in table["columns"])
+
+
+def _qualified(table):
+    return sql.Identifier(table["schema"], table["table"])
+
+
+def build_select_query(table):
+    """Default source query for a table: every copyable column, without inheritance children."""
+    return sql.SQL("SELECT {} FROM ONLY {}").format(_column_list(table), _qualified(table))
+
+
+def copy_table_stream(src_conn, dst_conn, table, select_query=None, row_masker=None):
+    """
+    Copy one table by streaming COPY (query) TO STDOUT on src_conn into
+    COPY table FROM STDIN on dst_conn through a BoundedPipe.
+    If row_masker is given, rows are masked in batches on their way through.
+    The caller owns both connections and commits dst_conn.
+
+    Returns (rows, bytes).
+    """
+    if select_query is None:
+        select_query = build_select_query(table)
+
+    copy_out = sql.SQL("COPY ({}) TO STDOUT").format(select_query).as_string(src_conn)
+    copy_in = sql.SQL("COPY {} ({}) FROM STDIN").format(
+        _qualified(table), _column_list(table)
+    ).as_string(dst_conn)
+
+    pipe = BoundedPipe()
+    load_result = {}
+
+    def load():
+        try:
+            dst_cur = dst_conn.cursor()
+            dst_cur.copy_expert(copy_in, pipe, size=PIPE_CHUNK_SIZE)
+            load_result["rows"] = dst_cur.rowcount
+            dst_cur.close()
+        except Exception as e:
+            load_result["error"] = e
+            pipe.fail_reader(e)
+
+    loader = threading.Thread(target=load, daemon=True)
+    loader.start()
+
+    writer = MaskingWriter(pipe, row_masker) if row_masker else pipe
+    try:
+        src_cur = src_conn.cursor()
+        src_cur.copy_expert(copy_out, writer, size=PIPE_CHUNK_SIZE)
+        src_cur.close()
+        writer.close()
+    except _PipeClosed:
+        pass
+    except Exception as e:
+        pipe.abort(e)
+        loader.join()
+        raise
+    loader.join()
+
+    if "error" in load_result:
+        raise load_result["error"]
+    return load_result.get("rows", -1), pipe.bytes_transferred
+
+
+def copy_sequence_values(src_cur, dst_cur):
+    """Set every sequence on the target to the source's current value."""
+    src_cur.execute(
+        "SELECT schemaname, sequencename, last_value FROM pg_sequences WHERE last_value IS NOT NULL"
+    )
+    for schema, name, last_value in src_cur.fetchall():
+        dst_cur.execute(
+            "SELECT setval(%s::regclass, %s, true)",
+            (sql.Identifier(schema, name).as_string(dst_cur), last_value),
+        )
+
+
+def create_target_database(credentials, new_db, encoding):
+    """Create an empty database on the target server from template0."""
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to target server.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        cur.execute("SELECT 1 FROM pg_database WHERE datname = %s", (new_db,))
+        if cur.fetchone():
+            raise Exception(f"Database '{new_db}' already exists on the target server")
+        cur.execute(
+            sql.SQL("CREATE DATABASE {} WITH TEMPLATE template0 ENCODING {} OWNER {}").format(
+                sql.Identifier(new_db), sql.Literal(encoding), sql.Identifier(credentials["user"])
+            )
+        )
+        cur.close()
+    finally:
+        conn.close()
+
+
+def drop_target_database(credentials, db_name):
+    """Best-effort removal of a partially created target database."""
+    conn = connect_to_db(credentials)
+    if not conn:
+        return
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        drop_database_on(cur, db_name, if_exists=True)
+        cur.close()
+    except Exception as e:
+        print(f"Error dropping partial database '{db_name}': {e}")
+    finally:
+        conn.close()
+
+
+def open_snapshot_worker(credentials, db_name, snapshot_id):
+    """
+    Open a read-only REPEATABLE READ connection. When snapshot_id is given the
+    transaction imports that exported snapshot, so every worker sees exactly the
+    same data as the exporting transaction.
+    """
+    conn = connect_to_db(credentials, database=db_name)
+    if not conn:
+        raise Exception(f"Unable to connect to source database '{db_name}'")
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    if snapshot_id:
+        cur = conn.cursor()
+        cur.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        cur.close()
+    return conn
+
+
+def stream_clone_database(
+    src_credentials,
+    src_db,
+    dst_credentials,
+    new_db,
+    update_callback,
+    table_callback=None,
+    max_parallel=DEFAULT_STREAM_PARALLEL,
+    pg_bin_dir=None,
+    use_snapshot=True,
+    subset=None,
+    filters=None,
+    masking=None,
+    masking_salt="",
+    verify=False,
+    verify_max_mb_per_s=None,
+):
+    """
+    Clone src_db into new_db on another server without intermediate files.
+
+    The schema is streamed with pg_dump | psql (pre-data before, post-data after
+    the data so indexes and constraints are built once). Table data is streamed
+    with COPY TO STDOUT / COPY FROM STDIN, several tables in parallel.
+
+    With use_snapshot the source is read inside one REPEATABLE READ transaction
+    whose snapshot is exported with pg_export_snapshot and imported by pg_dump
+    and every worker connection. The clone is consistent and no source session
+    is terminated.
+
+    With subset the full schema is copied but only a sample of rows (see
+    build_subset_queries), closed over foreign keys. Tables are copied level by
+    level in dependency order and orphaned rows are pruned before constraints
+    are created.
+
+    With filters (include/exclude schema and table patterns, schema-only
+    tables) the full schema is still created but filtered tables stay empty.
+
+    With masking (a list of rules, see masking_ops.parse_masking_rules) the
+    masked columns are rewritten in batches inside the copy pipeline, so a
+    masked clone costs one pass over the data and no UPDATE bloat.
+
+    With verify every fully copied, unmasked table is compared against the
+    source snapshot afterwards (see verify_ops.verify_clone). Mismatches are
+    reported per table and raise an exception; the target is kept for inspection.
+
+    Parameters:
+      - src_credentials / dst_credentials: Source and target server credentials
+      - src_db: Source database name
+      - new_db: Database to create on the target server
+      - update_callback: update_callback(message=None, progress=None)
+      - table_callback: table_callback(table_name, status, stats) per table, where
+                        stats has rows, bytes, seconds and mb_per_s
+      - max_parallel: Number of tables copied concurrently
+      - pg_bin_dir: Optional directory containing pg_dump and psql
+      - use_snapshot: Copy from a single exported snapshot
+      - subset: Optional dict with percent, root_tables, filters and seed
+      - filters: Optional dict of clone filters (see clone_filters.FILTER_KEYS)
+      - masking: Optional list of column masking rules
+      - masking_salt: Salt mixed into hashed and fake values
+      - verify: Verify row counts and chunked hashes after the copy
+      - verify_max_mb_per_s: Optional I/O budget for verification in MB/s
+
+    Returns:
+      - List of per-table stats dictionaries
+    """
+    table_callback = table_callback or (lambda *args: None)
+
+    # The coordinator transaction stays open until the clone finishes so its
+    # exported snapshot remains importable.
+    coordinator = open_snapshot_worker(src_credentials, src_db, None)
+    try:
+        coord_cur = coordinator.cursor()
+        snapshot_id = None
+        if use_snapshot:
+            coord_cur.execute("SELECT pg_export_snapshot()")
+            snapshot_id = coord_cur.fetchone()[0]
+            update_callback(f"📸 Exported source snapshot {snapshot_id}", 1)
+        coord_cur.execute(
+            "SELECT pg_encoding_to_char(encoding) FROM pg_database WHERE datname = %s", (src_db,)
+        )
+        encoding = coord_cur.fetchone()[0]
+        all_tables = list_source_tables(coord_cur)
+        tables, empty_tables = split_tables(all_tables, filters)
+        if empty_tables:
+            skipped_mb = sum(t["size_bytes"] for t in empty_tables) / 1024 / 1024
+            update_callback(
+                f"🚫 Filters leave {len(empty_tables)} table(s) empty, skipping {skipped_mb:.1f} MB", 1
+            )
+
+        if masking:
+            # Filtered tables count as matches, so only rules naming no column at all are rejected
+            check_masking_rules(coord_cur, masking, all_tables)
+
+        select_queries = {}
+        foreign_keys = []
+        levels = [tables]
+        prune_needed = bool(subset) or has_filters(filters)
+        if prune_needed:
+            foreign_keys = list_foreign_keys(coord_cur)
+        if subset:
+            select_queries = build_subset_queries(tables, foreign_keys, subset)
+            by_label = {table_label(t): t for t in tables}
+            levels = [
+                [by_label[label] for label in level]
+                for level in dependency_levels(list(by_label), foreign_keys)
+            ]
+            update_callback(
+                f"🎯 Subset clone: {len(tables)} table(s) in {len(levels)} dependency level(s)", 1
+            )
+        snapshot_args = [f"--snapshot={snapshot_id}"] if snapshot_id else []
+
+        update_callback(f"🛠️  Creating '{new_db}' on target server...", 2)
+        create_target_database(dst_credentials, new_db, encoding)
+
+        try:
+            update_callback("🗃️  Streaming schema (pre-data)...", 5)
+            transfer_schema(
+                src_credentials, src_db, dst_credentials, new_db, "pre-data", pg_bin_dir, snapshot_args
+            )
+
+            total_bytes = sum(t["size_bytes"] for t in tables) or 1
+            update_callback(
+                f"📊 Copying {len(tables)} table(s) with up to {max_parallel} in parallel...", 10
+            )
+            for table in tables:
+                table_callback(table_label(table), TABLE_QUEUED, {})
+            for table in empty_tables:
+                table_callback(table_label(table), TABLE_SKIPPED, {})
+
+            def copy_one(table):
+                label = table_label(table)
+                src = None
+                dst = None
+                try:
+                    src = open_snapshot_worker(src_credentials, src_db, snapshot_id)
+                    dst = connect_to_db(dst_credentials, database=new_db)
+                    if not dst:
+                        raise Exception(f"Unable to connect to target database '{new_db}'")
+                    column_rules = rules_for_table(masking, table)
+                    row_masker = make_row_masker(column_rules, masking_salt) if column_rules else None
+                    table_callback(label, TABLE_COPYING, {})
+                    start = time.perf_counter()
+                    rows, nbytes = copy_table_stream(
+                        src, dst, table, select_queries.get(label), row_masker
+                    )
+                    dst.commit()
+                    seconds = time.perf_counter() - start
+                    stats = {
+                        "table": label,
+                        "rows": rows,
+                        "bytes": nbytes,
+                        "seconds": round(seconds, 3),
+                        "mb_per_s": round(nbytes / 1024 / 1024 / seconds, 2) if seconds else None,
+                        "masked_columns": len(column_rules),
+                    }
+                    table_callback(label, TABLE_DONE, stats)
+                    return stats
+                finally:
+                    if src:
+                        src.close()
+                    if dst:
+                        dst.close()
+
+            results = []
+            copied_bytes = 0
+            errors = []
+            with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+                for level in levels:
+                    futures = {executor.submit(copy_one, table): table for table in level}
+                    for future in as_completed(futures):
+                        table = futures[future]
+                        try:
+                            results.append(future.result())
+                        except Exception as e:
+                            errors.append(f"{table_label(table)}: {e}")
+                            table_callback(table_label(table), TABLE_FAILED, {"error": str(e)})
+                        copied_bytes += table["size_bytes"]
+                        update_callback(None, 10 + 75 * copied_bytes / total_bytes)
+                    if errors:
+                        break
+
+            if errors:
+                raise Exception("Table copy failed:\n" + "\n".join(errors))
+
+            update_callback("🔢 Synchronizing sequence values...", 86)
+            dst_conn = connect_to_db(dst_credentials, database=new_db)
+            if not dst_conn:
+                raise Exception(f"Unable to connect to target database '{new_db}'")
+            try:
+                copy_sequence_values(coord_cur, dst_conn.cursor())
+                if prune_needed:
+                    update_callback("✂️  Pruning rows with missing foreign-key parents...", 87)
+                    pruned = prune_orphans(dst_conn.cursor(), all_tables, foreign_keys, update_callback)
+                    for stats in results:
+                        if stats["table"] in pruned:
+                            stats["pruned_rows"] = pruned[stats["table"]]
+                            table_callback(
+                                stats["table"],
+                                f"{TABLE_DONE}, {stats['pruned_rows']} pruned",
+                                dict(stats, rows=stats["rows"] - stats["pruned_rows"]),
+                            )
+                    if pruned:
+                        update_callback(
+                            f"✂️  Pruned {sum(pruned.values())} row(s) from {len(pruned)} table(s)", None
+                        )
+                dst_conn.commit()
+            finally:
+                dst_conn.close()
+
+            update_callback("🔗 Streaming indexes and constraints (post-data)...", 88)
+            transfer_schema(
+                src_credentials, src_db, dst_credentials, new_db, "post-data", pg_bin_dir, snapshot_args
+            )
+
+        except Exception as e:
+            update_callback(f"❌ Error: {e}", None)
+            update_callback(f"🧹 Removing partial database '{new_db}'...", None)
+            drop_target_database(dst_credentials, new_db)
+            raise
+
+        if verify:
+            _verify_stream_clone(
+                src_credentials, src_db, dst_credentials, new_db, results,
+                update_callback, table_callback, max_parallel, verify_max_mb_per_s,
+                snapshot_id, subset, masking,
+            )
+
+        coord_cur.close()
+    finally:
+        coordinator.close()
+
+    total_copied = sum(r["bytes"] for r in results)
+    update_callback(
+        f"🎉 Streamed {len(results)} table(s), {total_copied / 1024 / 1024:.1f} MB into '{new_db}'",
+        100,
+    )
+    return results
+
+
+def _verify_stream_clone(
+    src_credentials, src_db, dst_credentials, new_db, results, update_callback,
+    table_callback, max_parallel, max_mb_per_s, snapshot_id, subset, masking,
+):
+    """Verify the tables of a finished stream clone whose data should match the source."""
+    if subset:
+        update_callback("⏭️  Skipping verification - a subset clone differs from its source", None)
+        return
+    masked = {r["table"] for r in results if r.get("masked_columns")}
+    pruned = {r["table"] for r in results if r.get("pruned_rows")}
+    labels = [r["table"] for r in results if r["table"] not in masked | pruned]
+    if masked:
+        update_callback(f"⏭️  Not verifying {len(masked)} masked table(s)", None)
+    if pruned:
+        update_callback(f"⏭️  Not verifying {len(pruned)} table(s) with pruned rows", None)
+
+    def verify_table_callback(label, status, result):
+        table_callback(label, status, {"rows": result["target_rows"]} if "target_rows" in result else {})
+
+    verification = verify_clone(
+        src_credentials,
+        src_db,
+        dst_credentials,
+        new_db,
+        lambda message, progress=None: message and update_callback(message, None),
+        verify_table_callback,
+        max_parallel=max_parallel,
+        max_mb_per_s=max_mb_per_s,
+        tables=labels,
+        src_snapshot_id=snapshot_id,
+    )
+    by_label = {v["table"]: v["status"] for v in verification}
+    for r in results:
+        r["verified"] = by_label.get(r["table"])
+    summary = verification_summary(verification)
+    if summary:
+        raise Exception(f"Verification of '{new_db}' failed:\n{summary}")
+
+
+def online_clone_database(
+    credentials, src_db, new_db, update_callback, table_callback=None,
+    max_parallel=DEFAULT_STREAM_PARALLEL, pg_bin_dir=None,
+):
+    """
+    Clone src_db into new_db on the same server from an exported snapshot.
+    Unlike copy_database_logic no session on the source is terminated.
+    """
+    return stream_clone_database(
+        credentials, src_db, credentials, new_db, update_callback, table_callback,
+        max_parallel=max_parallel, pg_bin_dir=pg_bin_dir, use_snapshot=True,
+    )
@@ -0,0 +1,224 @@
+from psycopg2 import sql
+
+DEFAULT_SUBSET_PERCENT = 10
+DEFAULT_SUBSET_SEED = 42
+MAX_CLOSURE_DEPTH = 4
+
+
+def list_foreign_keys(cur):
+    """
+    List foreign keys between user tables.
+    Returns dictionaries with child/parent labels ("schema.table") and column lists.
+    """
+    cur.execute(
+        """
+        SELECT cn.nspname || '.' || cc.relname,
+               pn.nspname || '.' || pc.relname,
+               array(SELECT a.attname::text FROM unnest(con.conkey) WITH ORDINALITY k(attnum, ord)
+                     JOIN pg_attribute a ON a.attrelid = con.conrelid AND a.attnum = k.attnum
+                     ORDER BY k.ord),
+               array(SELECT a.attname::text FROM unnest(con.confkey) WITH ORDINALITY k(attnum, ord)
+                     JOIN pg_attribute a ON a.attrelid = con.confrelid AND a.attnum = k.attnum
+                     ORDER BY k.ord),
+               con.conname
+        FROM pg_constraint con
+        JOIN pg_class cc ON cc.oid = con.conrelid
+        JOIN pg_namespace cn ON cn.oid = cc.relnamespace
+        JOIN pg_class pc ON pc.oid = con.confrelid
+        JOIN pg_namespace pn ON pn.oid = pc.relnamespace
+        WHERE con.contype = 'f'
+          AND cn.nspname NOT IN ('pg_catalog', 'information_schema')
+        """
+    )
+    return [
+        {
+            "child": row[0],
+            "parent": row[1],
+            "child_columns": list(row[2]),
+            "parent_columns": list(row[3]),
+            "name": row[4],
+        }
+        for row in cur.fetchall()
+    ]
+
+
+def dependency_levels(labels, foreign_keys):
+    """
+    Group tables into levels so that every table comes after the tables it
+    references. Tables in a foreign-key cycle are placed together in the
+    level where the cycle is detected.
+    """
+    remaining = set(labels)
+    parents = {label: set() for label in labels}
+    for fk in foreign_keys:
+        if fk["child"] in parents and fk["parent"] in parents and fk["child"] != fk["parent"]:
+            parents[fk["child"]].add(fk["parent"])
+
+    levels = []
+    while remaining:
+        level = sorted(t for t in remaining if not (parents[t] & remaining))
+        if not level:
+            # Cycle: release everything that is left together
+            level = sorted(remaining)
+        levels.append(level)
+        remaining -= set(level)
+    return levels
+
+
+def _qualified(label_to_table, label):
+    table = label_to_table[label]
+    return sql.Identifier(table["schema"], table["table"])
+
+
+def _column_list(table, alias):
+    return sql.SQL(", ").join(sql.Identifier(alias, col) for col in table["columns"])
+
+
+def build_subset_queries(tables, foreign_keys, subset):
+    """
+    Build the source SELECT for every table of a subset clone.
+
+    subset keys:
+      - percent: Sample percentage for root tables (TABLESAMPLE BERNOULLI)
+      - root_tables: Labels ("schema.table") sampled directly; all tables when empty
+      - filters: Optional {label: "SQL condition"} applied to root tables instead of sampling
+      - seed: REPEATABLE seed, so every query sees the same sample
+
+    A table's rows are its own sample (if it is a root) plus every row referenced
+    by the selected rows of tables that point at it, followed up to
+    MAX_CLOSURE_DEPTH levels of foreign keys.
+
+    The rows a table contributes at each level are selected once, in a CTE
+    holding just its foreign-key columns, and every parent condition refers to
+    that CTE. A table referenced from several places is therefore expanded once
+    per level rather than once per path, so the query grows with the number of
+    tables times MAX_CLOSURE_DEPTH, not with the foreign-key fan-in. PostgreSQL
+    materializes a CTE that is referenced more than once.
+    """
+    label_to_table = {f"{t['schema']}.{t['table']}": t for t in tables}
+    percent = float(subset.get("percent", DEFAULT_SUBSET_PERCENT))
+    seed = int(subset.get("seed", DEFAULT_SUBSET_SEED))
+    filters = subset.get("filters") or {}
+    roots = set(subset.get("root_tables") or label_to_table) | set(filters)
+
+    referenced_by = {}
+    key_columns = {}
+    for fk in foreign_keys:
+        if fk["child"] in label_to_table and fk["parent"] in label_to_table:
+            referenced_by.setdefault(fk["parent"], []).append(fk)
+            columns = key_columns.setdefault(fk["child"], [])
+            columns.extend(c for c in fk["child_columns"] if c not in columns)
+
+    def build_query(label):
+        ctes = []
+        selections = {}
+
+        def selection(child, depth):
+            """Name of the CTE with the FK columns of child's rows selected at depth, or None."""
+            key = (child, depth)
+            if key not in selections:
+                condition = row_condition(child, "s", depth)
+                if condition is None:
+                    selections[key] = None
+                else:
+                    name = f"subset_{len(ctes)}"
+                    ctes.append(
+                        sql.SQL("{} AS (SELECT {} FROM ONLY {} s WHERE {})").format(
+                            sql.Identifier(name),
+                            sql.SQL(", ").join(sql.Identifier("s", c) for c in key_columns[child]),
+                            _qualified(label_to_table, child),
+                            condition,
+                        )
+                    )
+                    selections[key] = name
+            return selections[key]
+
+        def row_condition(label, alias, depth):
+            """WHERE condition selecting the subset rows of label, as seen through alias."""
+            conditions = []
+            if label in roots:
+                if label in filters:
+                    conditions.append(sql.SQL("({})").format(sql.SQL(filters[label])))
+                else:
+                    conditions.append(
+                        sql.SQL(
+                            "{}.ctid IN (SELECT ctid FROM ONLY {} TABLESAMPLE BERNOULLI ({}) REPEATABLE ({}))"
+                        ).format(
+                            sql.Identifier(alias),
+                            _qualified(label_to_table, label),
+                            sql.Literal(percent),
+                            sql.Literal(seed),
+                        )
+                    )
+            if depth < MAX_CLOSURE_DEPTH:
+                for fk in referenced_by.get(label, []):
+                    name = selection(fk["child"], depth + 1)
+                    if name is None:
+                        continue
+                    conditions.append(
+                        sql.SQL("({}) IN (SELECT {} FROM {})").format(
+                            sql.SQL(", ").join(sql.Identifier(alias, c) for c in fk["parent_columns"]),
+                            sql.SQL(", ").join(sql.Identifier(name, c) for c in fk["child_columns"]),
+                            sql.Identifier(name),
+                        )
+                    )
+            if not conditions:
+                return None
+            return sql.SQL(" OR ").join(conditions)
+
+        condition = row_condition(label, "t", 0)
+        query = sql.SQL("SELECT {} FROM ONLY {} t WHERE {}").format(
+            _column_list(label_to_table[label], "t"),
+            _qualified(label_to_table, label),
+            condition if condition is not None else sql.SQL("false"),
+        )
+        if not ctes:
+            return query
+        return sql.SQL("WITH {} {}").format(sql.SQL(", ").join(ctes), query)
+
+    return {label: build_query(label) for label in label_to_table}
+
+
+def prune_orphans(cur, tables, foreign_keys, update_callback=None):
+    """
+    Delete target rows whose foreign-key parents were not copied, repeating
+    until no row is removed. Run before post-data creates the constraints.
+    Returns {child label: rows removed} for the tables that lost rows.
+    """
+    label_to_table = {f"{t['schema']}.{t['table']}": t for t in tables}
+    edges = [
+        fk for fk in foreign_keys
+        if fk["child"] in label_to_table and fk["parent"] in label_to_table
+    ]
+
+    removed_by_table = {}
+    while True:
+        removed = 0
+        for fk in edges:
+            not_null = sql.SQL(" AND ").join(
+                sql.SQL("{} IS NOT NULL").format(sql.Identifier("c", col)) for col in fk["child_columns"]
+            )
+            match = sql.SQL(" AND ").join(
+                sql.SQL("{} = {}").format(sql.Identifier("p", pcol), sql.Identifier("c", ccol))
+                for pcol, ccol in zip(fk["parent_columns"], fk["child_columns"])
+            )
+            cur.execute(
+                sql.SQL(
+                    "DELETE FROM {} c WHERE {} AND NOT EXISTS (SELECT 1 FROM {} p WHERE {})"
+                ).format(
+                    _qualified(label_to_table, fk["child"]),
+                    not_null,
+                    _qualified(label_to_table, fk["parent"]),
+                    match,
+                )
+            )
+            if cur.rowcount > 0:
+                removed += cur.rowcount
+                removed_by_table[fk["child"]] = removed_by_table.get(fk["child"], 0) + cur.rowcount
+                if update_callback:
+                    update_callback(
+                        f"✂️  Removed {cur.rowcount} orphaned row(s) from {fk['child']} ({fk['name']})",
+                        None,
+                    )
+        if removed == 0:
+            return removed_by_table
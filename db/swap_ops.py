@@ -0,0 +1,201 @@
+import re
+import time
+from datetime import datetime
+from psycopg2 import sql, errorcodes
+from .connection import connect_to_db
+from .drop_ops import PROTECTED_DATABASES
+from .source_lockout import terminate_sessions, drain_sessions
+
+SWAP_RETRIES = 5
+RETRY_BASE_DELAY = 0.05
+
+
+def retired_database_name(live_name):
+    """Default name the old live database is moved aside to."""
+    suffix = f"_old_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    return live_name[: 63 - len(suffix)] + suffix
+
+
+def _validate_name(name):
+    if not re.match(r"^[a-zA-Z_][a-zA-Z0-9_]*$", name):
+        raise Exception(
+            f"Invalid database name '{name}': only letters, numbers, and underscores are allowed"
+        )
+    if len(name) > 63:
+        raise Exception(f"Database name '{name}' exceeds 63 characters")
+    if name.lower() in PROTECTED_DATABASES:
+        raise Exception(f"Cannot swap system database '{name}'")
+
+
+def _set_allow_connections(cur, db_name, allow, connection_limit):
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS {} CONNECTION LIMIT {}").format(
+            sql.Identifier(db_name),
+            sql.SQL("true" if allow else "false"),
+            sql.Literal(int(connection_limit)),
+        )
+    )
+
+
+def restore_swap_settings(credentials, settings):
+    """
+    Put back the connection settings a swap blocked, given as
+    {db_name: (allow_connections, connection_limit)}. Setting them again is
+    harmless, so a retried swap job can always call this.
+    """
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+        for db_name, (allow, connection_limit) in settings.items():
+            _set_allow_connections(cur, db_name, allow, connection_limit)
+        cur.close()
+    finally:
+        conn.close()
+
+
+def swap_databases(
+    credentials, new_db, live_name, retired_name=None, update_callback=None, settings_callback=None
+):
+    """
+    Promote new_db (a fresh clone or restore) to live_name and move the current
+    live database aside to retired_name, blue/green style.
+
+    Everything runs on one connection. Connections to both databases are
+    refused and their sessions drained (see drain_sessions), both renames run
+    in a single transaction, and the connection settings are put back right
+    after, so without a drain timeout clients are locked out for milliseconds.
+    If any step fails the transaction is rolled back and both databases keep
+    their names and original settings. When live_name does not exist yet,
+    new_db is simply renamed to it.
+
+    The promoted database takes over the live database's ALLOW_CONNECTIONS and
+    CONNECTION LIMIT settings. To undo a swap, swap retired_name back in. If
+    putting the settings back fails after the renames have committed, the swap
+    raises; settings_callback has been given the settings to put back (see
+    restore_swap_settings) before anything was blocked.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - new_db: Database to promote
+      - live_name: Name clients connect to
+      - retired_name: Name for the old live database (default "<live>_old_<timestamp>")
+      - update_callback: Optional update_callback(message=None, progress=None)
+      - settings_callback: Optional settings_callback(settings) with the
+        {db_name: (allow_connections, connection_limit)} to apply after the swap
+
+    Returns:
+      - Dictionary with live, retired (None if there was no live database) and blocked_ms
+    """
+    def report(message, progress=None):
+        if update_callback:
+            update_callback(message, progress)
+
+    retired_name = retired_name or retired_database_name(live_name)
+    for name in (new_db, live_name, retired_name):
+        _validate_name(name)
+    if len({new_db.lower(), live_name.lower(), retired_name.lower()}) != 3:
+        raise Exception("The new, live and retired database names must all differ")
+
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        cur = conn.cursor()
+
+        report("🔍 Checking databases...", 5)
+        cur.execute(
+            """
+            SELECT datname, datallowconn, datconnlimit
+            FROM pg_database
+            WHERE lower(datname) = ANY(%s)
+            """,
+            ([new_db.lower(), live_name.lower(), retired_name.lower()],),
+        )
+        found = {row[0].lower(): row for row in cur.fetchall()}
+        if new_db.lower() not in found:
+            raise Exception(f"Database '{new_db}' does not exist")
+        if retired_name.lower() in found:
+            raise Exception(f"Database '{retired_name}' already exists")
+        live = found.get(live_name.lower())
+        if live is not None and live[0] != live_name:
+            raise Exception(f"Database '{live[0]}' differs from '{live_name}' only by case")
+        new_settings = found[new_db.lower()][1:]
+        live_settings = live[1:] if live else None
+        swapping = [new_db] + ([live_name] if live else [])
+        final_settings = {live_name: live_settings or new_settings}
+        if live:
+            final_settings[retired_name] = live_settings
+        if settings_callback:
+            settings_callback(final_settings)
+
+        report("🔒 Blocking connections...", 30)
+        blocked_at = time.perf_counter()
+        try:
+            for name in swapping:
+                _set_allow_connections(cur, name, False, -1)
+            for name in swapping:
+                drain_sessions(cur, name, update_callback=update_callback, progress=40)
+
+            attempt = 0
+            while True:
+                if attempt:
+                    for name in swapping:
+                        terminate_sessions(cur, name)
+                try:
+                    conn.autocommit = False
+                    if live:
+                        cur.execute(
+                            sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                                sql.Identifier(live_name), sql.Identifier(retired_name)
+                            )
+                        )
+                    cur.execute(
+                        sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                            sql.Identifier(new_db), sql.Identifier(live_name)
+                        )
+                    )
+                    conn.commit()
+                    break
+                except Exception as e:
+                    conn.rollback()
+                    # A terminated backend that has not exited yet still counts as a session
+                    if getattr(e, "pgcode", None) != errorcodes.OBJECT_IN_USE or attempt >= SWAP_RETRIES:
+                        raise
+                    attempt += 1
+                    time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                finally:
+                    conn.autocommit = True
+        except Exception as e:
+            # Nothing was renamed; give both databases their connections back
+            _set_allow_connections(cur, new_db, *new_settings)
+            if live:
+                _set_allow_connections(cur, live_name, *live_settings)
+            raise Exception(f"Swap of '{new_db}' into '{live_name}' failed and was rolled back: {e}")
+
+        try:
+            _set_allow_connections(cur, live_name, *final_settings[live_name])
+            blocked_ms = round((time.perf_counter() - blocked_at) * 1000, 1)
+            if live:
+                _set_allow_connections(cur, retired_name, *final_settings[retired_name])
+        except Exception as e:
+            raise Exception(
+                f"'{new_db}' is now '{live_name}', but restoring its connection settings failed "
+                f"and it may still refuse connections: {e}"
+            )
+        cur.close()
+    finally:
+        conn.close()
+
+    if live:
+        report(
+            f"✅ '{new_db}' is now '{live_name}'; old database kept as '{retired_name}' "
+            f"(connections blocked {blocked_ms} ms)",
+            100,
+        )
+    else:
+        report(f"✅ '{new_db}' is now '{live_name}' (connections blocked {blocked_ms} ms)", 100)
+    return {"live": live_name, "retired": retired_name if live else None, "blocked_ms": blocked_ms}
@@ -0,0 +1,296 @@
+import threading
+import time
+import uuid
+from psycopg2 import sql, errorcodes
+from .connection import connect_to_db
+from .clone_strategy import server_key
+from .drop_ops import (
+    drop_database_on,
+    supports_force_drop,
+    PROTECTED_DATABASES,
+    DROP_QUEUED,
+    DROP_DRAINING,
+    DROP_RUNNING,
+    DROP_FAILED,
+)
+from .source_lockout import terminate_sessions, drain_sessions
+
+TRASH_PREFIX = "_trash_"
+DROP_TRASHED = "Trashed"
+
+TRASH_RENAME_RETRIES = 5
+RETRY_BASE_DELAY = 0.1
+
+# Reclaim throttle: pause after each drop in proportion to the space it freed
+RECLAIM_MB_PER_S = 200
+RECLAIM_MIN_PAUSE = 2.0
+RECLAIM_IDLE_WAIT = 300
+
+
+def trash_name(db_name):
+    """Return a unique hidden name for a database moved to the trash."""
+    suffix = f"_{int(time.time())}_{uuid.uuid4().hex[:4]}"
+    return f"{TRASH_PREFIX}{db_name}"[: 63 - len(suffix)] + suffix
+
+
+def _move_to_trash_on(conn, db_name, drain_callback=None):
+    """
+    Hide db_name on an autocommit connection and return its trash name.
+
+    New connections are refused first, so nothing can reconnect between the
+    terminate and the rename; busy sessions are drained when a drain timeout
+    is set. The rename and the IS_TEMPLATE flag are set in one transaction;
+    template databases are hidden from fetch_databases.
+    """
+    cur = conn.cursor()
+    cur.execute("SELECT datallowconn FROM pg_database WHERE datname = %s", (db_name,))
+    row = cur.fetchone()
+    if not row:
+        raise Exception(f"Database '{db_name}' does not exist")
+    allowed = row[0]
+    cur.execute(
+        sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS false").format(sql.Identifier(db_name))
+    )
+
+    new_name = trash_name(db_name)
+    attempt = 0
+    try:
+        drain_sessions(cur, db_name, update_callback=drain_callback)
+        while True:
+            if attempt:
+                terminate_sessions(cur, db_name)
+            try:
+                conn.autocommit = False
+                cur.execute(
+                    sql.SQL("ALTER DATABASE {} RENAME TO {}").format(
+                        sql.Identifier(db_name), sql.Identifier(new_name)
+                    )
+                )
+                cur.execute(
+                    sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE true").format(sql.Identifier(new_name))
+                )
+                conn.commit()
+                return new_name
+            except Exception as e:
+                conn.rollback()
+                # A backend that was still exiting keeps the database "in use" briefly
+                if getattr(e, "pgcode", None) != errorcodes.OBJECT_IN_USE or attempt >= TRASH_RENAME_RETRIES:
+                    raise
+                attempt += 1
+                time.sleep(RETRY_BASE_DELAY * 2 ** (attempt - 1))
+            finally:
+                conn.autocommit = True
+    except Exception:
+        if allowed:
+            cur.execute(
+                sql.SQL("ALTER DATABASE {} WITH ALLOW_CONNECTIONS true").format(sql.Identifier(db_name))
+            )
+        raise
+    finally:
+        cur.close()
+
+
+def move_to_trash(credentials, db_name):
+    """
+    Remove db_name from view in milliseconds: terminate its sessions and
+    rename it to a hidden trash name with connections disallowed. The space
+    is freed later by the background reclaimer. Returns the trash name.
+    """
+    if db_name.lower() in PROTECTED_DATABASES:
+        raise Exception(f"Cannot delete system database '{db_name}'")
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        new_name = _move_to_trash_on(conn, db_name)
+    finally:
+        conn.close()
+    get_trash_reclaimer(credentials).wake()
+    return new_name
+
+
+def bulk_trash_databases(
+    credentials,
+    db_names,
+    update_callback=None,
+    progress_callback=None,
+):
+    """
+    Move many databases to the trash on one connection and wake the reclaimer.
+
+    Parameters:
+      - credentials: Database connection credentials
+      - db_names: Databases to delete
+      - update_callback: Optional update_callback(message=None, progress=None) for overall status
+      - progress_callback: Optional progress_callback(db_name, status, detail) per database
+
+    Returns:
+      - Dictionary mapping each database name to an error message, or None on success
+    """
+    def report(message, progress=None):
+        if update_callback:
+            update_callback(message, progress)
+
+    progress_callback = progress_callback or (lambda *args: None)
+    results = {}
+    pending = []
+    for name in db_names:
+        if name.lower() in PROTECTED_DATABASES:
+            results[name] = f"Cannot delete system database '{name}'"
+            progress_callback(name, DROP_FAILED, results[name])
+        else:
+            pending.append(name)
+            progress_callback(name, DROP_QUEUED, "")
+
+    if not pending:
+        return results
+
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        conn.autocommit = True
+        for index, name in enumerate(pending, start=1):
+            progress_callback(name, DROP_RUNNING, "")
+
+            def drain_callback(message, progress=None, name=name):
+                progress_callback(name, DROP_DRAINING, message)
+
+            try:
+                _move_to_trash_on(conn, name, drain_callback)
+                results[name] = None
+                progress_callback(name, DROP_TRASHED, "space is reclaimed in the background")
+            except Exception as e:
+                results[name] = str(e).strip()
+                progress_callback(name, DROP_FAILED, results[name])
+            report(f"🗑️  {index} of {len(pending)} database(s) moved to trash", index * 100 / len(pending))
+    finally:
+        conn.close()
+        get_trash_reclaimer(credentials).wake()
+
+    failures = [name for name, error in results.items() if error]
+    if failures:
+        report(f"⚠️  {len(failures)} of {len(db_names)} database(s) could not be deleted", 100)
+    else:
+        report(f"✅ Deleted {len(db_names)} database(s); disk space is reclaimed in the background", 100)
+    return results
+
+
+def list_trash(credentials):
+    """
+    Return [(trash_name, size_bytes)] for the trash databases on a server.
+    Trash is found by its prefix alone, so one whose IS_TEMPLATE flag was
+    cleared by an interrupted drop is still picked up again.
+    """
+    conn = connect_to_db(credentials)
+    if not conn:
+        raise Exception("Unable to connect to database.")
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            """
+            SELECT datname,
+                   CASE WHEN has_database_privilege(oid, 'CONNECT')
+                        THEN pg_database_size(oid) END
+            FROM pg_database
+            WHERE datname LIKE %s
+            ORDER BY datname;
+            """,
+            (TRASH_PREFIX.replace("_", r"\_") + "%",),
+        )
+        rows = cur.fetchall()
+        cur.close()
+        return rows
+    finally:
+        conn.close()
+
+
+class TrashReclaimer:
+    """
+    Background thread that drops the trash databases of one server one at a
+    time. After each drop it pauses for the time the freed space would take at
+    RECLAIM_MB_PER_S, so unlinking large databases does not saturate the
+    server's disk. Trash left by a previous session is picked up on start.
+    """
+
+    def __init__(self, credentials, mb_per_s=RECLAIM_MB_PER_S):
+        self.credentials = dict(credentials)
+        self.mb_per_s = mb_per_s
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.reclaimed = 0
+        self.reclaimed_bytes = 0
+        self.last_error = None
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._loop, daemon=True)
+                self._thread.start()
+
+    def wake(self):
+        self.start()
+        self._wake.set()
+
+    def _loop(self):
+        while True:
+            self._wake.clear()
+            try:
+                trash = list_trash(self.credentials)
+            except Exception as e:
+                self.last_error = str(e)
+                trash = []
+            for name, size_bytes in trash:
+                pause = self._reclaim(name, size_bytes)
+                time.sleep(pause)
+            if not trash:
+                self._wake.wait(RECLAIM_IDLE_WAIT)
+
+    def _reclaim(self, name, size_bytes):
+        """Drop one trash database and return how long to pause afterwards."""
+        conn = connect_to_db(self.credentials)
+        if not conn:
+            self.last_error = "Unable to connect to database."
+            return RECLAIM_IDLE_WAIT
+        try:
+            conn.autocommit = True
+            cur = conn.cursor()
+            cur.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE false").format(sql.Identifier(name)))
+            try:
+                drop_database_on(cur, name, supports_force_drop(cur), if_exists=True)
+            except Exception:
+                # Keep it hidden from fetch_databases until the next attempt
+                cur.execute(sql.SQL("ALTER DATABASE {} WITH IS_TEMPLATE true").format(sql.Identifier(name)))
+                raise
+            cur.close()
+        except Exception as e:
+            self.last_error = f"{name}: {e}"
+            print(f"Could not reclaim trash database '{name}': {e}")
+            return RECLAIM_IDLE_WAIT
+        finally:
+            conn.close()
+        self.reclaimed += 1
+        self.reclaimed_bytes += size_bytes or 0
+        return max(RECLAIM_MIN_PAUSE, (size_bytes or 0) / (self.mb_per_s * 1024 * 1024))
+
+
+_reclaimers = {}
+_reclaimers_lock = threading.Lock()
+
+
+def get_trash_reclaimer(credentials):
+    """Return the reclaimer of a server, creating it on first use."""
+    key = server_key(credentials)
+    with _reclaimers_lock:
+        reclaimer = _reclaimers.get(key)
+        if reclaimer is None:
+            reclaimer = TrashReclaimer(credentials)
+            _reclaimers[key] = reclaimer
+        return reclaimer
+
+
+def start_trash_reclaimer(credentials):
+    """Drop trash left on this server in the background while the app is open."""
+    get_trash_reclaimer(credentials).start()
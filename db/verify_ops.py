@@ -0,0 +1,354 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from psycopg2 import sql
+from .connection import connect_to_db
+
+DEFAULT_VERIFY_PARALLEL = 4
+DEFAULT_CHUNK_ROWS = 50000
+
+VERIFY_QUEUED = "Queued"
+VERIFY_RUNNING = "Verifying"
+VERIFY_MATCH = "Match"
+VERIFY_MISMATCH = "Mismatch"
+VERIFY_FAILED = "Failed"
+
+
+class IOBudget:
+    """
+    Token bucket shared by all verification workers, limiting how many bytes
+    per second are read from the two servers. A budget of None is unlimited.
+    """
+
+    def __init__(self, mb_per_s=None):
+        self.bytes_per_s = mb_per_s * 1024 * 1024 if mb_per_s else None
+        self._lock = threading.Lock()
+        self._next_free = time.monotonic()
+
+    def consume(self, nbytes):
+        if not self.bytes_per_s or nbytes <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_free)
+            self._next_free = start + nbytes / self.bytes_per_s
+            wait = self._next_free - now
+        if wait > 0:
+            time.sleep(wait)
+
+
+def list_primary_keys(cur):
+    """Map "schema.table" -> list of primary key columns, in key order."""
+    cur.execute(
+        """
+        SELECT n.nspname || '.' || c.relname,
+               array(SELECT a.attname::text FROM unnest(i.indkey) WITH ORDINALITY k(attnum, ord)
+                     JOIN pg_attribute a ON a.attrelid = c.oid AND a.attnum = k.attnum
+                     ORDER BY k.ord)
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        WHERE i.indisprimary
+          AND n.nspname NOT IN ('pg_catalog', 'information_schema')
+        """
+    )
+    return {row[0]: list(row[1]) for row in cur.fetchall()}
+
+
+def _qualified(table):
+    return sql.Identifier(table["schema"], table["table"])
+
+
+def _row_text(table):
+    """Text of a row built from the compared columns only, so column order is fixed."""
+    return sql.SQL("ROW({})::text").format(
+        sql.SQL(", ").join(sql.Identifier("t", col) for col in table["columns"])
+    )
+
+
+def _key_literal(values):
+    return sql.SQL(", ").join(sql.Literal(value) for value in values)
+
+
+def build_chunk_query(table, pk_columns, after_key=None, upper_key=None, chunk_rows=None):
+    """
+    Hash a key range of a table in primary key order: rows with a key greater
+    than after_key and at most upper_key (key values as text, None = open),
+    limited to chunk_rows rows if given.
+    Returns a query yielding (rows, md5, bytes, last key as text[]).
+    """
+    pk = sql.SQL(", ").join(sql.Identifier("t", col) for col in pk_columns)
+    pk_out = sql.SQL(", ").join(sql.Identifier(col) for col in pk_columns)
+    pk_desc = sql.SQL(", ").join(sql.SQL("{} DESC").format(sql.Identifier(col)) for col in pk_columns)
+    pk_text = sql.SQL(", ").join(sql.SQL("{}::text").format(sql.Identifier(col)) for col in pk_columns)
+
+    conditions = []
+    if after_key is not None:
+        conditions.append(sql.SQL("({}) > ({})").format(pk, _key_literal(after_key)))
+    if upper_key is not None:
+        conditions.append(sql.SQL("({}) <= ({})").format(pk, _key_literal(upper_key)))
+    where = sql.SQL("WHERE {}").format(sql.SQL(" AND ").join(conditions)) if conditions else sql.SQL("")
+    limit = sql.SQL("LIMIT {}").format(sql.Literal(int(chunk_rows))) if chunk_rows else sql.SQL("")
+
+    return sql.SQL(
+        """
+        WITH chunk AS (
+            SELECT {pk}, {row_text} AS row_text
+            FROM ONLY {table} t {where}
+            ORDER BY {pk}
+            {limit}
+        )
+        SELECT count(*),
+               md5(string_agg(md5(row_text), '' ORDER BY {pk_out})),
+               coalesce(sum(octet_length(row_text)), 0),
+               (SELECT ARRAY[{pk_text}] FROM chunk ORDER BY {pk_desc} LIMIT 1)
+        FROM chunk
+        """
+    ).format(
+        pk=pk,
+        row_text=_row_text(table),
+        table=_qualified(table),
+        where=where,
+        limit=limit,
+        pk_out=pk_out,
+        pk_text=pk_text,
+        pk_desc=pk_desc,
+    )
+
+
+def build_unordered_hash_query(table):
+    """
+    Hash a table without a primary key as one chunk, independent of row order.
+
+    Each row's md5 is split into two 64-bit integers and both are summed, so
+    the aggregate is a pair of numerics rather than one concatenated string:
+    memory stays constant and there is no 1 GB text limit however many rows
+    the table has. Summing (unlike xor) keeps duplicate rows from cancelling
+    each other out.
+    """
+    return sql.SQL(
+        """
+        SELECT count(*),
+               md5(coalesce(sum(('x' || substr(row_hash, 1, 16))::bit(64)::bigint), 0)::text
+                   || ':' ||
+                   coalesce(sum(('x' || substr(row_hash, 17, 16))::bit(64)::bigint), 0)::text),
+               coalesce(sum(row_bytes), 0)
+        FROM (
+            SELECT md5({row_text}) AS row_hash, octet_length({row_text}) AS row_bytes
+            FROM ONLY {table} t
+        ) s
+        """
+    ).format(row_text=_row_text(table), table=_qualified(table))
+
+
+def _open_reader(credentials, db_name, snapshot_id=None):
+    conn = connect_to_db(credentials, database=db_name)
+    if not conn:
+        raise Exception(f"Unable to connect to database '{db_name}'")
+    conn.set_session(isolation_level="REPEATABLE READ", readonly=True)
+    if snapshot_id:
+        cur = conn.cursor()
+        cur.execute("SET TRANSACTION SNAPSHOT %s", (snapshot_id,))
+        cur.close()
+    return conn
+
+
+def verify_table(src_conn, dst_conn, table, pk_columns, budget, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Compare one table on both connections by exact row count and chunked md5.
+
+    Returns a dictionary with source_rows, target_rows, chunks, mismatched_chunks
+    and first_mismatch (the key range start of the first differing chunk).
+    """
+    src_cur = src_conn.cursor()
+    dst_cur = dst_conn.cursor()
+    result = {"source_rows": 0, "target_rows": 0, "chunks": 0, "mismatched_chunks": 0, "first_mismatch": None}
+
+    if not pk_columns:
+        query = build_unordered_hash_query(table)
+        src_cur.execute(query)
+        src_rows, src_hash, src_bytes = src_cur.fetchone()
+        dst_cur.execute(query)
+        dst_rows, dst_hash, dst_bytes = dst_cur.fetchone()
+        budget.consume(src_bytes + dst_bytes)
+        result.update(source_rows=src_rows, target_rows=dst_rows, chunks=1)
+        if (src_rows, src_hash) != (dst_rows, dst_hash):
+            result["mismatched_chunks"] = 1
+        return result
+
+    # Chunk boundaries come from the source; the target is hashed over the same
+    # key range, so one differing row never shifts the following chunks. The
+    # last range is open-ended on the target to catch extra trailing rows.
+    after_key = None
+    while True:
+        src_cur.execute(build_chunk_query(table, pk_columns, after_key, None, chunk_rows))
+        src_rows, src_hash, src_bytes, src_last = src_cur.fetchone()
+        last_chunk = src_rows < chunk_rows
+        dst_cur.execute(
+            build_chunk_query(table, pk_columns, after_key, None if last_chunk else src_last)
+        )
+        dst_rows, dst_hash, dst_bytes, _ = dst_cur.fetchone()
+        budget.consume(src_bytes + dst_bytes)
+
+        result["source_rows"] += src_rows
+        result["target_rows"] += dst_rows
+        if src_rows or dst_rows:
+            result["chunks"] += 1
+            if (src_rows, src_hash) != (dst_rows, dst_hash):
+                result["mismatched_chunks"] += 1
+                if result["first_mismatch"] is None:
+                    result["first_mismatch"] = after_key or []
+        if last_chunk:
+            break
+        after_key = src_last
+
+    src_cur.close()
+    dst_cur.close()
+    return result
+
+
+def verify_clone(
+    src_credentials,
+    src_db,
+    dst_credentials,
+    dst_db,
+    update_callback=None,
+    table_callback=None,
+    max_parallel=DEFAULT_VERIFY_PARALLEL,
+    chunk_rows=DEFAULT_CHUNK_ROWS,
+    max_mb_per_s=None,
+    tables=None,
+    src_snapshot_id=None,
+):
+    """
+    Verify that dst_db holds the same data as src_db, table by table.
+
+    Every table is compared by exact row count and by md5 over chunks of
+    chunk_rows rows in primary key order (tables without a primary key are
+    hashed as one order-independent chunk). Tables are verified in parallel;
+    max_mb_per_s caps the combined read rate on both servers.
+
+    Writes to the source after the clone show up as mismatches, unless
+    src_snapshot_id (the snapshot the clone was taken from) is given.
+
+    Parameters:
+      - src_credentials / dst_credentials: Source and target server credentials
+      - src_db / dst_db: Databases to compare
+      - update_callback: Optional update_callback(message=None, progress=None)
+      - table_callback: Optional table_callback(table_name, status, result)
+      - max_parallel: Number of tables verified concurrently
+      - chunk_rows: Rows per hashed chunk
+      - max_mb_per_s: Optional I/O budget in MB/s, None for unlimited
+      - tables: Optional list of "schema.table" labels to verify (default: all)
+      - src_snapshot_id: Optional exported snapshot to read the source from
+
+    Returns:
+      - List of per-table result dictionaries with table, status, source_rows,
+        target_rows, chunks, mismatched_chunks, first_mismatch, seconds and error
+    """
+    from .stream_ops import list_source_tables, table_label
+
+    def report(message, progress=None):
+        if update_callback:
+            update_callback(message, progress)
+
+    table_callback = table_callback or (lambda *args: None)
+
+    src_conn = _open_reader(src_credentials, src_db, src_snapshot_id)
+    try:
+        cur = src_conn.cursor()
+        all_tables = list_source_tables(cur)
+        primary_keys = list_primary_keys(cur)
+        cur.close()
+    finally:
+        src_conn.close()
+
+    if tables is not None:
+        wanted = set(tables)
+        all_tables = [t for t in all_tables if table_label(t) in wanted]
+
+    budget = IOBudget(max_mb_per_s)
+    total_bytes = sum(t["size_bytes"] for t in all_tables) or 1
+    for table in all_tables:
+        table_callback(table_label(table), VERIFY_QUEUED, {})
+    budget_text = f", {max_mb_per_s} MB/s budget" if max_mb_per_s else ""
+    report(
+        f"🔎 Verifying {len(all_tables)} table(s) with up to {max_parallel} in parallel{budget_text}...",
+        0,
+    )
+
+    def verify_one(table):
+        label = table_label(table)
+        src = dst = None
+        start = time.perf_counter()
+        try:
+            src = _open_reader(src_credentials, src_db, src_snapshot_id)
+            dst = _open_reader(dst_credentials, dst_db)
+            table_callback(label, VERIFY_RUNNING, {})
+            result = verify_table(src, dst, table, primary_keys.get(label), budget, chunk_rows)
+            matched = (
+                result["mismatched_chunks"] == 0
+                and result["source_rows"] == result["target_rows"]
+            )
+            result.update(
+                table=label,
+                status=VERIFY_MATCH if matched else VERIFY_MISMATCH,
+                seconds=round(time.perf_counter() - start, 3),
+                error=None,
+            )
+        except Exception as e:
+            result = {
+                "table": label,
+                "status": VERIFY_FAILED,
+                "seconds": round(time.perf_counter() - start, 3),
+                "error": str(e),
+            }
+        finally:
+            if src:
+                src.close()
+            if dst:
+                dst.close()
+        table_callback(label, result["status"], result)
+        return result
+
+    results = []
+    verified_bytes = 0
+    with ThreadPoolExecutor(max_workers=max(1, max_parallel)) as executor:
+        futures = {executor.submit(verify_one, table): table for table in all_tables}
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            verified_bytes += futures[future]["size_bytes"]
+            if result["status"] == VERIFY_MISMATCH:
+                report(
+                    f"❌ {result['table']}: {result['source_rows']} source vs "
+                    f"{result['target_rows']} target row(s), "
+                    f"{result['mismatched_chunks']} of {result['chunks']} chunk(s) differ",
+                    100 * verified_bytes / total_bytes,
+                )
+            elif result["status"] == VERIFY_FAILED:
+                report(f"⚠️  {result['table']}: verification failed: {result['error']}",
+                       100 * verified_bytes / total_bytes)
+            else:
+                report(None, 100 * verified_bytes / total_bytes)
+
+    bad = [r for r in results if r["status"] != VERIFY_MATCH]
+    if bad:
+        report(f"❌ Verification found problems in {len(bad)} of {len(results)} table(s)", 100)
+    else:
+        report(f"✅ All {len(results)} table(s) match", 100)
+    return results
+
+
+def verification_summary(results):
+    """One line per table that did not match, for error messages."""
+    lines = []
+    for r in results:
+        if r["status"] == VERIFY_MISMATCH:
+            lines.append(
+                f"{r['table']}: {r['source_rows']} vs {r['target_rows']} rows, "
+                f"{r['mismatched_chunks']}/{r['chunks']} chunks differ"
+            )
+        elif r["status"] == VERIFY_FAILED:
+            lines.append(f"{r['table']}: {r['error']}")
+    return "\n".join(lines)
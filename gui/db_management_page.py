@@ -1,21 +1,66 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 import threading
 import sqlparse
 import time
 from datetime import datetime
+from gui.virtual_grid import VirtualGrid, ListRowStore, StreamRowStore
 from db import (
     fetch_databases,
     get_database_details,
     get_tables_for_database,
     get_columns_for_table,
     get_table_details,
-    terminate_and_delete_database,
-    copy_database_logic,
-    rename_database,
-    execute_sql_query,
+    stream_sql_query,
+    DEFAULT_FETCH_BATCH,
+    QueryCanceller,
+    CANCELLED_MESSAGE,
+    export_query,
+    export_format_for_path,
+    EXPORT_FORMATS,
+    run_script,
+    script_summary,
+    STATEMENT_OK,
+    STATEMENT_SKIPPED,
+    STATEMENT_FAILED,
+    CLONE_STRATEGIES,
+    STRATEGY_AUTO,
+    benchmark_clone_strategies,
+    batch_copy_names,
+    DEFAULT_MAX_PARALLEL,
+    MAX_PARALLEL_LIMIT,
+    get_clone_pool,
+    stream_clone_database,
+    DEFAULT_STREAM_PARALLEL,
+    DEFAULT_SUBSET_PERCENT,
+    estimate_filter_savings,
+    parse_patterns,
+    has_filters,
+    parse_masking_rules,
+    get_job_queue,
+    JOB_CLONE,
+    JOB_BATCH_CLONE,
+    JOB_RENAME,
+    JOB_BULK_DELETE,
+    JOB_RETENTION,
+    JOB_SWAP,
+    JOB_DONE,
+    PRIORITY_HIGH,
+    PRIORITY_NORMAL,
+    format_job_time,
+    MAX_DROP_PARALLEL,
+    find_retention_candidates,
+    retention_report,
+    load_retention_policy,
+    save_retention_policy,
+    get_retention_status,
+    format_size,
+    retired_database_name,
 )
 
+# Tabs beyond this many statements are listed in the script summary only
+MAX_SCRIPT_TABS = 50
+
 
 class DBManagementPage(ttk.Frame):
     def __init__(self, parent, controller):
@@ -28,6 +73,10 @@ class DBManagementPage(ttk.Frame):
         self.protected_databases = ["postgres", "template0", "template1"]
         self.current_view = "normal"
         self.query_history = {}
+        self.query_status_text = ""
+        self.query_canceller = None
+        self.running_query = ""
+        self.running_script = None
 
         # Performance optimization flags
         self._styles_configured = False
@@ -345,6 +394,14 @@ class DBManagementPage(ttk.Frame):
         )
         refresh_btn.pack(side="right", padx=(15, 0))
 
+        cleanup_btn = ttk.Button(
+            left_header,
+            text="Cleanup",
+            command=self.open_retention_dialog,
+            style="Secondary.TButton",
+        )
+        cleanup_btn.pack(side="right", padx=(15, 0))
+
         # Search section
         self.db_search_var = tk.StringVar()
         db_search_frame = ttk.Frame(self.left_frame)
@@ -663,6 +720,23 @@ class DBManagementPage(ttk.Frame):
         )
         execute_btn.pack(side="left", padx=(0, 20))
 
+        script_btn = ttk.Button(
+            button_frame,
+            text="Run Script",
+            command=self.execute_script,
+            style="Success.TButton",
+        )
+        script_btn.pack(side="left", padx=(0, 20))
+
+        self.stop_query_btn = ttk.Button(
+            button_frame,
+            text="Stop",
+            command=self.stop_query,
+            style="Danger.TButton",
+            state="disabled",
+        )
+        self.stop_query_btn.pack(side="left", padx=(0, 20))
+
         format_btn = ttk.Button(
             button_frame,
             text="Format SQL",
@@ -671,6 +745,14 @@ class DBManagementPage(ttk.Frame):
         )
         format_btn.pack(side="left", padx=(0, 20))
 
+        export_btn = ttk.Button(
+            button_frame,
+            text="Export...",
+            command=self.export_query_results,
+            style="Accent.TButton",
+        )
+        export_btn.pack(side="left", padx=(0, 20))
+
         clear_btn = ttk.Button(
             button_frame,
             text="Clear",
@@ -679,6 +761,20 @@ class DBManagementPage(ttk.Frame):
         )
         clear_btn.pack(side="left")
 
+        # Options for Run Script
+        self.script_transaction_var = tk.BooleanVar(value=False)
+        self.script_stop_on_error_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(
+            button_frame,
+            text="Stop on error",
+            variable=self.script_stop_on_error_var,
+        ).pack(side="right")
+        ttk.Checkbutton(
+            button_frame,
+            text="Single transaction",
+            variable=self.script_transaction_var,
+        ).pack(side="right", padx=(0, 20))
+
         # Results
         results_frame = ttk.Frame(query_tab, style="Query.TFrame")
         results_frame.grid(row=2, column=0, sticky="nsew", pady=(0, 15))
@@ -695,22 +791,17 @@ class DBManagementPage(ttk.Frame):
         results_container.columnconfigure(0, weight=1)
         results_container.rowconfigure(0, weight=1)
 
-        self.results_tree = ttk.Treeview(results_container, style="Custom.Treeview")
-
-        results_scrollbar_v = ttk.Scrollbar(
-            results_container, orient="vertical", command=self.results_tree.yview
-        )
-        results_scrollbar_h = ttk.Scrollbar(
-            results_container, orient="horizontal", command=self.results_tree.xview
-        )
-        self.results_tree.configure(
-            yscrollcommand=results_scrollbar_v.set,
-            xscrollcommand=results_scrollbar_h.set,
+        self.results_grid = VirtualGrid(
+            results_container,
+            style="Custom.Treeview",
+            on_rows_changed=self.update_loaded_rows_status,
         )
+        self.results_grid.grid(row=0, column=0, sticky="nsew")
 
-        self.results_tree.grid(row=0, column=0, sticky="nsew")
-        results_scrollbar_v.grid(row=0, column=1, sticky="ns")
-        results_scrollbar_h.grid(row=1, column=0, sticky="ew")
+        # Per-statement results of Run Script; shown in place of results_grid
+        self.script_notebook = ttk.Notebook(results_container)
+        self.script_notebook.grid(row=0, column=0, sticky="nsew")
+        self.script_notebook.grid_remove()
 
     def create_history_tab(self):
         """Create history tab with new color scheme"""
@@ -1111,17 +1202,20 @@ class DBManagementPage(ttk.Frame):
 
     def show_normal_view(self):
         """Switch to normal view (tables/details)"""
+        self.stop_query(record=False)
+        self.reset_results()
         self.current_view = "normal"
         self.query_frame.pack_forget()
         self.normal_frame.pack(fill="both", expand=True)
 
     def show_query_view(self, db_name):
         """Switch to query view for the specified database"""
+        self.stop_query(record=False)
+        self.reset_results()
         self.current_view = "query"
         self.query_db_name = db_name
         self.query_db_label.config(text=f"SQL Query Interface - Database: {db_name}")
         self.sql_text.delete("1.0", tk.END)
-        self.results_tree.delete(*self.results_tree.get_children())
         self.status_label.config(text="Ready to execute queries...")
         self.load_query_history()
         self.normal_frame.pack_forget()
@@ -1186,10 +1280,19 @@ class DBManagementPage(ttk.Frame):
             self.db_context_menu.add_command(
                 label="Clone Database", command=self.clone_database
             )
+            self.db_context_menu.add_command(
+                label="Warm Pool / Fresh Copy", command=self.open_clone_pool_dialog
+            )
+            self.db_context_menu.add_command(
+                label="Stream / Online Clone...", command=self.open_stream_clone_dialog
+            )
             if not self.is_protected_database(self.context_menu_dbs[0]):
                 self.db_context_menu.add_command(
                     label="Rename Database", command=self.rename_database
                 )
+                self.db_context_menu.add_command(
+                    label="Promote / Swap Into...", command=self.open_swap_dialog
+                )
             self.db_context_menu.add_command(
                 label="Query Database", command=self.open_query_interface
             )
@@ -1289,6 +1392,10 @@ class DBManagementPage(ttk.Frame):
         # Variables
         name_var = tk.StringVar(value=default_name)
         copies_var = tk.IntVar(value=1)
+        strategy_var = tk.StringVar(value=STRATEGY_AUTO)
+        parallel_var = tk.IntVar(value=DEFAULT_MAX_PARALLEL)
+        fan_out_var = tk.BooleanVar(value=False)
+        verify_var = tk.BooleanVar(value=False)
         self.clone_in_progress = False
 
         # Main content frame with enhanced styling and larger size
@@ -1336,7 +1443,60 @@ class DBManagementPage(ttk.Frame):
             width=15,
             font=("Segoe UI", 13)
         )
-        copies_spin.grid(row=2, column=1, pady=(0, 30), sticky="w")
+        copies_spin.grid(row=2, column=1, pady=(0, 20), sticky="w")
+
+        ttk.Label(
+            content_frame,
+            text="Clone Strategy:",
+            style="Dialog.TLabel",
+            font=("Segoe UI", 14)
+        ).grid(row=3, column=0, padx=(0, 25), pady=(0, 30), sticky="w")
+
+        strategy_combo = ttk.Combobox(
+            content_frame,
+            textvariable=strategy_var,
+            values=CLONE_STRATEGIES,
+            state="readonly",
+            width=15,
+            font=("Segoe UI", 13)
+        )
+        strategy_combo.grid(row=3, column=1, pady=(0, 20), sticky="w")
+
+        ttk.Label(
+            content_frame,
+            text="Parallel Copies:",
+            style="Dialog.TLabel",
+            font=("Segoe UI", 14)
+        ).grid(row=4, column=0, padx=(0, 25), pady=(0, 30), sticky="w")
+
+        parallel_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        parallel_frame.grid(row=4, column=1, pady=(0, 30), sticky="w")
+
+        parallel_spin = ttk.Spinbox(
+            parallel_frame,
+            from_=1,
+            to=MAX_PARALLEL_LIMIT,
+            textvariable=parallel_var,
+            width=15,
+            font=("Segoe UI", 13)
+        )
+        parallel_spin.pack(side="left")
+
+        # Fan-out interrupts the source once per batch instead of once per copy
+        fan_out_check = ttk.Checkbutton(
+            parallel_frame,
+            text="Fan-out via frozen template",
+            variable=fan_out_var,
+        )
+        fan_out_check.pack(side="left", padx=(20, 0))
+
+        # Row counts and chunked hashes against the source; single copies only
+        verify_check = ttk.Checkbutton(
+            parallel_frame,
+            text="Verify data",
+            variable=verify_var,
+        )
+        verify_check.pack(side="left", padx=(20, 0))
 
         # Progress bar with determinate mode for accurate progress
         progress_bar = ttk.Progressbar(
@@ -1345,7 +1505,7 @@ class DBManagementPage(ttk.Frame):
             maximum=100,
             style="Copy.Horizontal.TProgressbar"
         )
-        progress_bar.grid(row=4, column=0, columnspan=2, padx=25, pady=(20, 10), sticky="ew")
+        progress_bar.grid(row=6, column=0, columnspan=2, padx=25, pady=(20, 10), sticky="ew")
         progress_bar.grid_remove()
 
         # Main status label with larger font and better wrapping
@@ -1356,7 +1516,7 @@ class DBManagementPage(ttk.Frame):
             font=("Segoe UI", 12, "bold"),
             wraplength=500  # Allow text wrapping for longer messages
         )
-        status_label.grid(row=5, column=0, columnspan=2, padx=25, pady=(5, 10), sticky="w")
+        status_label.grid(row=7, column=0, columnspan=2, padx=25, pady=(5, 10), sticky="w")
         status_label.grid_remove()
 
         # Progress details label (shows current database being processed)
@@ -1367,12 +1527,12 @@ class DBManagementPage(ttk.Frame):
             font=("Segoe UI", 11),
             wraplength=500
         )
-        progress_detail_label.grid(row=6, column=0, columnspan=2, padx=25, pady=(5, 10), sticky="w")
+        progress_detail_label.grid(row=8, column=0, columnspan=2, padx=25, pady=(5, 10), sticky="w")
         progress_detail_label.grid_remove()
 
         # Log frame for detailed progress (scrollable)
         log_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
-        log_frame.grid(row=7, column=0, columnspan=2, padx=25, pady=(10, 20), sticky="ew")
+        log_frame.grid(row=9, column=0, columnspan=2, padx=25, pady=(10, 20), sticky="ew")
         log_frame.grid_remove()
         log_frame.columnconfigure(0, weight=1)
         log_frame.rowconfigure(0, weight=1)
@@ -1396,6 +1556,31 @@ class DBManagementPage(ttk.Frame):
         log_text.configure(yscrollcommand=log_scrollbar.set)
         log_scrollbar.grid(row=0, column=1, sticky="ns")
 
+        # Per-copy progress rows for batch clones
+        copies_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        copies_frame.grid(row=10, column=0, columnspan=2, padx=25, pady=(0, 20), sticky="ew")
+        copies_frame.grid_remove()
+        copies_frame.columnconfigure(0, weight=1)
+
+        copies_tree = ttk.Treeview(
+            copies_frame,
+            columns=("Database", "Status", "Detail"),
+            show="headings",
+            height=6,
+            style="Custom.Treeview",
+        )
+        copies_tree.heading("Database", text="Copy")
+        copies_tree.heading("Status", text="Status")
+        copies_tree.heading("Detail", text="Detail")
+        copies_tree.column("Database", width=260)
+        copies_tree.column("Status", width=90)
+        copies_tree.column("Detail", width=180)
+        copies_tree.grid(row=0, column=0, sticky="ew")
+
+        copies_scrollbar = ttk.Scrollbar(copies_frame, orient="vertical", command=copies_tree.yview)
+        copies_tree.configure(yscrollcommand=copies_scrollbar.set)
+        copies_scrollbar.grid(row=0, column=1, sticky="ns")
+
         # Button handlers with enhanced progress tracking
         def update_callback(message=None, progress=None, current_db=None, db_index=None, total_dbs=None):
             """Enhanced callback that handles both message and progress updates"""
@@ -1431,60 +1616,74 @@ class DBManagementPage(ttk.Frame):
                         
             dialog.after(0, update_ui)
 
-        def perform_clone():
+        def copy_progress_callback(db_name, status, detail):
+            """Update the per-copy progress row for db_name"""
+            def update_row():
+                if copies_tree.exists(db_name):
+                    copies_tree.item(db_name, values=(db_name, status, detail))
+                else:
+                    copies_tree.insert("", tk.END, iid=db_name, values=(db_name, status, detail))
+                    copies_tree.see(db_name)
+
+            dialog.after(0, update_row)
+
+        def submit_clone():
             new_name = name_var.get().strip() or default_name
             count = copies_var.get()
+            strategy = strategy_var.get()
             credentials = self.controller.db_credentials
 
-            try:
-                for i in range(count):
-                    if count == 1:
-                        current_name = new_name
-                    else:
-                        current_name = f"{new_name}_{i+1:02d}"
-
-                    # Create a wrapper callback for this specific database
-                    def db_callback(message=None, progress=None):
-                        update_callback(
-                            message=message, 
-                            progress=progress,
-                            current_db=current_name,
-                            db_index=i,
-                            total_dbs=count
-                        )
-
-                    # Update overall progress for multiple databases
-                    if count > 1:
-                        overall_message = f"🚀 Starting clone {i+1} of {count}: {current_name}"
-                        db_callback(overall_message, 0)
-
-                    copy_database_logic(
-                        credentials, source_db, current_name, db_callback
+            def on_done(job):
+                if job["status"] == JOB_DONE:
+                    dialog.after(
+                        0, lambda: self.finish_clone_success(dialog, count, new_name)
                     )
-
-                dialog.after(
-                    0, lambda: self.finish_clone_success(dialog, count, new_name)
+                else:
+                    error = job["error"] or job["status"]
+                    dialog.after(0, lambda: self.finish_clone_error(dialog, error))
+
+            if count == 1:
+                get_job_queue().submit(
+                    JOB_CLONE,
+                    credentials,
+                    {
+                        "src_db": source_db,
+                        "new_db": new_name,
+                        "strategy": strategy,
+                        "verify": verify_var.get(),
+                    },
+                    priority=PRIORITY_HIGH,
+                    on_update=update_callback,
+                    on_done=on_done,
+                )
+            else:
+                get_job_queue().submit(
+                    JOB_BATCH_CLONE,
+                    credentials,
+                    {
+                        "src_db": source_db,
+                        "new_names": batch_copy_names(new_name, count),
+                        "strategy": strategy,
+                        "max_parallel": parallel_var.get(),
+                        "fan_out": fan_out_var.get(),
+                        "verify": verify_var.get(),
+                    },
+                    on_update=update_callback,
+                    on_done=on_done,
+                    callbacks={"on_copy_progress": copy_progress_callback},
                 )
 
-            except Exception as e:
-                dialog.after(0, lambda: self.finish_clone_error(dialog, str(e)))
-
-        def on_ok():
-            if self.clone_in_progress:
-                return
-
-            new_name = name_var.get().strip() or default_name
-            count = copies_var.get()
-
-            if not new_name:
-                messagebox.showwarning("Input Error", "Please enter a database name.")
-                return
-
+        def start_progress_display():
             self.clone_in_progress = True
             ok_btn.config(state="disabled")
+            benchmark_btn.config(state="disabled")
             cancel_btn.config(text="Close", state="disabled")
             name_entry.config(state="disabled")
             copies_spin.config(state="disabled")
+            strategy_combo.config(state="disabled")
+            parallel_spin.config(state="disabled")
+            fan_out_check.config(state="disabled")
+            verify_check.config(state="disabled")
 
             # Show progress elements
             progress_bar.grid()
@@ -1501,8 +1700,51 @@ class DBManagementPage(ttk.Frame):
             status_label.config(text="🚀 Initializing clone operation...")
             progress_detail_label.config(text="📊 Preparing to start...")
 
-            clone_thread = threading.Thread(target=perform_clone, daemon=True)
-            clone_thread.start()
+        def on_ok():
+            if self.clone_in_progress:
+                return
+
+            new_name = name_var.get().strip() or default_name
+
+            if not new_name:
+                messagebox.showwarning("Input Error", "Please enter a database name.")
+                return
+
+            start_progress_display()
+            if copies_var.get() > 1:
+                copies_tree.delete(*copies_tree.get_children())
+                copies_frame.grid()
+
+            status_label.config(text="⏳ Queued - waiting for a free slot on this server...")
+            submit_clone()
+
+        def perform_benchmark():
+            credentials = self.controller.db_credentials
+            try:
+                entry = benchmark_clone_strategies(
+                    credentials, source_db, update_callback
+                )
+                dialog.after(0, lambda: self.finish_benchmark(dialog, entry))
+            except Exception as e:
+                dialog.after(0, lambda: self.finish_clone_error(dialog, str(e)))
+
+        def on_benchmark():
+            if self.clone_in_progress:
+                return
+
+            if not messagebox.askyesno(
+                "Benchmark Clone Strategies",
+                f"This will clone '{source_db}' twice with each strategy, alternating "
+                "which goes first, time them and drop the temporary copies.\n\n"
+                "Active connections to the source database will be terminated. Continue?",
+                parent=dialog,
+            ):
+                return
+
+            start_progress_display()
+            status_label.config(text="⏱️  Benchmarking clone strategies...")
+
+            threading.Thread(target=perform_benchmark, daemon=True).start()
 
         def on_cancel():
             if not self.clone_in_progress:
@@ -1510,13 +1752,18 @@ class DBManagementPage(ttk.Frame):
 
         # Enhanced buttons with better sizing
         btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
-        btn_frame.grid(row=3, column=0, columnspan=2, pady=(25, 0))
+        btn_frame.grid(row=5, column=0, columnspan=2, pady=(25, 0))
 
         ok_btn = ttk.Button(
             btn_frame, text="Clone Database", command=on_ok, style="Success.TButton"
         )
         ok_btn.pack(side="left", padx=25)
 
+        benchmark_btn = ttk.Button(
+            btn_frame, text="Benchmark", command=on_benchmark, style="Accent.TButton"
+        )
+        benchmark_btn.pack(side="left", padx=(0, 25))
+
         cancel_btn = ttk.Button(
             btn_frame, text="Cancel", command=on_cancel, style="Secondary.TButton"
         )
@@ -1526,169 +1773,657 @@ class DBManagementPage(ttk.Frame):
         dialog.withdraw()
         dialog.update_idletasks()
         x = self.winfo_rootx() + (self.winfo_width() // 2) - (650 // 2)
-        y = self.winfo_rooty() + (self.winfo_height() // 2) - (600 // 2)
-        dialog.geometry(f"650x600+{x}+{y}")  # Larger dialog for detailed logs
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (820 // 2)
+        dialog.geometry(f"650x820+{x}+{y}")  # Larger dialog for detailed logs
         dialog.deiconify()
 
         name_entry.focus()
         dialog.wait_window()
 
 
-    def rename_database(self):
-        """Open dialog for renaming a database with improved styling"""
+    def open_clone_pool_dialog(self):
+        """Open dialog for managing the warm pool of a template and handing out fresh copies"""
         if not self.context_menu_dbs:
             return
 
-        if len(self.context_menu_dbs) > 1:
-            messagebox.showwarning(
-                "Rename Limitation",
-                "Please select only one database to rename.\n"
-                f"Currently selected: {len(self.context_menu_dbs)} databases",
-            )
-            return
-
-        source_db = self.context_menu_dbs[0]
-
-        if self.is_protected_database(source_db):
-            messagebox.showwarning(
-                "Protected Database",
-                f"Cannot rename '{source_db}' because it is a protected system database.\n\n"
-                "System databases (postgres, template0, template1) are critical for "
-                "PostgreSQL operation and cannot be renamed.",
-            )
-            return
+        template_db = self.context_menu_dbs[0]
+        credentials = self.controller.db_credentials
+        pool = get_clone_pool(credentials, template_db, start=False)
 
         dialog = tk.Toplevel(self)
-        dialog.title("Rename Database")
+        dialog.title("Warm Pool")
         dialog.transient(self)
         dialog.grab_set()
         dialog.configure(bg="#2C3E50")
 
-        # Variables
-        new_name_var = tk.StringVar(value=source_db)
-        self.rename_in_progress = False
+        size_var = tk.IntVar(value=pool.size)
+        name_var = tk.StringVar(
+            value=f"{template_db}_fresh_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        )
 
-        # Main content frame with enhanced styling and larger size
-        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=50)  # Increased padding
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=50)
         content_frame.pack(fill="both", expand=True)
         content_frame.columnconfigure(1, weight=1)
 
-        # Header with larger font
-        header_label = ttk.Label(
+        ttk.Label(
             content_frame,
-            text="Rename Database",
+            text=f"Warm Pool - {template_db}",
             style="DialogHeader.TLabel",
-            font=("Segoe UI", 20, "bold"),  # Increased from 16
-        )
-        header_label.grid(row=0, column=0, columnspan=2, pady=(0, 40))  # Increased padding
+            font=("Segoe UI", 20, "bold"),
+        ).grid(row=0, column=0, columnspan=2, pady=(0, 30))
 
-        # Current database name (read-only) with improved styling
         ttk.Label(
-            content_frame, 
-            text="Current Name:", 
-            style="Dialog.TLabel",
-            font=("Segoe UI", 14)  # Increased font
-        ).grid(row=1, column=0, padx=(0, 25), pady=(0, 20), sticky="w")  # Increased padding
+            content_frame, text="Ready Spares:", style="Dialog.TLabel", font=("Segoe UI", 14)
+        ).grid(row=1, column=0, padx=(0, 25), pady=(0, 20), sticky="w")
 
-        current_name_entry = ttk.Entry(
-            content_frame, 
-            width=40,  # Increased width
-            font=("Segoe UI", 13)  # Larger font
-        )
-        current_name_entry.insert(0, source_db)
-        current_name_entry.config(state="readonly")
-        current_name_entry.grid(row=1, column=1, pady=(0, 20), sticky="ew")  # Increased padding
+        size_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        size_frame.grid(row=1, column=1, pady=(0, 20), sticky="w")
 
-        # New database name entry with improved styling
-        ttk.Label(
-            content_frame, 
-            text="New Name:", 
-            style="Dialog.TLabel",
-            font=("Segoe UI", 14)  # Increased font
-        ).grid(row=2, column=0, padx=(0, 25), pady=(0, 30), sticky="w")  # Increased padding
+        ttk.Spinbox(
+            size_frame, from_=0, to=20, textvariable=size_var, width=8, font=("Segoe UI", 13)
+        ).pack(side="left")
 
-        new_name_entry = ttk.Entry(
-            content_frame, 
-            textvariable=new_name_var, 
-            width=40,  # Increased width
-            font=("Segoe UI", 13)  # Larger font
-        )
-        new_name_entry.grid(row=2, column=1, pady=(0, 30), sticky="ew")  # Increased padding
+        def on_apply():
+            pool.resize(size_var.get())
+            pool.start()
 
-        # Progress bar (initially hidden)
-        progress_bar = ttk.Progressbar(content_frame, mode="indeterminate")
-        progress_bar.grid(row=4, column=0, columnspan=2, padx=25, pady=20, sticky="ew")  # Increased padding
-        progress_bar.grid_remove()
+        def on_stop():
+            if messagebox.askyesno(
+                "Stop Pool", "Stop refilling and drop all ready spares?", parent=dialog
+            ):
+                threading.Thread(
+                    target=lambda: pool.stop(drop_spares=True), daemon=True
+                ).start()
 
-        # Status label (initially hidden) with larger font
-        status_label = ttk.Label(
-            content_frame, 
-            text="", 
-            style="Dialog.TLabel",
-            font=("Segoe UI", 12)  # Larger font
-        )
-        status_label.grid(row=5, column=0, columnspan=2, padx=25, pady=15, sticky="w")  # Increased padding
-        status_label.grid_remove()
+        ttk.Button(
+            size_frame, text="Start / Resize", command=on_apply, style="Success.TButton"
+        ).pack(side="left", padx=(15, 0))
+        ttk.Button(
+            size_frame, text="Stop", command=on_stop, style="Danger.TButton"
+        ).pack(side="left", padx=(15, 0))
 
-        # Button handlers
-        def update_status(message):
-            dialog.after(0, lambda: status_label.config(text=message))
+        ttk.Label(
+            content_frame, text="Fresh Copy Name:", style="Dialog.TLabel", font=("Segoe UI", 14)
+        ).grid(row=2, column=0, padx=(0, 25), pady=(0, 20), sticky="w")
 
-        def perform_rename():
-            new_name = new_name_var.get().strip()
-            credentials = self.controller.db_credentials
+        ttk.Entry(
+            content_frame, textvariable=name_var, width=40, font=("Segoe UI", 13)
+        ).grid(row=2, column=1, pady=(0, 20), sticky="ew")
+
+        stats_label = ttk.Label(
+            content_frame, text="", style="Dialog.TLabel", font=("Segoe UI", 12), justify="left"
+        )
+        stats_label.grid(row=4, column=0, columnspan=2, pady=(20, 0), sticky="w")
+
+        def refresh_stats():
+            if not dialog.winfo_exists():
+                return
+            stats = pool.stats()
+            avg = f"{stats['avg_refill_s']:.1f}s" if stats["avg_refill_s"] is not None else "-"
+            last = f"{stats['last_refill_s']:.1f}s" if stats["last_refill_s"] is not None else "-"
+            text = (
+                f"Ready: {stats['ready']} / {stats['size']}    Refilling: {stats['refilling']}\n"
+                f"Hits: {stats['hits']}    Misses: {stats['misses']}    Stale: {stats['discarded']}\n"
+                f"Refills: {stats['refills']}    Last: {last}    Average: {avg}"
+            )
+            if stats["last_error"]:
+                text += f"\nLast refill error: {stats['last_error']}"
+            stats_label.config(text=text)
+            dialog.after(1000, refresh_stats)
 
+        def perform_fresh_copy(new_name):
             try:
-                rename_database(credentials, source_db, new_name, update_status)
+                result = pool.acquire(new_name)
+                source = "pool hit" if result["hit"] else "pool miss - cloned from template"
                 dialog.after(
-                    0, lambda: self.finish_rename_success(dialog, source_db, new_name)
+                    0,
+                    lambda: messagebox.showinfo(
+                        "Fresh Copy Ready",
+                        f"Database '{new_name}' is ready ({source}, {result['elapsed_ms']} ms).",
+                        parent=dialog,
+                    ),
                 )
-
+                self.after(0, self.load_databases_async)
             except Exception as e:
-                dialog.after(0, lambda: self.finish_rename_error(dialog, str(e)))
+                dialog.after(
+                    0,
+                    lambda: messagebox.showerror(
+                        "Fresh Copy Error", f"Failed to get fresh copy:\n{e}", parent=dialog
+                    ),
+                )
 
-        def on_rename():
-            if self.rename_in_progress:
+        def on_fresh_copy():
+            new_name = name_var.get().strip()
+            if not new_name:
+                messagebox.showwarning("Input Error", "Please enter a database name.", parent=dialog)
                 return
+            threading.Thread(target=perform_fresh_copy, args=(new_name,), daemon=True).start()
+            name_var.set(f"{template_db}_fresh_{datetime.now().strftime('%Y%m%d_%H%M%S')}")
 
-            new_name = new_name_var.get().strip()
+        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        btn_frame.grid(row=3, column=0, columnspan=2, pady=(15, 0))
 
-            if not new_name:
-                messagebox.showwarning(
-                    "Input Error", "Please enter a new database name."
-                )
-                return
+        ttk.Button(
+            btn_frame, text="Get Fresh Copy", command=on_fresh_copy, style="Success.TButton"
+        ).pack(side="left", padx=25)
+        ttk.Button(
+            btn_frame, text="Close", command=dialog.destroy, style="Secondary.TButton"
+        ).pack(side="right", padx=25)
 
-            if new_name == source_db:
-                messagebox.showwarning(
-                    "Input Error", "New name must be different from current name."
-                )
-                return
+        dialog.withdraw()
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() // 2) - (650 // 2)
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (520 // 2)
+        dialog.geometry(f"650x520+{x}+{y}")
+        dialog.deiconify()
 
-            self.rename_in_progress = True
-            rename_btn.config(state="disabled")
-            cancel_btn.config(text="Close", state="disabled")
-            current_name_entry.config(state="disabled")
-            new_name_entry.config(state="disabled")
+        refresh_stats()
+        dialog.wait_window()
 
-            progress_bar.grid()
-            progress_bar.start(10)
-            status_label.grid()
-            status_label.config(text="Starting rename operation...")
+    def open_stream_clone_dialog(self):
+        """Open dialog for streaming a database to another (or the same) server"""
+        if not self.context_menu_dbs:
+            return
 
-            rename_thread = threading.Thread(target=perform_rename, daemon=True)
-            rename_thread.start()
+        source_db = self.context_menu_dbs[0]
+        credentials = self.controller.db_credentials
 
-        def on_cancel():
-            if not self.rename_in_progress:
-                dialog.destroy()
+        dialog = tk.Toplevel(self)
+        dialog.title("Stream Clone")
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.configure(bg="#2C3E50")
 
-        # Enhanced buttons with better sizing
-        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
-        btn_frame.grid(row=3, column=0, columnspan=2, pady=(25, 0))  # Increased padding
+        host_var = tk.StringVar(value=credentials.get("host", ""))
+        port_var = tk.StringVar(value=str(credentials.get("port", "5432")))
+        user_var = tk.StringVar(value=credentials.get("user", ""))
+        password_var = tk.StringVar(value=credentials.get("password", ""))
+        name_var = tk.StringVar(value=f"{source_db}_stream_{datetime.now().strftime('%Y%m%d')}")
+        parallel_var = tk.IntVar(value=DEFAULT_STREAM_PARALLEL)
+        bin_dir_var = tk.StringVar(value="")
+        snapshot_var = tk.BooleanVar(value=True)
+        subset_var = tk.BooleanVar(value=False)
+        subset_percent_var = tk.DoubleVar(value=DEFAULT_SUBSET_PERCENT)
+        subset_roots_var = tk.StringVar(value="")
+        include_var = tk.StringVar(value="")
+        exclude_var = tk.StringVar(value="")
+        schema_only_var = tk.StringVar(value="")
+        masking_var = tk.StringVar(value="")
+        verify_var = tk.BooleanVar(value=False)
+        self.stream_clone_in_progress = False
+
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=40)
+        content_frame.pack(fill="both", expand=True)
+        content_frame.columnconfigure(1, weight=1)
 
-        rename_btn = ttk.Button(
-            btn_frame,
+        ttk.Label(
+            content_frame,
+            text=f"Stream Clone - {source_db}",
+            style="DialogHeader.TLabel",
+            font=("Segoe UI", 20, "bold"),
+        ).grid(row=0, column=0, columnspan=2, pady=(0, 25))
+
+        fields = [
+            ("Target Host:", host_var, {}),
+            ("Target Port:", port_var, {}),
+            ("Target User:", user_var, {}),
+            ("Target Password:", password_var, {"show": "*"}),
+            ("New Database Name:", name_var, {}),
+            ("PostgreSQL Bin Path:", bin_dir_var, {}),
+        ]
+        inputs = []
+        for row, (label, var, options) in enumerate(fields, start=1):
+            ttk.Label(
+                content_frame, text=label, style="Dialog.TLabel", font=("Segoe UI", 13)
+            ).grid(row=row, column=0, padx=(0, 20), pady=(0, 10), sticky="w")
+            entry = ttk.Entry(
+                content_frame, textvariable=var, width=40, font=("Segoe UI", 12), **options
+            )
+            entry.grid(row=row, column=1, pady=(0, 10), sticky="ew")
+            inputs.append(entry)
+
+        options_row = len(fields) + 1
+        ttk.Label(
+            content_frame, text="Parallel Tables:", style="Dialog.TLabel", font=("Segoe UI", 13)
+        ).grid(row=options_row, column=0, padx=(0, 20), pady=(0, 10), sticky="w")
+        parallel_spin = ttk.Spinbox(
+            content_frame, from_=1, to=16, textvariable=parallel_var, width=8, font=("Segoe UI", 12)
+        )
+        parallel_spin.grid(row=options_row, column=1, pady=(0, 10), sticky="w")
+        inputs.append(parallel_spin)
+
+        options_row += 1
+        snapshot_check = ttk.Checkbutton(
+            content_frame,
+            text="Consistent snapshot - source sessions are not terminated",
+            variable=snapshot_var,
+        )
+        snapshot_check.grid(row=options_row, column=1, pady=(0, 10), sticky="w")
+        inputs.append(snapshot_check)
+
+        options_row += 1
+        verify_check = ttk.Checkbutton(
+            content_frame,
+            text="Verify copied tables (row counts and chunked hashes)",
+            variable=verify_var,
+        )
+        verify_check.grid(row=options_row, column=1, pady=(0, 10), sticky="w")
+        inputs.append(verify_check)
+
+        options_row += 1
+        subset_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        subset_frame.grid(row=options_row, column=1, pady=(0, 10), sticky="ew")
+        subset_check = ttk.Checkbutton(
+            subset_frame, text="Subset clone - sample %", variable=subset_var
+        )
+        subset_check.pack(side="left")
+        subset_percent_spin = ttk.Spinbox(
+            subset_frame,
+            from_=0.1,
+            to=100,
+            increment=1,
+            textvariable=subset_percent_var,
+            width=6,
+            font=("Segoe UI", 12),
+        )
+        subset_percent_spin.pack(side="left", padx=(8, 0))
+        inputs.extend([subset_check, subset_percent_spin])
+
+        options_row += 1
+        ttk.Label(
+            content_frame, text="Subset Root Tables:", style="Dialog.TLabel", font=("Segoe UI", 13)
+        ).grid(row=options_row, column=0, padx=(0, 20), pady=(0, 10), sticky="w")
+        subset_roots_entry = ttk.Entry(
+            content_frame, textvariable=subset_roots_var, width=40, font=("Segoe UI", 12)
+        )
+        subset_roots_entry.grid(row=options_row, column=1, pady=(0, 10), sticky="ew")
+        inputs.append(subset_roots_entry)
+
+        # Filter patterns: "schema.table" globs, or a bare table name glob for any schema
+        for label, var in (
+            ("Include Tables:", include_var),
+            ("Exclude Tables:", exclude_var),
+            ("Schema-only Tables:", schema_only_var),
+            ("Masking Rules:", masking_var),
+        ):
+            options_row += 1
+            ttk.Label(
+                content_frame, text=label, style="Dialog.TLabel", font=("Segoe UI", 13)
+            ).grid(row=options_row, column=0, padx=(0, 20), pady=(0, 10), sticky="w")
+            entry = ttk.Entry(content_frame, textvariable=var, width=40, font=("Segoe UI", 12))
+            entry.grid(row=options_row, column=1, pady=(0, 10), sticky="ew")
+            inputs.append(entry)
+
+        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        btn_frame.grid(row=options_row + 1, column=0, columnspan=2, pady=(15, 10))
+
+        progress_bar = ttk.Progressbar(
+            content_frame, mode="determinate", maximum=100, style="Copy.Horizontal.TProgressbar"
+        )
+        progress_bar.grid(row=options_row + 2, column=0, columnspan=2, pady=(10, 5), sticky="ew")
+
+        status_label = ttk.Label(
+            content_frame, text="", style="Dialog.TLabel", font=("Segoe UI", 12, "bold"), wraplength=700
+        )
+        status_label.grid(row=options_row + 3, column=0, columnspan=2, pady=(5, 10), sticky="w")
+
+        tables_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        tables_frame.grid(row=options_row + 4, column=0, columnspan=2, sticky="nsew")
+        tables_frame.columnconfigure(0, weight=1)
+        content_frame.rowconfigure(options_row + 4, weight=1)
+
+        tables_tree = ttk.Treeview(
+            tables_frame,
+            columns=("Table", "Status", "Rows", "MB", "MB/s"),
+            show="headings",
+            height=8,
+            style="Custom.Treeview",
+        )
+        for col, width in (("Table", 260), ("Status", 90), ("Rows", 100), ("MB", 80), ("MB/s", 80)):
+            tables_tree.heading(col, text=col)
+            tables_tree.column(col, width=width, anchor="w" if col == "Table" else "e")
+        tables_tree.grid(row=0, column=0, sticky="nsew")
+        tables_scrollbar = ttk.Scrollbar(tables_frame, orient="vertical", command=tables_tree.yview)
+        tables_tree.configure(yscrollcommand=tables_scrollbar.set)
+        tables_scrollbar.grid(row=0, column=1, sticky="ns")
+
+        def update_callback(message=None, progress=None):
+            def update_ui():
+                if message is not None:
+                    status_label.config(text=message)
+                if progress is not None:
+                    progress_bar["value"] = progress
+
+            dialog.after(0, update_ui)
+
+        def table_callback(table_name, status, stats):
+            def update_row():
+                values = (
+                    table_name,
+                    status,
+                    stats.get("rows", ""),
+                    f"{stats['bytes'] / 1024 / 1024:.1f}" if "bytes" in stats else "",
+                    stats.get("mb_per_s") or "",
+                )
+                if tables_tree.exists(table_name):
+                    tables_tree.item(table_name, values=values)
+                else:
+                    tables_tree.insert("", tk.END, iid=table_name, values=values)
+
+            dialog.after(0, update_row)
+
+        def perform_stream_clone(target_credentials, new_name, options):
+            try:
+                results = stream_clone_database(
+                    credentials,
+                    source_db,
+                    target_credentials,
+                    new_name,
+                    update_callback,
+                    table_callback,
+                    **options,
+                )
+                dialog.after(0, lambda: self.finish_stream_clone(dialog, new_name, results))
+            except Exception as e:
+                dialog.after(0, lambda: self.finish_stream_clone_error(dialog, str(e)))
+
+        def on_start():
+            if self.stream_clone_in_progress:
+                return
+
+            new_name = name_var.get().strip()
+            if not new_name:
+                messagebox.showwarning("Input Error", "Please enter a database name.", parent=dialog)
+                return
+
+            target_credentials = {
+                "host": host_var.get().strip(),
+                "port": port_var.get().strip(),
+                "user": user_var.get().strip(),
+                "password": password_var.get(),
+            }
+            options = {
+                "max_parallel": parallel_var.get(),
+                "pg_bin_dir": bin_dir_var.get().strip() or None,
+                "use_snapshot": snapshot_var.get(),
+                "verify": verify_var.get(),
+            }
+            if subset_var.get():
+                # Root tables are "schema.table", comma separated; empty samples every table
+                roots = [r.strip() for r in subset_roots_var.get().split(",") if r.strip()]
+                options["subset"] = {
+                    "percent": subset_percent_var.get(),
+                    "root_tables": [r if "." in r else f"public.{r}" for r in roots],
+                }
+            filters = {
+                "include_tables": parse_patterns(include_var.get()),
+                "exclude_tables": parse_patterns(exclude_var.get()),
+                "schema_only_tables": parse_patterns(schema_only_var.get()),
+            }
+            if has_filters(filters):
+                options["filters"] = filters
+            try:
+                # e.g. "users.email=fake, users.ssn=null, notes=truncate:20"
+                masking_rules = parse_masking_rules(masking_var.get())
+            except Exception as e:
+                messagebox.showwarning("Masking Rules", str(e), parent=dialog)
+                return
+            if masking_rules:
+                options["masking"] = masking_rules
+
+            self.stream_clone_in_progress = True
+            start_btn.config(state="disabled")
+            close_btn.config(state="disabled")
+            for widget in inputs:
+                widget.config(state="disabled")
+            tables_tree.delete(*tables_tree.get_children())
+
+            if "filters" in options:
+                status_label.config(text="📏 Estimating bytes saved by filters...")
+                threading.Thread(
+                    target=perform_estimate,
+                    args=(target_credentials, new_name, options),
+                    daemon=True,
+                ).start()
+            else:
+                launch(target_credentials, new_name, options)
+
+        def launch(target_credentials, new_name, options):
+            status_label.config(text="🚀 Starting stream clone...")
+            threading.Thread(
+                target=perform_stream_clone,
+                args=(target_credentials, new_name, options),
+                daemon=True,
+            ).start()
+
+        def perform_estimate(target_credentials, new_name, options):
+            try:
+                estimate = estimate_filter_savings(credentials, source_db, options["filters"])
+                dialog.after(
+                    0, lambda: confirm_estimate(estimate, target_credentials, new_name, options)
+                )
+            except Exception as e:
+                dialog.after(0, lambda: self.finish_stream_clone_error(dialog, str(e)))
+
+        def confirm_estimate(estimate, target_credentials, new_name, options):
+            total_mb = estimate["total_bytes"] / 1024 / 1024
+            saved_mb = estimate["skipped_bytes"] / 1024 / 1024
+            largest = "\n".join(
+                f"  {label}: {size / 1024 / 1024:.1f} MB"
+                for label, size in estimate["skipped_tables"][:8]
+            )
+            pruned = ""
+            if estimate["pruned_tables"]:
+                pruned = (
+                    "Rows referencing the empty tables will be deleted from "
+                    f"{len(estimate['pruned_tables'])} copied table(s) so their foreign keys "
+                    "can be created:\n"
+                    + "\n".join(f"  {label}" for label in estimate["pruned_tables"][:8])
+                    + "\n\n"
+                )
+            status_label.config(text=f"📏 Filters skip {saved_mb:.1f} MB of {total_mb:.1f} MB")
+            proceed = messagebox.askyesno(
+                "Filtered Clone",
+                f"{len(estimate['skipped_tables'])} table(s) will be created empty, "
+                f"saving about {saved_mb:.1f} MB of {total_mb:.1f} MB.\n\n"
+                f"{largest}\n\n"
+                f"{pruned}"
+                f"{estimate['copied_tables']} table(s) will be copied. Continue?",
+                parent=dialog,
+            )
+            if proceed:
+                launch(target_credentials, new_name, options)
+            else:
+                self.stream_clone_in_progress = False
+                start_btn.config(state="normal")
+                close_btn.config(state="normal")
+                for widget in inputs:
+                    widget.config(state="normal")
+
+        def on_close():
+            if not self.stream_clone_in_progress:
+                dialog.destroy()
+
+        start_btn = ttk.Button(
+            btn_frame, text="Start Stream Clone", command=on_start, style="Success.TButton"
+        )
+        start_btn.pack(side="left", padx=25)
+        close_btn = ttk.Button(btn_frame, text="Cancel", command=on_close, style="Secondary.TButton")
+        close_btn.pack(side="right", padx=25)
+        dialog.protocol("WM_DELETE_WINDOW", on_close)
+
+        dialog.withdraw()
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() // 2) - (760 // 2)
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (1120 // 2)
+        dialog.geometry(f"760x1120+{x}+{y}")
+        dialog.deiconify()
+
+        dialog.wait_window()
+
+    def rename_database(self):
+        """Open dialog for renaming a database with improved styling"""
+        if not self.context_menu_dbs:
+            return
+
+        if len(self.context_menu_dbs) > 1:
+            messagebox.showwarning(
+                "Rename Limitation",
+                "Please select only one database to rename.\n"
+                f"Currently selected: {len(self.context_menu_dbs)} databases",
+            )
+            return
+
+        source_db = self.context_menu_dbs[0]
+
+        if self.is_protected_database(source_db):
+            messagebox.showwarning(
+                "Protected Database",
+                f"Cannot rename '{source_db}' because it is a protected system database.\n\n"
+                "System databases (postgres, template0, template1) are critical for "
+                "PostgreSQL operation and cannot be renamed.",
+            )
+            return
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Rename Database")
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.configure(bg="#2C3E50")
+
+        # Variables
+        new_name_var = tk.StringVar(value=source_db)
+        self.rename_in_progress = False
+
+        # Main content frame with enhanced styling and larger size
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=50)  # Increased padding
+        content_frame.pack(fill="both", expand=True)
+        content_frame.columnconfigure(1, weight=1)
+
+        # Header with larger font
+        header_label = ttk.Label(
+            content_frame,
+            text="Rename Database",
+            style="DialogHeader.TLabel",
+            font=("Segoe UI", 20, "bold"),  # Increased from 16
+        )
+        header_label.grid(row=0, column=0, columnspan=2, pady=(0, 40))  # Increased padding
+
+        # Current database name (read-only) with improved styling
+        ttk.Label(
+            content_frame, 
+            text="Current Name:", 
+            style="Dialog.TLabel",
+            font=("Segoe UI", 14)  # Increased font
+        ).grid(row=1, column=0, padx=(0, 25), pady=(0, 20), sticky="w")  # Increased padding
+
+        current_name_entry = ttk.Entry(
+            content_frame, 
+            width=40,  # Increased width
+            font=("Segoe UI", 13)  # Larger font
+        )
+        current_name_entry.insert(0, source_db)
+        current_name_entry.config(state="readonly")
+        current_name_entry.grid(row=1, column=1, pady=(0, 20), sticky="ew")  # Increased padding
+
+        # New database name entry with improved styling
+        ttk.Label(
+            content_frame, 
+            text="New Name:", 
+            style="Dialog.TLabel",
+            font=("Segoe UI", 14)  # Increased font
+        ).grid(row=2, column=0, padx=(0, 25), pady=(0, 30), sticky="w")  # Increased padding
+
+        new_name_entry = ttk.Entry(
+            content_frame, 
+            textvariable=new_name_var, 
+            width=40,  # Increased width
+            font=("Segoe UI", 13)  # Larger font
+        )
+        new_name_entry.grid(row=2, column=1, pady=(0, 30), sticky="ew")  # Increased padding
+
+        # Progress bar (initially hidden)
+        progress_bar = ttk.Progressbar(content_frame, mode="indeterminate")
+        progress_bar.grid(row=4, column=0, columnspan=2, padx=25, pady=20, sticky="ew")  # Increased padding
+        progress_bar.grid_remove()
+
+        # Status label (initially hidden) with larger font
+        status_label = ttk.Label(
+            content_frame, 
+            text="", 
+            style="Dialog.TLabel",
+            font=("Segoe UI", 12)  # Larger font
+        )
+        status_label.grid(row=5, column=0, columnspan=2, padx=25, pady=15, sticky="w")  # Increased padding
+        status_label.grid_remove()
+
+        # Button handlers
+        def update_status(message):
+            dialog.after(0, lambda: status_label.config(text=message))
+
+        def submit_rename():
+            new_name = new_name_var.get().strip()
+            credentials = self.controller.db_credentials
+
+            def on_done(job):
+                if job["status"] == JOB_DONE:
+                    dialog.after(
+                        0, lambda: self.finish_rename_success(dialog, source_db, new_name)
+                    )
+                else:
+                    error = job["error"] or job["status"]
+                    dialog.after(0, lambda: self.finish_rename_error(dialog, error))
+
+            get_job_queue().submit(
+                JOB_RENAME,
+                credentials,
+                {"old_name": source_db, "new_name": new_name},
+                priority=PRIORITY_HIGH,
+                on_update=lambda message, progress=None: message and update_status(message),
+                on_done=on_done,
+            )
+
+        def on_rename():
+            if self.rename_in_progress:
+                return
+
+            new_name = new_name_var.get().strip()
+
+            if not new_name:
+                messagebox.showwarning(
+                    "Input Error", "Please enter a new database name."
+                )
+                return
+
+            if new_name == source_db:
+                messagebox.showwarning(
+                    "Input Error", "New name must be different from current name."
+                )
+                return
+
+            self.rename_in_progress = True
+            rename_btn.config(state="disabled")
+            cancel_btn.config(text="Close", state="disabled")
+            current_name_entry.config(state="disabled")
+            new_name_entry.config(state="disabled")
+
+            progress_bar.grid()
+            progress_bar.start(10)
+            status_label.grid()
+            status_label.config(text="Starting rename operation...")
+
+            submit_rename()
+
+        def on_cancel():
+            if not self.rename_in_progress:
+                dialog.destroy()
+
+        # Enhanced buttons with better sizing
+        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        btn_frame.grid(row=3, column=0, columnspan=2, pady=(25, 0))  # Increased padding
+
+        rename_btn = ttk.Button(
+            btn_frame,
             text="Rename Database",
             command=on_rename,
             style="Warning.TButton",
@@ -1712,6 +2447,151 @@ class DBManagementPage(ttk.Frame):
         new_name_entry.select_range(0, tk.END)
         dialog.wait_window()
 
+    def open_swap_dialog(self):
+        """Open dialog for promoting the selected database into a live name (blue/green swap)"""
+        if not self.context_menu_dbs:
+            return
+
+        new_db = self.context_menu_dbs[0]
+        credentials = self.controller.db_credentials
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Promote Database")
+        dialog.transient(self)
+        dialog.grab_set()
+        dialog.configure(bg="#2C3E50")
+
+        live_choices = [
+            db for db in self.all_databases if db != new_db and not self.is_protected_database(db)
+        ]
+        live_var = tk.StringVar(value="")
+        retired_var = tk.StringVar(value="")
+
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=50)
+        content_frame.pack(fill="both", expand=True)
+        content_frame.columnconfigure(1, weight=1)
+
+        ttk.Label(
+            content_frame,
+            text=f"Promote '{new_db}'",
+            style="DialogHeader.TLabel",
+            font=("Segoe UI", 20, "bold"),
+        ).grid(row=0, column=0, columnspan=2, pady=(0, 30))
+
+        ttk.Label(
+            content_frame, text="Live Name:", style="Dialog.TLabel", font=("Segoe UI", 14)
+        ).grid(row=1, column=0, padx=(0, 25), pady=(0, 20), sticky="w")
+
+        live_combo = ttk.Combobox(
+            content_frame, textvariable=live_var, values=live_choices, font=("Segoe UI", 13)
+        )
+        live_combo.grid(row=1, column=1, pady=(0, 20), sticky="ew")
+
+        ttk.Label(
+            content_frame, text="Move Old To:", style="Dialog.TLabel", font=("Segoe UI", 14)
+        ).grid(row=2, column=0, padx=(0, 25), pady=(0, 20), sticky="w")
+
+        ttk.Entry(
+            content_frame, textvariable=retired_var, font=("Segoe UI", 13)
+        ).grid(row=2, column=1, pady=(0, 20), sticky="ew")
+
+        ttk.Label(
+            content_frame,
+            text=(
+                "Both renames run in one transaction. Connections are blocked for\n"
+                "milliseconds, and nothing changes if any step fails."
+            ),
+            style="Dialog.TLabel",
+            font=("Segoe UI", 11),
+            justify="left",
+        ).grid(row=3, column=0, columnspan=2, pady=(0, 20), sticky="w")
+
+        status_label = ttk.Label(content_frame, text="", style="Dialog.TLabel", font=("Segoe UI", 12))
+        status_label.grid(row=5, column=0, columnspan=2, pady=(15, 0), sticky="w")
+
+        def on_live_change(*args):
+            live_name = live_var.get().strip()
+            retired_var.set(retired_database_name(live_name) if live_name else "")
+
+        live_var.trace_add("write", on_live_change)
+
+        def update_status(message=None, progress=None):
+            if message is not None:
+                dialog.after(0, lambda: status_label.config(text=message))
+
+        def on_done(job):
+            def finish():
+                self.load_databases_async()
+                if job["status"] == JOB_DONE:
+                    if dialog.winfo_exists():
+                        dialog.destroy()
+                    messagebox.showinfo("Swap Complete", job["message"] or "Swap complete.")
+                else:
+                    if dialog.winfo_exists():
+                        swap_btn.config(state="normal")
+                        cancel_btn.config(state="normal")
+                    messagebox.showerror(
+                        "Swap Error", job["error"] or job["status"], parent=dialog
+                    )
+
+            dialog.after(0, finish)
+
+        def on_swap():
+            live_name = live_var.get().strip()
+            retired_name = retired_var.get().strip()
+            if not live_name or not retired_name:
+                messagebox.showwarning(
+                    "Input Error", "Please enter the live name and the name for the old database.",
+                    parent=dialog,
+                )
+                return
+            if self.is_protected_database(live_name):
+                messagebox.showwarning(
+                    "Protected Database", f"'{live_name}' is a protected system database.", parent=dialog
+                )
+                return
+            if live_name in self.all_databases and not messagebox.askyesno(
+                "Confirm Swap",
+                f"Replace '{live_name}' with '{new_db}'?\n\n"
+                f"Sessions connected to either database are terminated. "
+                f"The current '{live_name}' is kept as '{retired_name}'.",
+                icon="warning",
+                parent=dialog,
+            ):
+                return
+
+            swap_btn.config(state="disabled")
+            cancel_btn.config(state="disabled")
+            status_label.config(text="⏳ Queued - waiting for a free slot on this server...")
+            get_job_queue().submit(
+                JOB_SWAP,
+                credentials,
+                {"new_db": new_db, "live_name": live_name, "retired_name": retired_name},
+                priority=PRIORITY_HIGH,
+                on_update=update_status,
+                on_done=on_done,
+            )
+
+        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        btn_frame.grid(row=4, column=0, columnspan=2, pady=(15, 0))
+
+        swap_btn = ttk.Button(btn_frame, text="Swap", command=on_swap, style="Warning.TButton")
+        swap_btn.pack(side="left", padx=25)
+        cancel_btn = ttk.Button(
+            btn_frame, text="Cancel", command=dialog.destroy, style="Secondary.TButton"
+        )
+        cancel_btn.pack(side="right", padx=25)
+
+        dialog.withdraw()
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() // 2) - (640 // 2)
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (460 // 2)
+        dialog.geometry(f"640x460+{x}+{y}")
+        dialog.deiconify()
+
+        live_combo.focus()
+        dialog.wait_window()
+
     def open_query_interface(self):
         """Open SQL query interface for the selected database in the right pane."""
         if not self.context_menu_dbs:
@@ -1844,12 +2724,21 @@ class DBManagementPage(ttk.Frame):
             justify="center",
             font=("Segoe UI", 13)  # Larger font
         )
-        warning_label.pack(pady=(0, 35))  # Increased padding
+        warning_label.pack(pady=(0, 15))
+
+        fast_var = tk.BooleanVar(value=True)
+        fast_check = ttk.Checkbutton(
+            content_frame,
+            text="Fast delete - hide now, reclaim disk space in the background",
+            variable=fast_var,
+        )
+        fast_check.pack(pady=(0, 20))
 
         # Button handlers
         def on_delete():
+            fast = fast_var.get()
             dialog.destroy()
-            self.perform_multiple_database_deletion(db_names)
+            self.perform_multiple_database_deletion(db_names, fast=fast)
 
         def on_cancel():
             dialog.destroy()
@@ -1874,7 +2763,7 @@ class DBManagementPage(ttk.Frame):
         cancel_btn.pack(side="right", padx=25)  # Increased spacing
 
         # Set size and center the dialog with better dimensions
-        min_height = 400 if len(db_names) <= 3 else 450  # Increased height
+        min_height = 440 if len(db_names) <= 3 else 490
         dialog.minsize(550, min_height)  # Increased width
 
         dialog.withdraw()
@@ -1887,25 +2776,373 @@ class DBManagementPage(ttk.Frame):
         cancel_btn.focus()
         dialog.wait_window()
 
-    def perform_multiple_database_deletion(self, db_names):
-        """Perform deletion of multiple databases in background thread"""
-        def deletion_worker():
-            credentials = self.controller.db_credentials
-            errors = []
-            successful_deletions = []
+    def perform_multiple_database_deletion(self, db_names, fast=False):
+        """
+        Queue a bulk drop of db_names and show per-database progress while it runs.
+        With fast, the databases are moved to the trash and dropped later in the background.
+        """
+        credentials = self.controller.db_credentials
 
-            for db_name in db_names:
-                try:
-                    terminate_and_delete_database(credentials, db_name)
-                    successful_deletions.append(db_name)
-                except Exception as e:
-                    errors.append(f"{db_name}: {str(e)}")
+        dialog = tk.Toplevel(self)
+        dialog.title("Deleting Databases")
+        dialog.transient(self)
+        dialog.configure(bg="#2C3E50")
+
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=30)
+        content_frame.pack(fill="both", expand=True)
+        content_frame.columnconfigure(0, weight=1)
+        content_frame.rowconfigure(2, weight=1)
 
-            self.after(
-                0, lambda: self.finish_multiple_deletion(successful_deletions, errors)
+        status_label = ttk.Label(
+            content_frame,
+            text="⏳ Queued - waiting for a free slot on this server...",
+            style="Dialog.TLabel",
+            font=("Segoe UI", 12),
+        )
+        status_label.grid(row=0, column=0, columnspan=2, sticky="w", pady=(0, 10))
+
+        progress_bar = ttk.Progressbar(
+            content_frame, mode="determinate", maximum=100, style="Copy.Horizontal.TProgressbar"
+        )
+        progress_bar.grid(row=1, column=0, columnspan=2, sticky="ew", pady=(0, 15))
+
+        drops_tree = ttk.Treeview(
+            content_frame,
+            columns=("Database", "Status", "Detail"),
+            show="headings",
+            height=10,
+            style="Custom.Treeview",
+        )
+        for col, width in (("Database", 220), ("Status", 90), ("Detail", 240)):
+            drops_tree.heading(col, text=col)
+            drops_tree.column(col, width=width)
+        drops_tree.grid(row=2, column=0, sticky="nsew")
+        drops_scrollbar = ttk.Scrollbar(content_frame, orient="vertical", command=drops_tree.yview)
+        drops_tree.configure(yscrollcommand=drops_scrollbar.set)
+        drops_scrollbar.grid(row=2, column=1, sticky="ns")
+        for db_name in db_names:
+            drops_tree.insert("", tk.END, iid=db_name, values=(db_name, "Queued", ""))
+
+        def update_callback(message=None, progress=None):
+            def update_ui():
+                if message is not None:
+                    status_label.config(text=message)
+                if progress is not None:
+                    progress_bar["value"] = progress
+
+            dialog.after(0, update_ui)
+
+        def drop_progress_callback(db_name, status, detail):
+            def update_row():
+                if drops_tree.exists(db_name):
+                    drops_tree.item(db_name, values=(db_name, status, detail))
+                    drops_tree.see(db_name)
+
+            dialog.after(0, update_row)
+
+        def on_done(job):
+            successful_deletions = list(job["state"].get("completed", []))
+            errors = [
+                f"{name}: {error}" for name, error in job["state"].get("errors", {}).items()
+            ]
+            if job["status"] != JOB_DONE and not errors:
+                errors.append(job["error"] or job["status"])
+
+            def finish():
+                dialog.destroy()
+                self.finish_multiple_deletion(successful_deletions, errors)
+
+            dialog.after(0, finish)
+
+        dialog.withdraw()
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() // 2) - (600 // 2)
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (460 // 2)
+        dialog.geometry(f"600x460+{x}+{y}")
+        dialog.deiconify()
+
+        get_job_queue().submit(
+            JOB_BULK_DELETE,
+            credentials,
+            {"db_names": list(db_names), "fast": fast},
+            priority=PRIORITY_HIGH if fast else PRIORITY_NORMAL,
+            on_update=update_callback,
+            on_done=on_done,
+            callbacks={"on_drop_progress": drop_progress_callback},
+        )
+
+    def open_retention_dialog(self):
+        """Preview and drop old clones matching a retention policy, and schedule it"""
+        credentials = self.controller.db_credentials
+        if not credentials:
+            return
+        policy = load_retention_policy(credentials)
+
+        dialog = tk.Toplevel(self)
+        dialog.title("Clone Retention")
+        dialog.transient(self)
+        dialog.configure(bg="#2C3E50")
+
+        patterns_var = tk.StringVar(value=", ".join(policy["patterns"]))
+        exclude_var = tk.StringVar(value=", ".join(policy["exclude"]))
+        age_var = tk.StringVar(value=str(policy["min_age_days"]))
+        idle_var = tk.StringVar(value=str(policy["idle_days"]))
+        size_var = tk.StringVar(value=str(policy["min_size_mb"]))
+        parallel_var = tk.IntVar(value=policy["max_parallel"])
+        schedule_var = tk.StringVar(value=str(policy["schedule_hours"]))
+        previewed = []
+
+        content_frame = ttk.Frame(dialog, style="Dialog.TFrame", padding=30)
+        content_frame.pack(fill="both", expand=True)
+        content_frame.columnconfigure(1, weight=1)
+        content_frame.rowconfigure(10, weight=1)
+
+        ttk.Label(
+            content_frame,
+            text="Clone Retention",
+            style="DialogHeader.TLabel",
+            font=("Segoe UI", 20, "bold"),
+        ).grid(row=0, column=0, columnspan=3, pady=(0, 20))
+
+        fields = [
+            ("Name Patterns:", patterns_var, "entry"),
+            ("Exclude Patterns:", exclude_var, "entry"),
+            ("Older Than (days):", age_var, "number"),
+            ("Idle For (days):", idle_var, "number"),
+            ("Larger Than (MB):", size_var, "number"),
+            ("Parallel Drops:", parallel_var, "parallel"),
+            ("Run Every (hours, 0 = off):", schedule_var, "number"),
+        ]
+        for row, (label, var, kind) in enumerate(fields, start=1):
+            ttk.Label(
+                content_frame, text=label, style="Dialog.TLabel", font=("Segoe UI", 12)
+            ).grid(row=row, column=0, padx=(0, 20), pady=(0, 8), sticky="w")
+            if kind == "entry":
+                ttk.Entry(
+                    content_frame, textvariable=var, font=("Segoe UI", 12)
+                ).grid(row=row, column=1, columnspan=2, pady=(0, 8), sticky="ew")
+            elif kind == "parallel":
+                ttk.Spinbox(
+                    content_frame,
+                    from_=1,
+                    to=MAX_DROP_PARALLEL,
+                    textvariable=var,
+                    width=8,
+                    font=("Segoe UI", 12),
+                ).grid(row=row, column=1, pady=(0, 8), sticky="w")
+            else:
+                ttk.Entry(
+                    content_frame, textvariable=var, width=10, font=("Segoe UI", 12)
+                ).grid(row=row, column=1, pady=(0, 8), sticky="w")
+
+        status_label = ttk.Label(
+            content_frame, text="", style="Dialog.TLabel", font=("Segoe UI", 11), justify="left"
+        )
+        status_label.grid(row=8, column=0, columnspan=3, sticky="w", pady=(10, 8))
+
+        progress_bar = ttk.Progressbar(
+            content_frame, mode="determinate", maximum=100, style="Copy.Horizontal.TProgressbar"
+        )
+        progress_bar.grid(row=9, column=0, columnspan=3, sticky="ew", pady=(0, 10))
+
+        columns = (("Database", 260), ("Size", 90), ("Created", 130), ("Last Activity", 130), ("Status", 260))
+        matches_tree = ttk.Treeview(
+            content_frame,
+            columns=[c[0] for c in columns],
+            show="headings",
+            height=10,
+            style="Custom.Treeview",
+        )
+        for col, width in columns:
+            matches_tree.heading(col, text=col)
+            matches_tree.column(col, width=width)
+        matches_tree.grid(row=10, column=0, columnspan=2, sticky="nsew")
+        matches_scrollbar = ttk.Scrollbar(content_frame, orient="vertical", command=matches_tree.yview)
+        matches_tree.configure(yscrollcommand=matches_scrollbar.set)
+        matches_scrollbar.grid(row=10, column=2, sticky="ns")
+
+        def show_last_run():
+            status = get_retention_status(credentials)
+            if not status["last_run"]:
+                status_label.config(text="Retention has not run on this server yet.")
+                return
+            text = (
+                f"Last run {format_job_time(status['last_run'])}: "
+                f"{len(status['last_dropped'])} dropped"
             )
+            if status["last_errors"]:
+                text += f", {len(status['last_errors'])} failed"
+            status_label.config(text=text)
 
-        threading.Thread(target=deletion_worker, daemon=True).start()
+        def read_policy():
+            try:
+                return {
+                    "patterns": parse_patterns(patterns_var.get()),
+                    "exclude": parse_patterns(exclude_var.get()),
+                    "min_age_days": float(age_var.get()),
+                    "idle_days": float(idle_var.get()),
+                    "min_size_mb": float(size_var.get()),
+                    "max_parallel": int(parallel_var.get()),
+                    "schedule_hours": float(schedule_var.get()),
+                }
+            except (ValueError, tk.TclError):
+                messagebox.showwarning(
+                    "Input Error", "Ages, sizes and the schedule must be numbers.", parent=dialog
+                )
+                return None
+
+        def format_day(timestamp):
+            return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+        def show_candidates(candidates):
+            previewed[:] = [c["name"] for c in candidates]
+            matches_tree.delete(*matches_tree.get_children())
+            for c in sorted(candidates, key=lambda c: -(c["size_bytes"] or 0)):
+                matches_tree.insert(
+                    "",
+                    tk.END,
+                    iid=c["name"],
+                    values=(
+                        c["name"],
+                        format_size(c["size_bytes"]),
+                        format_day(c["created_at"]),
+                        format_day(c["last_activity"]),
+                        c["reason"],
+                    ),
+                )
+            status_label.config(text=retention_report(candidates).splitlines()[0])
+            progress_bar["value"] = 0
+
+        def perform_preview(policy):
+            try:
+                candidates, _ = find_retention_candidates(credentials, policy)
+                dialog.after(0, lambda: show_candidates(candidates))
+            except Exception as e:
+                dialog.after(
+                    0,
+                    lambda: messagebox.showerror(
+                        "Retention Error", f"Failed to take database inventory:\n{e}", parent=dialog
+                    ),
+                )
+
+        def on_preview():
+            policy = read_policy()
+            if policy is None:
+                return
+            if not policy["patterns"]:
+                messagebox.showwarning(
+                    "Input Error", "Please enter at least one name pattern.", parent=dialog
+                )
+                return
+            status_label.config(text="🔍 Taking database inventory...")
+            threading.Thread(target=perform_preview, args=(policy,), daemon=True).start()
+
+        def on_save():
+            policy = read_policy()
+            if policy is None:
+                return
+            save_retention_policy(credentials, policy)
+            if policy["schedule_hours"]:
+                message = f"Policy saved. It runs every {policy['schedule_hours']:g} hour(s) while the app is open."
+            else:
+                message = "Policy saved. Scheduled runs are off."
+            messagebox.showinfo("Retention Policy", message, parent=dialog)
+
+        def update_callback(message=None, progress=None):
+            def update_ui():
+                if message is not None:
+                    status_label.config(text=message)
+                if progress is not None:
+                    progress_bar["value"] = progress
+
+            dialog.after(0, update_ui)
+
+        def drop_progress_callback(db_name, status, detail):
+            def update_row():
+                if matches_tree.exists(db_name):
+                    values = list(matches_tree.item(db_name, "values"))
+                    values[4] = f"{status} {detail}".strip()
+                    matches_tree.item(db_name, values=values)
+                    matches_tree.see(db_name)
+
+            dialog.after(0, update_row)
+
+        def on_done(job):
+            dropped = job["state"].get("completed", [])
+            errors = job["state"].get("errors", {})
+
+            def finish():
+                self.load_databases_async()
+                if not dialog.winfo_exists():
+                    return
+                drop_btn.config(state="normal")
+                if job["status"] != JOB_DONE and not errors:
+                    messagebox.showerror(
+                        "Retention Error", job["error"] or job["status"], parent=dialog
+                    )
+                    return
+                text = f"✅ Dropped {len(dropped)} database(s)"
+                if errors:
+                    text = f"⚠️  Dropped {len(dropped)} database(s), {len(errors)} failed"
+                status_label.config(text=text)
+
+            dialog.after(0, finish)
+
+        def on_drop():
+            policy = read_policy()
+            if policy is None:
+                return
+            if not previewed:
+                messagebox.showwarning(
+                    "Nothing to Drop", "Run a preview first to see which databases match.", parent=dialog
+                )
+                return
+            if not messagebox.askyesno(
+                "Confirm Drop",
+                f"Drop {len(previewed)} database(s) matching the retention policy?\n\n"
+                "Databases used since the preview are skipped.\n\n"
+                "This action cannot be undone!",
+                icon="warning",
+                parent=dialog,
+            ):
+                return
+            drop_btn.config(state="disabled")
+            status_label.config(text="⏳ Queued - waiting for a free slot on this server...")
+            get_job_queue().submit(
+                JOB_RETENTION,
+                credentials,
+                {"policy": policy, "db_names": list(previewed)},
+                max_attempts=1,
+                on_update=update_callback,
+                on_done=on_done,
+                callbacks={"on_drop_progress": drop_progress_callback},
+            )
+
+        btn_frame = ttk.Frame(content_frame, style="Dialog.TFrame")
+        btn_frame.grid(row=11, column=0, columnspan=3, pady=(20, 0))
+
+        ttk.Button(
+            btn_frame, text="Preview (Dry Run)", command=on_preview, style="Success.TButton"
+        ).pack(side="left", padx=10)
+        ttk.Button(
+            btn_frame, text="Save Policy", command=on_save, style="Secondary.TButton"
+        ).pack(side="left", padx=10)
+        drop_btn = ttk.Button(
+            btn_frame, text="Drop Matches", command=on_drop, style="Danger.TButton"
+        )
+        drop_btn.pack(side="left", padx=10)
+        ttk.Button(
+            btn_frame, text="Close", command=dialog.destroy, style="Secondary.TButton"
+        ).pack(side="left", padx=10)
+
+        show_last_run()
+
+        dialog.withdraw()
+        dialog.update_idletasks()
+        x = self.winfo_rootx() + (self.winfo_width() // 2) - (900 // 2)
+        y = self.winfo_rooty() + (self.winfo_height() // 2) - (760 // 2)
+        dialog.geometry(f"900x760+{x}+{y}")
+        dialog.deiconify()
 
     def show_protection_message(self):
         """Show information about protected databases"""
@@ -1929,6 +3166,19 @@ class DBManagementPage(ttk.Frame):
         dialog.destroy()
         self.load_databases_async()
 
+    def finish_benchmark(self, dialog, entry):
+        """Handle completion of a clone strategy benchmark"""
+        self.clone_in_progress = False
+        timings = "\n".join(
+            f"{strategy}: {seconds:.2f}s" for strategy, seconds in entry["seconds"].items()
+        )
+        messagebox.showinfo(
+            "Benchmark Complete",
+            f"{timings}\n\nFastest on this server: {entry['winner']}\n\n"
+            "Auto strategy selection will use this result for templates of similar size.",
+        )
+        dialog.destroy()
+
     def finish_clone_error(self, dialog, error_message):
         """Handle clone operation error"""
         self.clone_in_progress = False
@@ -1937,6 +3187,32 @@ class DBManagementPage(ttk.Frame):
         )
         dialog.destroy()
 
+    def finish_stream_clone(self, dialog, new_name, results):
+        """Handle successful stream clone completion"""
+        self.stream_clone_in_progress = False
+        total_mb = sum(r["bytes"] for r in results) / 1024 / 1024
+        total_s = max((r["seconds"] for r in results), default=0)
+        pruned = [r for r in results if r.get("pruned_rows")]
+        pruned_note = (
+            f"\n{sum(r['pruned_rows'] for r in pruned)} row(s) referencing missing parents "
+            f"were pruned from {len(pruned)} table(s)."
+            if pruned
+            else ""
+        )
+        messagebox.showinfo(
+            "Stream Clone Complete",
+            f"Database '{new_name}' created with {len(results)} table(s), "
+            f"{total_mb:.1f} MB streamed.\nLongest table copy: {total_s:.1f}s{pruned_note}",
+        )
+        dialog.destroy()
+        self.load_databases_async()
+
+    def finish_stream_clone_error(self, dialog, error_message):
+        """Handle stream clone error"""
+        self.stream_clone_in_progress = False
+        messagebox.showerror("Stream Clone Error", f"Failed to stream clone:\n{error_message}")
+        dialog.destroy()
+
     def finish_rename_success(self, dialog, old_name, new_name):
         """Handle successful rename completion"""
         self.rename_in_progress = False
@@ -1992,29 +3268,268 @@ class DBManagementPage(ttk.Frame):
             messagebox.showerror("No Database", "No database selected for query.")
             return
 
+        self.stop_query(record=False)
         self.status_label.config(text="Executing query...")
+        self.reset_results()
+
+        credentials = self.controller.db_credentials
+        canceller = QueryCanceller(credentials)
+        self.query_canceller = canceller
+        self.running_query = sql_query
+        self.stop_query_btn.config(state="normal")
 
         def query_worker():
-            credentials = self.controller.db_credentials
             try:
-                result = execute_sql_query(credentials, self.query_db_name, sql_query)
-                self.after(0, lambda: self.display_query_results(result, sql_query))
+                result = stream_sql_query(
+                    credentials,
+                    self.query_db_name,
+                    sql_query,
+                    scrollable=True,
+                    canceller=canceller,
+                )
             except Exception as e:
-                error_result = {
+                result = {
                     "success": False,
                     "message": f"Execution error: {str(e)}",
                     "execution_time_ms": 0,
                 }
-                self.after(
-                    0, lambda: self.display_query_results(error_result, sql_query)
-                )
+            self.after(0, lambda: self.finish_query(canceller, result, sql_query))
 
         threading.Thread(target=query_worker, daemon=True).start()
+
+    def finish_query(self, canceller, result, sql_query):
+        if canceller is not self.query_canceller:
+            # Stopped or superseded; its outcome was already reported
+            if result.get("stream"):
+                threading.Thread(target=result["stream"].close, daemon=True).start()
+            return
+        self.query_canceller = None
+        self.stop_query_btn.config(state="disabled")
+        self.display_query_results(result, sql_query)
+
+    def stop_query(self, record=True):
+        """Cancel the running query on the server and release the console at once."""
+        canceller, self.query_canceller = self.query_canceller, None
+        if not record:
+            self.running_script = None
+        if canceller is None:
+            return
+        self.stop_query_btn.config(state="disabled")
+        # Sending the cancel request needs a round trip; keep it off the UI thread
+        threading.Thread(target=canceller.cancel, daemon=True).start()
+        if canceller is self.running_script:
+            # run_script still returns what ran, with the cancelled and skipped statements
+            self.status_label.config(text="Stopping script...")
+        elif record:
+            self.reset_results()
+            self.display_query_results(
+                {"success": False, "message": CANCELLED_MESSAGE, "execution_time_ms": 0},
+                self.running_query,
+            )
     
-    def display_query_results(self, result, original_query):
-        """Display query results in the treeview and add to history."""
-        self.results_tree.delete(*self.results_tree.get_children())
+    def execute_script(self):
+        """Run the editor contents as a script, one statement at a time, in a background thread."""
+        sql_script = self.sql_text.get("1.0", tk.END).strip()
+
+        if not sql_script:
+            messagebox.showwarning(
+                "Empty Query", "Please enter a SQL script to execute."
+            )
+            return
+
+        if not hasattr(self, "query_db_name"):
+            messagebox.showerror("No Database", "No database selected for query.")
+            return
+
+        self.stop_query(record=False)
+        self.status_label.config(text="Executing script...")
+        self.reset_results()
+
+        credentials = self.controller.db_credentials
+        canceller = QueryCanceller(credentials)
+        self.query_canceller = canceller
+        self.running_script = canceller
+        self.running_query = sql_script
+        self.stop_query_btn.config(state="normal")
+        single_transaction = self.script_transaction_var.get()
+        stop_on_error = self.script_stop_on_error_var.get()
+
+        def show_progress(index, total, result):
+            if canceller is self.query_canceller:
+                self.status_label.config(
+                    text=f"Executing script... statement {index} of {total}: {result['status']}"
+                )
+
+        def script_worker():
+            try:
+                results, error = run_script(
+                    credentials,
+                    self.query_db_name,
+                    sql_script,
+                    single_transaction=single_transaction,
+                    stop_on_error=stop_on_error,
+                    statement_callback=lambda i, n, r: self.after(0, lambda: show_progress(i, n, r)),
+                    canceller=canceller,
+                ), None
+            except Exception as e:
+                results, error = None, f"Execution error: {str(e)}"
+            self.after(0, lambda: self.finish_script(canceller, results, error, sql_script))
+
+        threading.Thread(target=script_worker, daemon=True).start()
+
+    def finish_script(self, canceller, results, error, sql_script):
+        if canceller is not self.running_script:
+            return
+        self.running_script = None
+        if canceller is self.query_canceller:
+            self.query_canceller = None
+            self.stop_query_btn.config(state="disabled")
+        if error:
+            self.display_query_results(
+                {"success": False, "message": error, "execution_time_ms": 0}, sql_script
+            )
+            return
+        self.display_script_results(results, sql_script)
+
+    def display_script_results(self, results, sql_script):
+        """Show a summary tab and one tab per statement for a script run."""
+        self.reset_results()
+        self.results_grid.grid_remove()
+        self.script_notebook.grid()
+
+        succeeded = all(result["status"] != STATEMENT_FAILED for result in results)
+        self.status_label.config(text=script_summary(results))
+        self.add_to_query_history(
+            sql_script, succeeded, sum(result["row_count"] for result in results)
+        )
+
+        summary_grid = VirtualGrid(self.script_notebook, style="Custom.Treeview")
+        summary_grid.set_columns(("#", "Status", "Rows", "Time (ms)", "Statement", "Message"), width=120, minwidth=60)
+        summary_grid.tree.column("Statement", width=420)
+        summary_grid.tree.column("Message", width=420)
+        summary_grid.set_store(
+            ListRowStore(
+                [
+                    (
+                        result["index"],
+                        result["status"],
+                        result["row_count"],
+                        result["execution_time_ms"],
+                        self.create_smart_query_preview(result["statement"]),
+                        result["message"],
+                    )
+                    for result in results
+                ]
+            )
+        )
+        self.script_notebook.add(summary_grid, text="Summary")
+
+        first_failure = None
+        for result in results[:MAX_SCRIPT_TABS]:
+            if result["status"] == STATEMENT_SKIPPED:
+                continue
+            grid = VirtualGrid(self.script_notebook, style="Custom.Treeview")
+            if result["columns"]:
+                grid.set_columns(result["columns"])
+                grid.set_store(ListRowStore(result["rows"]))
+            elif result["status"] == STATEMENT_FAILED:
+                grid.show_message("Error Message", result["message"])
+            else:
+                grid.show_message("Query Result", result["message"])
+            marker = "" if result["status"] == STATEMENT_OK else f" ({result['status']})"
+            self.script_notebook.add(grid, text=f"{result['index']}{marker}")
+            if result["status"] == STATEMENT_FAILED and first_failure is None:
+                first_failure = grid
+
+        self.script_notebook.select(first_failure or summary_grid)
+
+    def reset_results(self):
+        """Empty the results area and show the single results grid."""
+        for tab in self.script_notebook.tabs():
+            self.nametowidget(tab).destroy()
+        self.script_notebook.grid_remove()
+        self.results_grid.clear()
+        self.results_grid.grid()
+
+    def export_query_results(self):
+        """Stream the full result of the SQL query to a CSV, TSV or JSON Lines file."""
+        sql_query = self.sql_text.get("1.0", tk.END).strip()
+
+        if not sql_query:
+            messagebox.showwarning(
+                "Empty Query", "Please enter a SQL query to export."
+            )
+            return
+
+        if not hasattr(self, "query_db_name"):
+            messagebox.showerror("No Database", "No database selected for query.")
+            return
+
+        path = filedialog.asksaveasfilename(
+            title="Export Query Results",
+            defaultextension=".csv",
+            initialfile=f"{self.query_db_name}_export.csv",
+            filetypes=[(label, f"*{ext}") for label, ext, options in EXPORT_FORMATS.values()],
+        )
+        if not path:
+            return
+        fmt = export_format_for_path(path)
+
+        self.stop_query(record=False)
+        credentials = self.controller.db_credentials
+        canceller = QueryCanceller(credentials)
+        self.query_canceller = canceller
+        self.running_query = sql_query
+        self.stop_query_btn.config(state="normal")
+        self.status_label.config(text=f"Exporting to {path}...")
+        start_time = time.time()
+
+        def show_progress(bytes_written, rows_written):
+            if canceller is not self.query_canceller:
+                return
+            rate = bytes_written / max(time.time() - start_time, 0.001)
+            self.status_label.config(
+                text=(
+                    f"Exporting... {format_size(bytes_written)}, {rows_written:,} rows "
+                    f"({format_size(rate)}/s)"
+                )
+            )
+
+        def finish(result, error):
+            if canceller is not self.query_canceller:
+                return
+            self.query_canceller = None
+            self.stop_query_btn.config(state="disabled")
+            if error:
+                self.status_label.config(text=error)
+                messagebox.showerror("Export Error", error)
+                return
+            message = (
+                f"Exported {result['rows']:,} rows ({format_size(result['bytes'])}) "
+                f"to {result['path']} in {result['elapsed']}s"
+            )
+            self.status_label.config(text=message)
+            messagebox.showinfo("Export Complete", message)
 
+        def export_worker():
+            try:
+                result, error = export_query(
+                    credentials,
+                    self.query_db_name,
+                    sql_query,
+                    path,
+                    fmt,
+                    progress_callback=lambda b, r: self.after(0, lambda: show_progress(b, r)),
+                    canceller=canceller,
+                ), None
+            except Exception as e:
+                result, error = None, str(e)
+            self.after(0, lambda: finish(result, error))
+
+        threading.Thread(target=export_worker, daemon=True).start()
+
+    def display_query_results(self, result, original_query):
+        """Display query results in the results grid and add to history."""
         if result["success"]:
             status_text = (
                 f"{result['message']} (Execution time: {result['execution_time_ms']}ms)"
@@ -2023,45 +3538,40 @@ class DBManagementPage(ttk.Frame):
             status_text = result["message"]
 
         self.status_label.config(text=status_text)
+        self.query_status_text = status_text
 
         result_count = result.get("row_count", 0) if result["success"] else 0
         self.add_to_query_history(original_query, result["success"], result_count)
 
         if not result["success"]:
-            self.results_tree["columns"] = ("Error",)
-            self.results_tree["show"] = "headings"
-            self.results_tree.heading("Error", text="Error Message")
-            self.results_tree.column("Error", width=800)
-            self.results_tree.insert("", tk.END, values=(result["message"],))
+            self.results_grid.show_message("Error Message", result["message"])
             return
 
         if result["query_type"] == "SELECT" and result["columns"]:
-            self.results_tree["columns"] = result["columns"]
-            self.results_tree["show"] = "headings"
-
-            for col in result["columns"]:
-                self.results_tree.heading(col, text=col)
-                self.results_tree.column(col, width=180, minwidth=120)  # Increased widths
-
-            max_rows = 1000
-            rows_to_display = result["rows"][:max_rows]
-
-            for row in rows_to_display:
-                display_row = [str(val) if val is not None else "" for val in row]
-                self.results_tree.insert("", tk.END, values=display_row)
-
-            total_rows = len(result["rows"])
-            if total_rows > max_rows:
-                self.status_label.config(
-                    text=f"{status_text} (Showing {max_rows} of {total_rows} rows)"
-                )
+            self.results_grid.set_columns(result["columns"])
+            if result.get("stream"):
+                store = StreamRowStore(result["stream"], result["rows"], self, DEFAULT_FETCH_BATCH)
+            else:
+                store = ListRowStore(result["rows"])
+            self.results_grid.set_store(store)
 
         elif result["query_type"] == "MODIFICATION":
-            self.results_tree["columns"] = ("Result",)
-            self.results_tree["show"] = "headings"
-            self.results_tree.heading("Result", text="Query Result")
-            self.results_tree.column("Result", width=800)
-            self.results_tree.insert("", tk.END, values=(result["message"],))
+            self.results_grid.show_message("Query Result", result["message"])
+        else:
+            self.results_grid.clear()
+
+    def update_loaded_rows_status(self, store):
+        """Show how much of a streamed result has been loaded so far"""
+        if store.error:
+            self.status_label.config(text=f"Could not fetch more rows: {store.error}")
+        elif store.complete:
+            self.status_label.config(
+                text=f"{self.query_status_text} ({store.known_rows} rows in total)"
+            )
+        else:
+            self.status_label.config(
+                text=f"{self.query_status_text} ({store.known_rows} rows loaded - scroll for more)"
+            )
 
     def clear_query(self):
         """Clear the SQL editor."""
@@ -0,0 +1,182 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+from db import get_job_queue, format_job_time, get_drain_timeout, set_drain_timeout, MAX_DRAIN_TIMEOUT
+
+
+class JobsPage(ttk.Frame):
+    """Lists queued, running and finished operations from the persistent job queue."""
+
+    def __init__(self, parent, controller):
+        super().__init__(parent)
+        self.controller = controller
+        self.job_queue = get_job_queue()
+        self._widgets_created = False
+        self._refresh_pending = False
+
+        self.bind("<<ShowFrame>>", self.on_show_frame)
+
+    def create_widgets(self):
+        """Create widgets lazily with the app color scheme"""
+        if self._widgets_created:
+            return
+
+        main_frame = ttk.Frame(self, padding=30)
+        main_frame.pack(expand=True, fill="both")
+        main_frame.grid_rowconfigure(1, weight=1)
+        main_frame.grid_columnconfigure(0, weight=1)
+
+        title = ttk.Label(
+            main_frame,
+            text="Operation Jobs",
+            font=("Segoe UI", 24, "bold"),
+            foreground="#181F67",
+        )
+        title.grid(row=0, column=0, sticky="w", pady=(0, 20))
+
+        tree_frame = ttk.Frame(main_frame)
+        tree_frame.grid(row=1, column=0, sticky="nsew")
+        tree_frame.grid_rowconfigure(0, weight=1)
+        tree_frame.grid_columnconfigure(0, weight=1)
+
+        columns = [
+            ("kind", "Kind", 100),
+            ("target", "Target", 260),
+            ("server", "Server", 200),
+            ("priority", "Priority", 70),
+            ("status", "Status", 90),
+            ("attempts", "Attempts", 80),
+            ("created", "Created", 120),
+            ("duration", "Duration", 80),
+            ("message", "Message", 380),
+        ]
+        self.jobs_tree = ttk.Treeview(
+            tree_frame,
+            columns=[c[0] for c in columns],
+            show="headings",
+            selectmode="extended",
+        )
+        for key, heading, width in columns:
+            self.jobs_tree.heading(key, text=heading)
+            self.jobs_tree.column(key, width=width, anchor="w", stretch=(key == "message"))
+        self.jobs_tree.grid(row=0, column=0, sticky="nsew")
+
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self.jobs_tree.yview)
+        self.jobs_tree.configure(yscrollcommand=scrollbar.set)
+        scrollbar.grid(row=0, column=1, sticky="ns")
+
+        self.jobs_tree.tag_configure("Running", foreground="#181F67")
+        self.jobs_tree.tag_configure("Done", foreground="#5F8A26")
+        self.jobs_tree.tag_configure("Failed", foreground="#C0392B")
+        self.jobs_tree.tag_configure("Retry Wait", foreground="#D68910")
+        self.jobs_tree.tag_configure("Cancelled", foreground="#939498")
+
+        btn_frame = ttk.Frame(main_frame)
+        btn_frame.grid(row=2, column=0, sticky="w", pady=(20, 0))
+
+        ttk.Button(btn_frame, text="Refresh", command=self.refresh_jobs).pack(side="left", padx=(0, 10))
+        ttk.Button(btn_frame, text="Cancel Selected", command=self.cancel_selected).pack(side="left", padx=10)
+        ttk.Button(btn_frame, text="Retry Selected", command=self.retry_selected).pack(side="left", padx=10)
+        ttk.Button(btn_frame, text="Clear Finished", command=self.clear_finished).pack(side="left", padx=10)
+
+        # How long clone, rename, swap and delete wait for busy sessions before terminating them
+        drain_frame = ttk.Frame(main_frame)
+        drain_frame.grid(row=2, column=0, sticky="e", pady=(20, 0))
+
+        ttk.Label(drain_frame, text="Drain sessions for up to").pack(side="left")
+        self.drain_var = tk.StringVar(value=f"{get_drain_timeout():g}")
+        ttk.Spinbox(
+            drain_frame, from_=0, to=MAX_DRAIN_TIMEOUT, increment=5, textvariable=self.drain_var, width=6
+        ).pack(side="left", padx=8)
+        ttk.Label(drain_frame, text="s before terminating (0 = immediately)").pack(side="left")
+        ttk.Button(drain_frame, text="Apply", command=self.apply_drain_timeout).pack(side="left", padx=(10, 0))
+
+        self.summary_label = ttk.Label(main_frame, text="", foreground="#939498")
+        self.summary_label.grid(row=3, column=0, sticky="w", pady=(15, 0))
+
+        self.job_queue.add_listener(self.on_jobs_changed)
+        self.bind("<Destroy>", self.on_destroy)
+
+        self._widgets_created = True
+
+    def on_show_frame(self, event):
+        """Handle frame show event"""
+        if not self._widgets_created:
+            self.create_widgets()
+        self.refresh_jobs()
+
+    def on_destroy(self, event):
+        if event.widget is self:
+            self.job_queue.remove_listener(self.on_jobs_changed)
+
+    def on_jobs_changed(self):
+        """Called from worker threads; coalesce updates into one refresh on the UI thread"""
+        if self._refresh_pending:
+            return
+        self._refresh_pending = True
+        try:
+            self.after(250, self.refresh_jobs)
+        except tk.TclError:
+            pass
+
+    def refresh_jobs(self):
+        self._refresh_pending = False
+        if not self._widgets_created:
+            return
+
+        selected = set(self.jobs_tree.selection())
+        self.jobs_tree.delete(*self.jobs_tree.get_children())
+        counts = {}
+        for job in self.job_queue.jobs():
+            counts[job["status"]] = counts.get(job["status"], 0) + 1
+            duration = f"{job['duration_s']:.1f}s" if job.get("duration_s") is not None else ""
+            message = job.get("message") or ""
+            if job["status"] == "Running" and job.get("progress") is not None:
+                message = f"{job['progress']:.0f}% - {message}"
+            self.jobs_tree.insert(
+                "",
+                tk.END,
+                iid=job["id"],
+                values=(
+                    job["kind"],
+                    self.job_queue.describe(job),
+                    job["server"],
+                    job["priority"],
+                    job["status"],
+                    f"{job['attempts']}/{job['max_attempts']}",
+                    format_job_time(job["created_at"]),
+                    duration,
+                    message,
+                ),
+                tags=(job["status"],),
+            )
+        still_there = [iid for iid in selected if self.jobs_tree.exists(iid)]
+        if still_there:
+            self.jobs_tree.selection_set(still_there)
+
+        self.summary_label.config(
+            text="  ".join(f"{status}: {count}" for status, count in sorted(counts.items())) or "No jobs"
+        )
+
+    def cancel_selected(self):
+        cancelled = [job_id for job_id in self.jobs_tree.selection() if self.job_queue.cancel(job_id)]
+        if self.jobs_tree.selection() and not cancelled:
+            messagebox.showinfo("Cancel Jobs", "Only queued or retry-waiting jobs can be cancelled.")
+        self.refresh_jobs()
+
+    def retry_selected(self):
+        retried = [job_id for job_id in self.jobs_tree.selection() if self.job_queue.retry(job_id)]
+        if self.jobs_tree.selection() and not retried:
+            messagebox.showinfo("Retry Jobs", "Only failed or cancelled jobs can be retried.")
+        self.refresh_jobs()
+
+    def clear_finished(self):
+        self.job_queue.clear_finished()
+        self.refresh_jobs()
+
+    def apply_drain_timeout(self):
+        try:
+            seconds = set_drain_timeout(float(self.drain_var.get()))
+        except ValueError:
+            messagebox.showwarning("Input Error", "The drain time must be a number of seconds.")
+            return
+        self.drain_var.set(f"{seconds:g}")
@@ -1,6 +1,14 @@
+import threading
 import tkinter as tk
 from tkinter import ttk, messagebox
-from db import test_connection
+from db import (
+    test_connection,
+    get_job_queue,
+    restore_stale_lockouts,
+    start_retention_scheduler,
+    start_trash_reclaimer,
+    sweep_frozen_templates,
+)
 
 
 class LoginPage(ttk.Frame):
@@ -151,9 +159,34 @@ class LoginPage(ttk.Frame):
         success, error_msg = test_connection(credentials)
         if success:
             self.controller.db_credentials = credentials
+            # Let queued or interrupted jobs for this server resume
+            get_job_queue().set_credentials(credentials)
+            # Undo source lockouts left by clones interrupted on a previous run
+            try:
+                restored = restore_stale_lockouts(credentials)
+                if restored:
+                    print(f"Restored connection settings of: {', '.join(restored)}")
+            except Exception as e:
+                print(f"Could not restore interrupted source lockouts: {e}")
+            # Run saved clone retention policies on their schedule
+            start_retention_scheduler(credentials)
+            # Reclaim the space of databases deleted with fast delete
+            start_trash_reclaimer(credentials)
+            # Drop frozen templates left by fan-out batches that were killed mid-run
+            threading.Thread(
+                target=self.sweep_frozen_templates, args=(credentials,), daemon=True
+            ).start()
             # Directly proceed to the next page.
             self.controller.show_frame("DBManagementPage")
         else:
             messagebox.showerror(
                 "Connection Failed", f"Connection Failed:\n{error_msg}"
-            )
\ No newline at end of file
+            )
+
+    def sweep_frozen_templates(self, credentials):
+        try:
+            dropped = sweep_frozen_templates(credentials)
+            if dropped:
+                print(f"Dropped stale frozen templates: {', '.join(dropped)}")
+        except Exception as e:
+            print(f"Could not sweep stale frozen templates: {e}")
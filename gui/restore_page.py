@@ -1,8 +1,7 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-import threading
 import os
-from db import create_database, restore_database, terminate_and_delete_database
+from db import get_job_queue, JOB_RESTORE, JOB_DONE, PRIORITY_HIGH
 from gui.snake_game import SnakeGame
 
 
@@ -10,7 +9,6 @@ class RestorePage(ttk.Frame):
     def __init__(self, parent, controller):
         super().__init__(parent)
         self.controller = controller
-        self.restore_thread = None
         self._widgets_created = False
 
         # Bind to show frame event for lazy loading
@@ -367,37 +365,34 @@ class RestorePage(ttk.Frame):
         # Show snake game for entertainment
         self.snake_game.grid()
 
-        # Start restore in background
-        self.restore_thread = threading.Thread(
-            target=self.perform_restore,
-            args=(db_name, backup_file, pg_restore_dir),
-            daemon=True,
-        )
-        self.restore_thread.start()
+        # Queue the restore; the job survives an app restart and cleans up
+        # the half-created database if it fails
+        self.perform_restore(db_name, backup_file, pg_restore_dir)
 
     def perform_restore(self, db_name, backup_file, pg_restore_dir):
-        """Perform restore operation in background"""
+        """Submit the restore operation to the job queue"""
         credentials = self.controller.db_credentials
 
-        try:
-            # Update status
-            self.update_status("Creating new database...")
-            create_database(credentials, db_name)
-
-            self.update_status("Restoring data from backup...")
-            restore_database(credentials, db_name, backup_file, pg_restore_dir)
-
-            # Success
-            self.after(0, lambda: self.restore_success(db_name))
-
-        except Exception as e:
-            # Cleanup on error
-            try:
-                terminate_and_delete_database(credentials, db_name)
-            except:
-                pass  # Ignore cleanup errors
-
-            self.after(0, lambda: self.restore_error(str(e)))
+        def on_done(job):
+            if job["status"] == JOB_DONE:
+                self.after(0, lambda: self.restore_success(db_name))
+            else:
+                error = job["error"] or job["status"]
+                self.after(0, lambda: self.restore_error(error))
+
+        self.update_status("⏳ Queued - waiting for a free slot on this server...")
+        get_job_queue().submit(
+            JOB_RESTORE,
+            credentials,
+            {
+                "db_name": db_name,
+                "backup_file": os.path.abspath(backup_file),
+                "pg_restore_dir": pg_restore_dir,
+            },
+            priority=PRIORITY_HIGH,
+            on_update=lambda message, progress=None: message and self.update_status(message),
+            on_done=on_done,
+        )
 
     def restore_success(self, db_name):
         """Handle successful restore"""
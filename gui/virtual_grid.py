@@ -0,0 +1,469 @@
+import threading
+import tkinter as tk
+from bisect import bisect_right
+from collections import OrderedDict, deque
+from itertools import chain
+from tkinter import ttk
+from db import ColumnarRows
+
+DEFAULT_PAGE_SIZE = 500
+MAX_CACHED_PAGES = 40
+MAX_PENDING_PAGES = 4
+PLACEHOLDER = "…"
+
+
+def format_cell(value):
+    return str(value) if value is not None else ""
+
+
+class RowSelection:
+    """
+    Selected row indices kept as sorted, disjoint ranges. A Shift range stays
+    one range however many rows it spans, and Control toggles split or join
+    ranges instead of expanding them into single indices.
+    """
+
+    def __init__(self, ranges=()):
+        self._set([])
+        for r in ranges:
+            self.add(r.start, r.stop)
+
+    def _set(self, ranges):
+        self.ranges = sorted(ranges, key=lambda r: r.start)
+        self._starts = [r.start for r in self.ranges]
+
+    def __contains__(self, index):
+        i = bisect_right(self._starts, index) - 1
+        return i >= 0 and index < self.ranges[i].stop
+
+    def __len__(self):
+        return sum(len(r) for r in self.ranges)
+
+    def __iter__(self):
+        return chain.from_iterable(self.ranges)
+
+    def add(self, start, stop):
+        """Select rows start .. stop - 1, merging with touching ranges."""
+        kept = []
+        for r in self.ranges:
+            if r.stop < start or r.start > stop:
+                kept.append(r)
+            else:
+                start, stop = min(start, r.start), max(stop, r.stop)
+        self._set(kept + [range(start, stop)])
+
+    def remove(self, start, stop):
+        """Deselect rows start .. stop - 1, splitting the ranges they fall in."""
+        kept = []
+        for r in self.ranges:
+            if r.stop <= start or r.start >= stop:
+                kept.append(r)
+                continue
+            if r.start < start:
+                kept.append(range(r.start, start))
+            if r.stop > stop:
+                kept.append(range(stop, r.stop))
+        self._set(kept)
+
+    def toggle(self, index):
+        if index in self:
+            self.remove(index, index + 1)
+        else:
+            self.add(index, index + 1)
+
+
+class ListRowStore:
+    """Row store over rows that are already in memory."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        self.complete = True
+        self.error = None
+        self.on_change = None
+
+    @property
+    def row_count(self):
+        return len(self.rows)
+
+    @property
+    def known_rows(self):
+        return len(self.rows)
+
+    def get_row(self, index):
+        return self.rows[index]
+
+    def request_more(self):
+        pass
+
+    def request_count(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class StreamRowStore:
+    """
+    Pages of a scrollable QueryStream. Pages are fetched on a worker thread
+    the first time they are needed and only the MAX_CACHED_PAGES most recently
+    used ones are kept, so memory stays bounded however far the user scrolls.
+    The row count grows as pages arrive until the end of the result is seen.
+    """
+
+    def __init__(self, stream, first_rows, widget, page_size=DEFAULT_PAGE_SIZE):
+        self.stream = stream
+        self.page_size = page_size
+        self.pages = OrderedDict([(0, first_rows)])
+        self.known_rows = len(first_rows)
+        self.complete = stream.total is not None
+        self.error = None
+        self.on_change = None
+        self._widget = widget
+        self._loading = set()
+        self._pending = deque()
+        self._pending_lock = threading.Lock()
+        self._worker_running = False
+        self._counting = False
+        self._closed = False
+
+    @property
+    def row_count(self):
+        return self.known_rows
+
+    def get_row(self, index):
+        """Return the row at index, or None while its page is being loaded."""
+        page_no, offset = divmod(index, self.page_size)
+        page = self.pages.get(page_no)
+        if page is None:
+            self._request(page_no)
+            return None
+        self.pages.move_to_end(page_no)
+        return page[offset] if offset < len(page) else None
+
+    def request_more(self):
+        """Load the page after the last known row."""
+        if not self.complete:
+            self._request(self.known_rows // self.page_size)
+
+    def request_count(self):
+        """Count the rows on the server, so the last page can be fetched without the ones before it."""
+        if self.complete or self._closed or self.error or self._counting:
+            return
+        self._counting = True
+        threading.Thread(target=self._count_worker, daemon=True).start()
+
+    def _count_worker(self):
+        try:
+            total, error = self.stream.count_rows(), None
+        except Exception as e:
+            total, error = None, str(e)
+        try:
+            self._widget.after(0, lambda: self._counted(total, error))
+        except (RuntimeError, tk.TclError):
+            pass
+
+    def _counted(self, total, error):
+        self._counting = False
+        if self._closed:
+            return
+        if error:
+            self.error = error
+        else:
+            self.known_rows = total
+            self.complete = True
+        if self.on_change:
+            self.on_change()
+
+    def _request(self, page_no):
+        if self._closed or self.error or page_no in self._loading or page_no in self._pending:
+            return
+        with self._pending_lock:
+            self._pending.append(page_no)
+            # While the scrollbar is dragged only the latest pages are still wanted
+            while len(self._pending) > MAX_PENDING_PAGES:
+                self._pending.popleft()
+            if self._worker_running:
+                return
+            self._worker_running = True
+        threading.Thread(target=self._fetch_worker, daemon=True).start()
+
+    def _fetch_worker(self):
+        while True:
+            with self._pending_lock:
+                if not self._pending or self._closed:
+                    self._worker_running = False
+                    return
+                page_no = self._pending.pop()
+                self._loading.add(page_no)
+            try:
+                rows = self.stream.fetch_range(page_no * self.page_size, self.page_size)
+                rows, error = ColumnarRows(self.stream.columns, rows), None
+            except Exception as e:
+                rows, error = [], str(e)
+            try:
+                self._widget.after(0, lambda p=page_no, r=rows, e=error: self._loaded(p, r, e))
+            except (RuntimeError, tk.TclError):
+                error = "window closed"
+            if error:
+                with self._pending_lock:
+                    self._pending.clear()
+                    self._worker_running = False
+                return
+
+    def _loaded(self, page_no, rows, error):
+        self._loading.discard(page_no)
+        if self._closed:
+            return
+        if error:
+            self.error = error
+        else:
+            self.pages[page_no] = rows
+            self.pages.move_to_end(page_no)
+            while len(self.pages) > MAX_CACHED_PAGES:
+                self.pages.popitem(last=False)
+            self.known_rows = max(self.known_rows, page_no * self.page_size + len(rows))
+            if len(rows) < self.page_size:
+                self.complete = True
+        if self.on_change:
+            self.on_change()
+
+    def close(self):
+        self._closed = True
+        self._pending.clear()
+        self.pages.clear()
+        if self._loading or self._counting:
+            # Do not wait for a page or count that is no longer wanted
+            self.stream.cancel()
+        threading.Thread(target=self.stream.close, daemon=True).start()
+
+
+class VirtualGrid(ttk.Frame):
+    """
+    Results grid that keeps only as many Treeview items as fit on screen and
+    fills them from a row store as the view scrolls. Rendering cost depends on
+    the window height, not on the number of rows, so millions of rows scroll
+    as smoothly as a hundred. Columns are ordinary Treeview columns and can be
+    resized by dragging their headings; the selection is kept by row index
+    as ranges (see RowSelection), so selecting a million rows is free.
+    Jumping to the end of a streamed result counts its rows on the server and
+    fetches only the last page.
+    """
+
+    def __init__(self, parent, style="Custom.Treeview", on_rows_changed=None, **kwargs):
+        super().__init__(parent, **kwargs)
+        self.columnconfigure(0, weight=1)
+        self.rowconfigure(0, weight=1)
+
+        self.tree = ttk.Treeview(self, show="headings", selectmode="extended", style=style)
+        self.vscroll = ttk.Scrollbar(self, orient="vertical", command=self.yview)
+        self.hscroll = ttk.Scrollbar(self, orient="horizontal", command=self.tree.xview)
+        self.tree.configure(xscrollcommand=self.hscroll.set)
+
+        self.tree.grid(row=0, column=0, sticky="nsew")
+        self.vscroll.grid(row=0, column=1, sticky="ns")
+        self.hscroll.grid(row=1, column=0, sticky="ew")
+
+        self.row_height = int(ttk.Style().lookup(style, "rowheight") or 20)
+        self.on_rows_changed = on_rows_changed
+        self.store = None
+        self.top = 0
+        self.visible = 1
+        self.selected = RowSelection()
+        self.cursor = None
+        self.anchor = None
+        self._end_wanted = None
+        self._click_state = None
+        self._items = []
+
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<Button-1>", self._on_click, add="+")
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_rows(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_rows(3))
+        for key, delta in (("<Up>", -1), ("<Down>", 1), ("<Prior>", "-page"), ("<Next>", "page")):
+            self.tree.bind(key, lambda e, d=delta: self._on_key(d, False))
+            self.tree.bind(f"<Shift-{key[1:]}", lambda e, d=delta: self._on_key(d, True))
+        self.tree.bind("<Home>", lambda e: self._move_cursor_to(0, False))
+        self.tree.bind("<End>", lambda e: self._jump_to_end(move_cursor=True))
+
+    # --- data ---
+
+    def set_columns(self, columns, width=180, minwidth=120):
+        self._clear_items()
+        self.tree["columns"] = list(columns)
+        for col in columns:
+            self.tree.heading(col, text=col)
+            self.tree.column(col, width=width, minwidth=minwidth, stretch=False)
+
+    def set_store(self, store):
+        """Show the rows of store (a ListRowStore or StreamRowStore), replacing the previous one."""
+        if self.store is not None:
+            self.store.close()
+        self.store = store
+        self.top = 0
+        self.selected = RowSelection()
+        self.cursor = self.anchor = self._end_wanted = None
+        self._clear_items()
+        if store is not None:
+            store.on_change = self._on_store_change
+        self.render()
+
+    def show_message(self, heading, message, width=800):
+        """Show a single message row, e.g. an error or the result of a modification."""
+        self.set_columns((heading,), width=width, minwidth=width)
+        self.set_store(ListRowStore([(message,)]))
+
+    def clear(self):
+        self.set_store(None)
+        self.tree["columns"] = ()
+
+    def selected_indices(self):
+        """Iterate the selected row indices in order, without expanding the ranges up front."""
+        return iter(self.selected)
+
+    # --- rendering ---
+
+    def _row_count(self):
+        return self.store.row_count if self.store is not None else 0
+
+    def _clear_items(self):
+        if self._items:
+            self.tree.delete(*self._items)
+        self._items = []
+
+    def render(self):
+        total = self._row_count()
+        self.top = max(0, min(self.top, total - self.visible))
+        count = max(0, min(self.visible, total - self.top))
+
+        while len(self._items) > count:
+            self.tree.delete(self._items.pop())
+        while len(self._items) < count:
+            self._items.append(self.tree.insert("", tk.END))
+
+        columns = len(self.tree["columns"]) or 1
+        for offset, iid in enumerate(self._items):
+            row = self.store.get_row(self.top + offset)
+            if row is None:
+                values = (PLACEHOLDER,) * columns
+            else:
+                values = [format_cell(value) for value in row]
+            self.tree.item(iid, values=values)
+
+        visible_selection = [
+            iid for offset, iid in enumerate(self._items) if self.top + offset in self.selected
+        ]
+        if tuple(visible_selection) != self.tree.selection():
+            self.tree.selection_set(visible_selection)
+        if self.cursor is not None and 0 <= self.cursor - self.top < len(self._items):
+            self.tree.focus(self._items[self.cursor - self.top])
+
+        if total:
+            self.vscroll.set(self.top / total, min(1.0, (self.top + count) / total))
+        else:
+            self.vscroll.set(0, 1)
+
+        # Keep one screen of rows ahead of the view loaded
+        if self.store is not None and self.top + 2 * self.visible >= self.store.known_rows:
+            self.store.request_more()
+
+    def _on_store_change(self):
+        if self._end_wanted and (self.store.complete or self.store.error):
+            move_cursor, self._end_wanted = self._end_wanted == "cursor", None
+            if self.store.complete:
+                self._jump_to_end(move_cursor)
+        self.render()
+        if self.on_rows_changed:
+            self.on_rows_changed(self.store)
+
+    def _on_resize(self, event):
+        # One row's height is taken by the headings
+        visible = max(1, event.height // self.row_height - 1)
+        if visible != self.visible:
+            self.visible = visible
+            self.render()
+
+    # --- scrolling ---
+
+    def yview(self, *args):
+        total = self._row_count()
+        if not total:
+            return
+        self._end_wanted = None
+        if args[0] == "moveto":
+            self.top = int(float(args[1]) * total)
+            if self.top + self.visible >= total and not self.store.complete:
+                self._jump_to_end(move_cursor=False)
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            self.top += amount * self.visible if args[2] == "pages" else amount
+        self.render()
+
+    def _jump_to_end(self, move_cursor):
+        if self.store is not None and not self.store.complete:
+            # Paging through to the end would fetch every page on the way
+            self._end_wanted = "cursor" if move_cursor else "view"
+            self.store.request_count()
+            return "break"
+        if move_cursor:
+            return self._move_cursor_to(self._row_count() - 1, False)
+        self.top = self._row_count()
+        self.render()
+        return "break"
+
+    def _scroll_rows(self, rows):
+        self._end_wanted = None
+        self.top += rows
+        self.render()
+        return "break"
+
+    def _on_mousewheel(self, event):
+        return self._scroll_rows(-3 if event.delta > 0 else 3)
+
+    # --- selection ---
+
+    def _on_click(self, event):
+        self._click_state = event.state
+
+    def _on_select(self, event):
+        # Selections made by render() only mirror self.selected; clicks change it
+        state, self._click_state = self._click_state, None
+        focus = self.tree.focus()
+        if state is None or focus not in self._items:
+            return
+        index = self.top + self._items.index(focus)
+        if state & 0x0001 and self.anchor is not None:  # Shift: range from the anchor
+            self.selected = RowSelection([range(min(self.anchor, index), max(self.anchor, index) + 1)])
+        elif state & 0x0004:  # Control: toggle, keeping rows scrolled out of view
+            self.selected.toggle(index)
+            self.anchor = index
+        else:
+            self.selected = RowSelection([range(index, index + 1)])
+            self.anchor = index
+        self.cursor = index
+
+    def _on_key(self, delta, extend):
+        self._end_wanted = None
+        if delta in ("page", "-page"):
+            delta = self.visible if delta == "page" else -self.visible
+        start = self.cursor if self.cursor is not None else self.top
+        return self._move_cursor_to(start + delta, extend)
+
+    def _move_cursor_to(self, index, extend):
+        total = self._row_count()
+        if not total:
+            return "break"
+        index = max(0, min(index, total - 1))
+        if extend and self.anchor is not None:
+            self.selected = RowSelection([range(min(self.anchor, index), max(self.anchor, index) + 1)])
+        else:
+            self.selected = RowSelection([range(index, index + 1)])
+            self.anchor = index
+        self.cursor = index
+        if index < self.top:
+            self.top = index
+        elif index >= self.top + self.visible:
+            self.top = index - self.visible + 1
+        self.render()
+        return "break"
@@ -3,6 +3,7 @@ from tkinter import ttk, messagebox
 from gui.login_page import LoginPage
 from gui.db_management_page import DBManagementPage
 from gui.restore_page import RestorePage
+from gui.jobs_page import JobsPage
 
 
 class App(tk.Tk):
@@ -109,6 +110,7 @@ class App(tk.Tk):
         buttons = [
             ("DB Management", "DBManagementPage"),
             ("Restore", "RestorePage"),
+            ("Jobs", "JobsPage"),
             ("Logout", None),
         ]
 
@@ -142,6 +144,7 @@ class App(tk.Tk):
             "LoginPage": LoginPage,
             "DBManagementPage": DBManagementPage,
             "RestorePage": RestorePage,
+            "JobsPage": JobsPage,
         }
 
         if page_name in page_classes:
@@ -166,7 +169,7 @@ class App(tk.Tk):
         self.db_credentials = {}
 
         # Clear any cached frames except login for memory efficiency
-        frames_to_clear = ["DBManagementPage", "RestorePage"]
+        frames_to_clear = ["DBManagementPage", "RestorePage", "JobsPage"]
         for frame_name in frames_to_clear:
             if frame_name in self.frames:
                 self.frames[frame_name].destroy()